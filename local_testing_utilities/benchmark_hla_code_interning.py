@@ -0,0 +1,121 @@
+"""
+Micro-benchmark of the interned HLA codes (see HLA_CODE_TABLE) on the high res example data from tests/resources.
+
+Compares the detection of the group and of the letter at the end of the high res code by regexes with the interned
+codes (both detected once per distinct code) and measures compatibility index and crossmatch of all donor-recipient
+pairs. Run from the repository root:
+
+    python -m local_testing_utilities.benchmark_hla_code_interning
+"""
+import itertools
+import json
+import os
+import re
+import timeit
+from typing import Callable, List, Tuple
+
+from local_testing_utilities.generate_patients import LARGE_DATA_FOLDER
+from txmatching.data_transfer_objects.patients.patient_parameters_dto import \
+    HLATypingRawDTO
+from txmatching.database.sql_alchemy_schema import HLAAntibodyRawModel
+# pylint: disable=protected-access
+# the uncached group detection is measured
+from txmatching.patients.hla_code import _group_from_codes
+# pylint: enable=protected-access
+from txmatching.patients.hla_model import (HLAAntibodies, HLAAntibodyRaw,
+                                           HLAType, HLATypeRaw, HLATyping)
+from txmatching.utils.hla_system.compatibility_index import compatibility_index
+from txmatching.utils.hla_system.hla_crossmatch import \
+    is_positive_hla_crossmatch
+from txmatching.utils.hla_system.hla_transformations.hla_transformations_store import (
+    parse_hla_antibodies_raw_and_return_parsing_issue_list,
+    parse_hla_typing_raw_and_return_parsing_issue_list)
+
+REPEAT = 5
+
+
+def _load_patients() -> Tuple[List[HLATyping], List[HLATyping], List[HLAAntibodies]]:
+    donor_hla_typings, recipient_hla_typings, recipients_antibodies = [], [], []
+    for filename in sorted(os.listdir(LARGE_DATA_FOLDER)):
+        with open(os.path.join(LARGE_DATA_FOLDER, filename), encoding='utf-8') as data_file:
+            patients = json.load(data_file)
+        donor_hla_typings.extend(_parse_hla_typing(donor['hla_typing']) for donor in patients['donors'])
+        for recipient in patients['recipients']:
+            recipient_hla_typings.append(_parse_hla_typing(recipient['hla_typing']))
+            recipients_antibodies.append(_parse_antibodies(recipient['hla_antibodies']))
+    return donor_hla_typings, recipient_hla_typings, recipients_antibodies
+
+
+def _parse_hla_typing(raw_codes: List[str]) -> HLATyping:
+    hla_types_raw = [HLATypeRaw(raw_code) for raw_code in raw_codes]
+    hla_typing_dto = parse_hla_typing_raw_and_return_parsing_issue_list(HLATypingRawDTO(hla_types_raw))[1]
+    return HLATyping(hla_types_raw_list=hla_types_raw, hla_per_groups=hla_typing_dto.hla_per_groups)
+
+
+def _parse_antibodies(antibodies: List[dict]) -> HLAAntibodies:
+    antibodies_raw = [HLAAntibodyRaw(raw_code=antibody['name'], mfi=antibody['mfi'], cutoff=antibody['cutoff'])
+                      for antibody in antibodies]
+    antibodies_dto = parse_hla_antibodies_raw_and_return_parsing_issue_list([
+        HLAAntibodyRawModel(raw_code=antibody.raw_code, mfi=antibody.mfi, cutoff=antibody.cutoff)
+        for antibody in antibodies_raw
+    ])[1]
+    return HLAAntibodies(hla_antibodies_raw_list=antibodies_raw,
+                         hla_antibodies_per_groups=antibodies_dto.hla_antibodies_per_groups)
+
+
+def _hla_types(hla_typings: List[HLATyping]) -> List[HLAType]:
+    return [hla_type for hla_typing in hla_typings for hla_per_group in hla_typing.hla_per_groups
+            for hla_type in hla_per_group.hla_types]
+
+
+def _same_high_res_regex(donor_hla_type: HLAType, recipient_hla_type: HLAType) -> bool:
+    return (recipient_hla_type.code.high_res == donor_hla_type.code.high_res
+            and donor_hla_type.code.high_res is not None
+            and not re.match(r'.*[A-Z]$', donor_hla_type.code.high_res))
+
+
+def _same_high_res_interned(donor_hla_type: HLAType, recipient_hla_type: HLAType) -> bool:
+    return (recipient_hla_type.code.high_res == donor_hla_type.code.high_res
+            and donor_hla_type.code.high_res is not None
+            and donor_hla_type.code.interned.high_res_without_letter)
+
+
+def _best_time(function: Callable[[], object], number: int) -> float:
+    return min(timeit.repeat(function, repeat=REPEAT, number=number)) / number
+
+
+def _print_comparison(name: str, regex_time: float, interned_time: float):
+    print(f'{name:<32} regexes {regex_time * 1e3:9.3f} ms   interned {interned_time * 1e3:9.3f} ms   '
+          f'speedup {regex_time / interned_time:5.1f}x')
+
+
+def main():
+    donor_hla_typings, recipient_hla_typings, recipients_antibodies = _load_patients()
+    print(f'{len(donor_hla_typings)} donors, {len(recipient_hla_typings)} recipients')
+
+    codes = [hla_type.code for hla_type in _hla_types(donor_hla_typings + recipient_hla_typings)]
+    _print_comparison(
+        'group detection',
+        _best_time(lambda: [_group_from_codes.__wrapped__(code.high_res, code.broad) for code in codes], 10),
+        _best_time(lambda: [_group_from_codes(code.high_res, code.broad) for code in codes], 10)
+    )
+
+    hla_type_pairs = list(itertools.product(_hla_types(donor_hla_typings), _hla_types(recipient_hla_typings)))
+    _print_comparison(
+        'high res match of all HLA pairs',
+        _best_time(lambda: [_same_high_res_regex(*hla_type_pair) for hla_type_pair in hla_type_pairs], 1),
+        _best_time(lambda: [_same_high_res_interned(*hla_type_pair) for hla_type_pair in hla_type_pairs], 1)
+    )
+
+    ci_time = _best_time(lambda: [compatibility_index(donor_hla_typing, recipient_hla_typing)
+                                  for donor_hla_typing in donor_hla_typings
+                                  for recipient_hla_typing in recipient_hla_typings], 1)
+    crossmatch_time = _best_time(lambda: [is_positive_hla_crossmatch(donor_hla_typing, recipient_antibodies, True)
+                                          for donor_hla_typing in donor_hla_typings
+                                          for recipient_antibodies in recipients_antibodies], 1)
+    print(f'{"compatibility index, all pairs":<32} {ci_time * 1e3:9.3f} ms')
+    print(f'{"crossmatch, all pairs":<32} {crossmatch_time * 1e3:9.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
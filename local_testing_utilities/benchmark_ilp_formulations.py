@@ -0,0 +1,74 @@
+"""
+Benchmark of the ILP formulations (see ILPFormulation) on the example txm events created by populate_large_db.
+
+Compares the edge formulation with the lazily added length constraints with the cycle formulation (PICEF) for
+several limits of the cycle and sequence lengths. Run from the repository root against the populated local database:
+
+    python -m local_testing_utilities.benchmark_ilp_formulations
+"""
+import time
+from typing import Iterable, List, Tuple
+
+from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.database.services.txm_event_service import (
+    get_txm_event_complete, get_txm_event_db_id_by_name)
+from txmatching.scorers.scorer_from_config import scorer_from_configuration
+from txmatching.solvers.ilp_solver.ilp_dataclasses import (
+    ILPFormulation, InternalILPSolverParameters)
+from txmatching.solvers.ilp_solver.solution import Solution
+from txmatching.solvers.ilp_solver.solve_ilp import solve_ilp
+from txmatching.solvers.ilp_solver.txm_configuration_for_ilp import \
+    DataAndConfigurationForILPSolver
+from txmatching.utils.enums import Solver
+from txmatching.web import create_app
+
+TXM_EVENT_NAMES = ['mock_data_CZE_CAN_IND', 'high_res_example_data']
+MAX_NUMBER_OF_MATCHINGS = 20
+# (max cycle length, max sequence length)
+LENGTH_LIMITS: List[Tuple[int, int]] = [(4, 4), (3, 2), (6, 6)]
+REPEAT = 3
+
+
+def get_data_and_configuration(txm_event_name: str,
+                               config_parameters: ConfigParameters) -> DataAndConfigurationForILPSolver:
+    txm_event = get_txm_event_complete(get_txm_event_db_id_by_name(txm_event_name))
+    donors_dict = txm_event.active_and_valid_donors_dict
+    recipients_dict = txm_event.active_and_valid_recipients_dict
+    score_matrix = scorer_from_configuration(config_parameters).get_score_matrix(recipients_dict, donors_dict)
+    return DataAndConfigurationForILPSolver(donors_dict, recipients_dict, config_parameters, score_matrix)
+
+
+def get_weights(data_and_configuration: DataAndConfigurationForILPSolver, solutions: Iterable[Solution]) -> List[int]:
+    return [sum(data_and_configuration.graph[from_node][to_node]['weight'] for from_node, to_node in solution.edges)
+            for solution in solutions]
+
+
+def main():
+    for txm_event_name in TXM_EVENT_NAMES:
+        for max_cycle_length, max_sequence_length in LENGTH_LIMITS:
+            data_and_configuration = get_data_and_configuration(txm_event_name, ConfigParameters(
+                solver_constructor_name=Solver.ILPSolver,
+                max_number_of_matchings=MAX_NUMBER_OF_MATCHINGS,
+                max_cycle_length=max_cycle_length,
+                max_sequence_length=max_sequence_length))
+            print(f'{txm_event_name}: {data_and_configuration.graph.number_of_nodes()} nodes, '
+                  f'{data_and_configuration.graph.number_of_edges()} edges, max cycle length {max_cycle_length}, '
+                  f'max sequence length {max_sequence_length}, {MAX_NUMBER_OF_MATCHINGS} matchings')
+
+            weights_per_formulation = {}
+            for formulation in ILPFormulation:
+                solve_times = []
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    solutions = list(solve_ilp(data_and_configuration,
+                                               InternalILPSolverParameters(formulation=formulation)))
+                    solve_times.append(time.perf_counter() - start)
+                weights_per_formulation[formulation] = get_weights(data_and_configuration, solutions)
+                print(f'    {formulation.name:<6} {min(solve_times):8.3f} s')
+            print(f'    same weights {len(set(map(tuple, weights_per_formulation.values()))) == 1}')
+
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        main()
@@ -0,0 +1,11 @@
+from txmatching.database.services.config_service import \
+    fill_missing_comparison_fingerprints
+from txmatching.database.services.pairing_result_service import \
+    fill_missing_config_fingerprints
+from txmatching.web import create_app
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        fill_missing_comparison_fingerprints()
+        fill_missing_config_fingerprints()
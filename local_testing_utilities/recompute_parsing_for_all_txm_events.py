@@ -0,0 +1,8 @@
+from txmatching.database.services.patient_service import \
+    recompute_hla_and_antibodies_parsing_for_all_txm_events
+from txmatching.web import create_app
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        recompute_hla_and_antibodies_parsing_for_all_txm_events()
@@ -1,4 +1,5 @@
 from txmatching.database.db import db
+from txmatching.database.services.txm_event_cache import txm_event_cache
 from txmatching.database.sql_alchemy_schema import TxmEventModel
 from txmatching.patients.patient import TxmEvent
 
@@ -8,6 +9,7 @@ def create_or_overwrite_txm_event(name: str) -> TxmEvent:
     if previous_txm_model:
         db.session.delete(previous_txm_model)
         db.session.flush()
+        txm_event_cache.invalidate(previous_txm_model.id)
     txm_event_model = TxmEventModel(name=name)
     db.session.add(txm_event_model)
     db.session.commit()
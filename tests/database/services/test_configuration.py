@@ -171,3 +171,34 @@ class TestConfiguration(DbTests):
             ConfigParameters(max_matchings_to_show_to_viewer=20),
             ConfigParameters(max_matchings_to_show_to_viewer=20)
         )
+
+    def test_configuration_comparison_fingerprint(self):
+        self.assertEqual(
+            ConfigParameters(forbidden_country_combinations=[
+                ForbiddenCountryCombination(Country.CZE, Country.AUT),
+                ForbiddenCountryCombination(Country.ISR, Country.CAN),
+            ]).comparison_fingerprint(),
+            ConfigParameters(forbidden_country_combinations=[
+                ForbiddenCountryCombination(Country.ISR, Country.CAN),
+                ForbiddenCountryCombination(Country.CZE, Country.AUT),
+            ]).comparison_fingerprint()
+        )
+        self.assertEqual(
+            ConfigParameters(max_number_of_matchings=3, max_matchings_to_show_to_viewer=10).comparison_fingerprint(),
+            ConfigParameters(max_number_of_matchings=5, max_matchings_to_show_to_viewer=20).comparison_fingerprint()
+        )
+        self.assertNotEqual(
+            ConfigParameters(max_cycle_length=5).comparison_fingerprint(),
+            ConfigParameters(max_cycle_length=4).comparison_fingerprint()
+        )
+        self.assertNotEqual(
+            ConfigParameters(manual_donor_recipient_scores=[ManualDonorRecipientScore(1, 2, 1.0)])
+            .comparison_fingerprint(),
+            ConfigParameters().comparison_fingerprint()
+        )
+        self.assertEqual(
+            ConfigParameters(manual_donor_recipient_scores=[ManualDonorRecipientScore(1, 2, 3)])
+            .comparison_fingerprint(),
+            ConfigParameters(manual_donor_recipient_scores=[ManualDonorRecipientScore(1, 2, 3.0)])
+            .comparison_fingerprint()
+        )
@@ -1,3 +1,5 @@
+from unittest import mock
+
 import dacite
 
 from local_testing_utilities.utils import create_or_overwrite_txm_event
@@ -15,6 +17,8 @@ from txmatching.data_transfer_objects.patients.upload_dtos.patient_upload_dto_in
 from txmatching.data_transfer_objects.patients.upload_dtos.recipient_upload_dto import \
     RecipientUploadDTO
 from txmatching.database.db import db
+from txmatching.database.services.parsing_issue_service import \
+    get_parsing_issues_for_txm_event_id
 from txmatching.database.services.patient_service import (
     delete_donor_recipient_pair, get_all_patients_persistent_hash, get_patients_persistent_hash,
     recompute_hla_and_antibodies_parsing_for_all_patients_in_txm_event)
@@ -232,7 +236,7 @@ class TestPatientService(DbTests):
             all_recipients=get_test_recipients()
         )
         hash_1 = get_patients_persistent_hash(txm_event_1)
-        self.assertEqual(9100441963031536076, hash_1)
+        self.assertEqual(8611608580222215544, hash_1)
 
         # changing event db id or event name does not change the hash
         txm_event_2 = TxmEvent(
@@ -243,6 +247,14 @@ class TestPatientService(DbTests):
         hash_2 = get_patients_persistent_hash(txm_event_2)
         self.assertEqual(hash_1, hash_2)
 
+        # changing order of the patients does not change the hash
+        txm_event_reversed = TxmEvent(
+            1, 'event_name_1', None, TxmEventState.OPEN,
+            all_donors=list(reversed(get_test_donors())),
+            all_recipients=list(reversed(get_test_recipients()))
+        )
+        self.assertEqual(hash_1, get_patients_persistent_hash(txm_event_reversed))
+
         # Changing donors changes the hash
         txm_event_3 = TxmEvent(
             1, 'event_name_1', None, TxmEventState.OPEN,
@@ -277,6 +289,40 @@ class TestPatientService(DbTests):
         hash_5 = get_patients_persistent_hash(txm_event_5)
         self.assertNotEqual(hash_1, hash_5)
 
+    def test_stored_patients_persistent_hashes(self):
+        txm_event_id = create_or_overwrite_txm_event(name=TXM_EVENT_NAME).db_id
+        replace_or_add_patients_from_one_country(PATIENT_UPLOAD_DTO)
+        self._assert_stored_patients_persistent_hashes_are_valid(txm_event_id)
+
+        # removed donor of a recipient with more donors changes the hash of the recipient
+        delete_donor_recipient_pair(4, txm_event_id)
+        self._assert_stored_patients_persistent_hashes_are_valid(txm_event_id)
+
+        # hashes missing in old rows are filled by recomputed parsing
+        DonorModel.query.update({'persistent_hash': None})
+        RecipientModel.query.update({'persistent_hash': None})
+        db.session.commit()
+        self._assert_patients_persistent_hash_is_valid(get_txm_event_complete(txm_event_id))
+        recompute_hla_and_antibodies_parsing_for_all_patients_in_txm_event(txm_event_id)
+        self.assertEqual(0, DonorModel.query.filter(DonorModel.persistent_hash.is_(None)).count())
+        self.assertEqual(0, RecipientModel.query.filter(RecipientModel.persistent_hash.is_(None)).count())
+        self._assert_stored_patients_persistent_hashes_are_valid(txm_event_id)
+
+    def _assert_stored_patients_persistent_hashes_are_valid(self, txm_event_id: int):
+        txm_event = get_txm_event_complete(txm_event_id)
+        for donor in txm_event.all_donors:
+            self.assertEqual(donor.persistent_hash(), DonorModel.query.get(donor.db_id).persistent_hash)
+        for recipient in txm_event.all_recipients:
+            self.assertEqual(recipient.persistent_hash(), RecipientModel.query.get(recipient.db_id).persistent_hash)
+        self._assert_patients_persistent_hash_is_valid(txm_event)
+
+    def _assert_patients_persistent_hash_is_valid(self, txm_event: TxmEvent):
+        # the hash combined from the stored hashes is the same as the one computed from the patients
+        txm_event_not_from_db = TxmEvent(txm_event.db_id, txm_event.name, txm_event.default_config_id,
+                                         txm_event.state, txm_event.all_donors, txm_event.all_recipients)
+        self.assertIsNotNone(txm_event.patients_hash)
+        self.assertEqual(get_patients_persistent_hash(txm_event_not_from_db), get_patients_persistent_hash(txm_event))
+
     def test_delete_donor_recipient_pair(self):
         """
         R1
@@ -370,3 +416,32 @@ class TestPatientService(DbTests):
 
         # Get event works properly
         get_txm_event_complete(txm_event_id)
+
+    def test_recompute_hla_and_antibodies_parsing_in_parallel(self):
+        txm_event_id = create_or_overwrite_txm_event(name=TXM_EVENT_NAME).db_id
+        replace_or_add_patients_from_one_country(PATIENT_UPLOAD_DTO)
+        expected_parsing_issues = get_parsing_issues_for_txm_event_id(txm_event_id)
+
+        recipient_model = RecipientModel.query.filter(RecipientModel.txm_event_id == txm_event_id).first()
+        recipient_model.hla_typing = {}
+        recipient_model.hla_antibodies = {}
+        db.session.commit()
+
+        progress = []
+        with mock.patch('txmatching.database.services.patient_service._MIN_PATIENTS_FOR_PARALLEL_PARSING', 0), \
+                mock.patch('txmatching.database.services.patient_service._PARSING_CHUNK_SIZE', 4):
+            result = recompute_hla_and_antibodies_parsing_for_all_patients_in_txm_event(
+                txm_event_id, progress_callback=progress.append, max_workers=2)
+
+        self.assertEqual(9, result.patients_checked_antigens)
+        self.assertEqual(1, result.patients_changed_antigens)
+        self.assertEqual(3, result.patients_checked_antibodies)
+        self.assertEqual(1, result.patients_changed_antibodies)
+        self.assertEqual([4 / 9, 8 / 9, 1.0], progress)
+        self.assertCountEqual(
+            [(issue.hla_code_or_group, issue.parsing_issue_detail, issue.donor_id, issue.recipient_id)
+             for issue in expected_parsing_issues],
+            [(issue.hla_code_or_group, issue.parsing_issue_detail, issue.donor_id, issue.recipient_id)
+             for issue in result.parsing_issues]
+        )
+        get_txm_event_complete(txm_event_id)
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+import numpy as np
+
+from txmatching.database.services.scorer_service import (
+    score_matrix_from_bytes, score_matrix_to_bytes,
+    stored_score_matrix_to_array)
+from txmatching.scorers.scorer_constants import (
+    ORIGINAL_DONOR_RECIPIENT_SCORE, TRANSPLANT_IMPOSSIBLE_SCORE)
+
+
+class TestScorerService(TestCase):
+    def test_score_matrix_bytes_round_trip(self):
+        score_matrix = np.array([[ORIGINAL_DONOR_RECIPIENT_SCORE, 1.5, 0.1],
+                                 [3.0, TRANSPLANT_IMPOSSIBLE_SCORE, 1e-7]])
+
+        score_matrix_npy = score_matrix_to_bytes(score_matrix)
+        loaded_score_matrix = score_matrix_from_bytes(score_matrix_npy)
+        np.testing.assert_array_equal(score_matrix, loaded_score_matrix)
+        self.assertEqual(np.float64, loaded_score_matrix.dtype)
+
+        self.assertEqual((0, 0), score_matrix_from_bytes(score_matrix_to_bytes(np.zeros((0, 0)))).shape)
+
+    def test_stored_score_matrix_in_json(self):
+        score_matrix = [[ORIGINAL_DONOR_RECIPIENT_SCORE, 1.5], [3.0, TRANSPLANT_IMPOSSIBLE_SCORE]]
+
+        self.assertEqual(
+            score_matrix,
+            stored_score_matrix_to_array(None, {'score_matrix_dto': score_matrix}).tolist()
+        )
+        self.assertEqual(
+            score_matrix,
+            stored_score_matrix_to_array(score_matrix_to_bytes(np.array(score_matrix)), None).tolist()
+        )
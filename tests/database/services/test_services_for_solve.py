@@ -1,11 +1,15 @@
 from tests.test_utilities.prepare_app_for_tests import DbTests
 from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.database.db import db
 from txmatching.database.services.config_service import (
-    find_config_for_parameters, get_configuration_from_db_id)
-from txmatching.database.services.pairing_result_service import \
-    get_pairing_result_comparable_to_config
+    fill_missing_comparison_fingerprints, find_config_for_parameters,
+    get_configuration_from_db_id, save_config_parameters_to_db)
+from txmatching.database.services.pairing_result_service import (
+    fill_missing_config_fingerprints, get_pairing_result_comparable_to_config)
 from txmatching.database.services.txm_event_service import \
     get_txm_event_complete
+from txmatching.database.sql_alchemy_schema import (ConfigModel,
+                                                    PairingResultModel)
 
 
 class TestServiceForSolve(DbTests):
@@ -18,3 +22,35 @@ class TestServiceForSolve(DbTests):
 
         self.assertIsNotNone(get_pairing_result_comparable_to_config(config, get_txm_event_complete(1)),
                              'there should be 1 pairing result in the database')
+
+    def test_pairing_result_comparable_to_config_is_searched_by_fingerprint(self):
+        txm_event_db_id = self.fill_db_with_patients_and_results()
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        pairing_result_id = PairingResultModel.query.one().id
+
+        # the stored result was computed with max_number_of_matchings=5 and is comparable to configs requiring less
+        config = save_config_parameters_to_db(ConfigParameters(max_number_of_matchings=3), txm_event_db_id, 1)
+        self.assertEqual(pairing_result_id, get_pairing_result_comparable_to_config(config, txm_event).id)
+        config = save_config_parameters_to_db(ConfigParameters(max_number_of_matchings=10), txm_event_db_id, 1)
+        self.assertIsNone(get_pairing_result_comparable_to_config(config, txm_event))
+        config = save_config_parameters_to_db(ConfigParameters(max_cycle_length=3), txm_event_db_id, 1)
+        self.assertIsNone(get_pairing_result_comparable_to_config(config, txm_event))
+
+    def test_missing_fingerprints_are_filled(self):
+        txm_event_db_id = self.fill_db_with_patients_and_results()
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        # rows created before the fingerprints were added
+        ConfigModel.query.update({'comparison_fingerprint': None})
+        PairingResultModel.query.update({'config_fingerprint': None})
+        db.session.commit()
+
+        config = get_configuration_from_db_id(ConfigModel.query.first().id, txm_event_db_id)
+        self.assertIsNone(find_config_for_parameters(ConfigParameters(), txm_event_db_id))
+        self.assertIsNone(get_pairing_result_comparable_to_config(config, txm_event))
+
+        fill_missing_comparison_fingerprints()
+        fill_missing_config_fingerprints()
+        self.assertEqual(0, ConfigModel.query.filter(ConfigModel.comparison_fingerprint.is_(None)).count())
+        self.assertEqual(0, PairingResultModel.query.filter(PairingResultModel.config_fingerprint.is_(None)).count())
+        self.assertEqual(config.id, find_config_for_parameters(ConfigParameters(), txm_event_db_id).id)
+        self.assertIsNotNone(get_pairing_result_comparable_to_config(config, txm_event))
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from tests.test_utilities.prepare_app_for_tests import DbTests
+from txmatching.auth.exceptions import (NotFoundException,
+                                        SolverAlreadyRunningException)
+from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.database.db import db
+from txmatching.database.services.config_service import \
+    save_config_parameters_to_db
+from txmatching.database.services.pairing_result_service import \
+    get_pairing_result_comparable_to_config
+from txmatching.database.services.solve_job_service import (
+    SOLVE_JOB_LEASE_SECONDS, _SolveJobHeartbeat, create_solve_job,
+    get_solve_job, run_next_solve_job)
+from txmatching.database.services.txm_event_service import \
+    get_txm_event_complete
+from txmatching.database.sql_alchemy_schema import SolveJobModel
+from txmatching.utils.enums import SolveJobStatus
+
+
+class TestSolveJobService(DbTests):
+    def test_solve_job_is_queued_and_run(self):
+        txm_event_db_id = self.fill_db_with_patients()
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        configuration = save_config_parameters_to_db(ConfigParameters(), txm_event_db_id, user_id=1)
+
+        solve_job_id = create_solve_job(configuration, txm_event, user_id=1).id
+        solve_job = get_solve_job(solve_job_id, txm_event_db_id)
+        self.assertEqual(SolveJobStatus.QUEUED, solve_job.status)
+        self.assertEqual(0.0, solve_job.progress)
+        self.assertIsNone(solve_job.pairing_result_id)
+
+        self.assertTrue(run_next_solve_job())
+        self.assertFalse(run_next_solve_job())
+
+        solve_job = get_solve_job(solve_job_id, txm_event_db_id)
+        self.assertEqual(SolveJobStatus.FINISHED, solve_job.status)
+        self.assertEqual(1.0, solve_job.progress)
+        self.assertEqual(get_pairing_result_comparable_to_config(configuration, txm_event).id,
+                         solve_job.pairing_result_id)
+
+        # the configuration is solved already, the new job only finds the stored pairing result
+        solve_job_id = create_solve_job(configuration, txm_event, user_id=1).id
+        self.assertTrue(run_next_solve_job())
+        self.assertEqual(SolveJobStatus.FINISHED, get_solve_job(solve_job_id, txm_event_db_id).status)
+
+    def test_failed_solve_job(self):
+        txm_event_db_id = self.fill_db_with_patients()
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        configuration = save_config_parameters_to_db(ConfigParameters(), txm_event_db_id, user_id=1)
+        solve_job_id = create_solve_job(configuration, txm_event, user_id=1).id
+
+        with mock.patch('txmatching.database.services.pairing_result_service.solve_from_configuration_and_save',
+                        side_effect=ValueError('Solver failed.')):
+            self.assertTrue(run_next_solve_job())
+
+        solve_job = get_solve_job(solve_job_id, txm_event_db_id)
+        self.assertEqual(SolveJobStatus.FAILED, solve_job.status)
+        self.assertEqual('Solver failed.', solve_job.error_message)
+        self.assertIsNone(solve_job.pairing_result_id)
+
+    def test_solve_job_from_other_txm_event_is_not_found(self):
+        txm_event_db_id = self.fill_db_with_patients()
+        configuration = save_config_parameters_to_db(ConfigParameters(), txm_event_db_id, user_id=1)
+        solve_job_id = create_solve_job(configuration, get_txm_event_complete(txm_event_db_id), user_id=1).id
+
+        self.assertRaises(NotFoundException, lambda: get_solve_job(solve_job_id, txm_event_db_id + 1))
+        self.assertRaises(NotFoundException, lambda: get_solve_job(solve_job_id + 1, txm_event_db_id))
+
+    def test_solve_job_is_queued_again_if_txm_event_solve_slot_is_occupied(self):
+        txm_event_db_id = self.fill_db_with_patients()
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        configuration = save_config_parameters_to_db(ConfigParameters(), txm_event_db_id, user_id=1)
+        solve_job_id = create_solve_job(configuration, txm_event, user_id=1).id
+
+        with mock.patch('txmatching.database.services.pairing_result_service.solve_from_configuration_and_save',
+                        side_effect=SolverAlreadyRunningException()):
+            self.assertFalse(run_next_solve_job())
+        self.assertEqual(SolveJobStatus.QUEUED, get_solve_job(solve_job_id, txm_event_db_id).status)
+
+        self.assertTrue(run_next_solve_job())
+        self.assertEqual(SolveJobStatus.FINISHED, get_solve_job(solve_job_id, txm_event_db_id).status)
+
+    def test_abandoned_solve_job_is_queued_again(self):
+        txm_event_db_id = self.fill_db_with_patients()
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        configuration = save_config_parameters_to_db(ConfigParameters(), txm_event_db_id, user_id=1)
+        solve_job_id = create_solve_job(configuration, txm_event, user_id=1).id
+
+        # the worker running the job was stopped in the middle of the solve
+        with mock.patch('txmatching.database.services.solve_job_service._run_solve_job', side_effect=SystemExit()):
+            self.assertRaises(SystemExit, run_next_solve_job)
+        self.assertEqual(SolveJobStatus.QUEUED, get_solve_job(solve_job_id, txm_event_db_id).status)
+
+        # the worker running the job crashed a while ago
+        SolveJobModel.query.filter(SolveJobModel.id == solve_job_id).update({
+            SolveJobModel.status: SolveJobStatus.RUNNING,
+            SolveJobModel.updated_at: datetime.now(timezone.utc) - timedelta(seconds=SOLVE_JOB_LEASE_SECONDS + 1)
+        })
+        db.session.commit()
+        self.assertTrue(run_next_solve_job())
+        self.assertEqual(SolveJobStatus.FINISHED, get_solve_job(solve_job_id, txm_event_db_id).status)
+
+    def test_solve_job_heartbeat_stores_progress(self):
+        txm_event_db_id = self.fill_db_with_patients()
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        configuration = save_config_parameters_to_db(ConfigParameters(), txm_event_db_id, user_id=1)
+        solve_job_id = create_solve_job(configuration, txm_event, user_id=1).id
+        SolveJobModel.query.filter(SolveJobModel.id == solve_job_id).update(
+            {SolveJobModel.status: SolveJobStatus.RUNNING})
+        db.session.commit()
+
+        heartbeat = _SolveJobHeartbeat(solve_job_id, db.engine)
+        heartbeat.set_progress(0.5)
+        heartbeat.report()
+
+        db.session.expire_all()
+        self.assertEqual(0.5, get_solve_job(solve_job_id, txm_event_db_id).progress)
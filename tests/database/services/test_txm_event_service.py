@@ -3,11 +3,18 @@ from local_testing_utilities.populate_db import (ADMIN_USER, SERVICE_USER,
 from local_testing_utilities.utils import create_or_overwrite_txm_event
 from tests.test_utilities.prepare_app_for_tests import DbTests
 from txmatching.auth.exceptions import UnauthorizedException
+from txmatching.data_transfer_objects.patients.update_dtos.donor_update_dto import \
+    DonorUpdateDTO
+from txmatching.database.db import db
 from txmatching.database.services.app_user_management import get_app_user_by_id
+from txmatching.database.services.patient_service import update_donor
+from txmatching.database.services.txm_event_cache import (
+    increase_patients_revision, txm_event_cache)
 from txmatching.database.services.txm_event_service import (
-    get_allowed_txm_event_ids_for_current_user,
+    get_allowed_txm_event_ids_for_current_user, get_txm_event_complete,
     get_txm_event_id_for_current_user, set_allowed_txm_event_ids_for_user,
     update_default_txm_event_id_for_current_user)
+from txmatching.database.sql_alchemy_schema import DonorModel
 
 TXM_EVENT_NAME_1 = 'txm_event_1'
 TXM_EVENT_NAME_2 = 'txm_event_2'
@@ -127,3 +134,28 @@ class TestTxmEventService(DbTests):
         # Default event is changed to null in db
         viewer_user = get_app_user_by_id(VIEWER_USER['id'])
         self.assertEqual(viewer_user.default_txm_event_id, None)
+
+    def test_get_txm_event_complete_cached_until_patients_change(self):
+        txm_event_db_id = self.fill_db_with_patients()
+        txm_event_cache.clear()
+
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        self.assertIs(txm_event, get_txm_event_complete(txm_event_db_id))
+        # raw antibodies are cached separately
+        self.assertIsNot(txm_event, get_txm_event_complete(txm_event_db_id, load_antibodies_raw=True))
+        statistics = txm_event_cache.statistics()
+        self.assertEqual((1, 2, 2), (statistics.hits, statistics.misses, statistics.size))
+        self.assertGreater(statistics.memory_size, 0)
+
+        # changes of a transaction are neither served from nor stored to the cache, even if rolled back
+        increase_patients_revision(txm_event_db_id)
+        DonorModel.query.filter(DonorModel.id == 1).update({'active': False})
+        self.assertNotIn(1, get_txm_event_complete(txm_event_db_id).active_and_valid_donors_dict)
+        db.session.rollback()
+        self.assertIs(txm_event, get_txm_event_complete(txm_event_db_id))
+
+        update_donor(DonorUpdateDTO(active=False, db_id=1, etag=DonorModel.query.get(1).etag), txm_event_db_id)
+        updated_txm_event = get_txm_event_complete(txm_event_db_id)
+        self.assertIsNot(txm_event, updated_txm_event)
+        self.assertNotIn(1, updated_txm_event.active_and_valid_donors_dict)
+        self.assertIs(updated_txm_event, get_txm_event_complete(txm_event_db_id))
@@ -0,0 +1,51 @@
+import pickle
+import threading
+import unittest
+
+from txmatching.patients.hla_code import HLACode, HLACodeTable
+from txmatching.utils.enums import HLAGroup
+
+
+class TestHLACode(unittest.TestCase):
+    def test_equal_codes_share_interned_code(self):
+        code = HLACode('A*01:01', 'A1', 'A1')
+        self.assertIs(code.interned, HLACode('A*01:01', 'A1', 'A1').interned)
+        self.assertIsNot(code.interned, HLACode('A*01:02', 'A1', 'A1').interned)
+
+        self.assertEqual(HLAGroup.A, code.interned.group)
+        self.assertTrue(code.interned.high_res_without_letter)
+
+    def test_interned_code_with_missing_codes(self):
+        self.assertTrue(HLACode(None, None, 'A9').interned.high_res_without_letter)
+        self.assertFalse(HLACode('A*01:01N', None, None).interned.high_res_without_letter)
+
+    def test_interned_code_is_not_part_of_code_data(self):
+        code = HLACode('A*01:01', 'A1', 'A1')
+        self.assertEqual(HLACode('A*01:01', 'A1', 'A1', HLAGroup.A), code)
+        self.assertEqual("HLACode('A*01:01', 'A1', 'A1')", repr(code))
+
+    def test_code_is_interned_again_when_unpickled(self):
+        code = HLACode('A*01:01', 'A1', 'A1')
+        pickled_code = pickle.dumps(code)
+        self.assertNotIn(b'InternedHLACode', pickled_code)
+
+        unpickled_code = pickle.loads(pickled_code)
+        self.assertEqual(code, unpickled_code)
+        self.assertIs(code.interned, unpickled_code.interned)
+
+    def test_codes_interned_concurrently(self):
+        hla_code_table = HLACodeTable()
+        codes = [HLACode(f'A*01:{code_idx:02}', 'A1', 'A1') for code_idx in range(1, 50)]
+        interned_codes = []
+
+        threads = [threading.Thread(target=lambda: interned_codes.append(
+            [hla_code_table.intern(code) for code in codes])) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(codes), len(hla_code_table))
+        for thread_interned_codes in interned_codes:
+            for interned_code, first_thread_interned_code in zip(thread_interned_codes, interned_codes[0]):
+                self.assertIs(first_thread_interned_code, interned_code)
@@ -1,18 +1,22 @@
 from typing import List
+from unittest import mock
 
 from tests.patients.test_patient_parameters import (jack_hla_typing,
                                                     joe_hla_typing)
 from tests.test_utilities.hla_preparation_utils import (create_antibodies,
                                                         create_hla_typing)
 from tests.test_utilities.prepare_app_for_tests import DbTests
+from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.patients.patient import Donor, Recipient
 from txmatching.patients.patient_parameters import PatientParameters
 from txmatching.scorers.high_res_hla_additive_scorer import HighResScorer
 from txmatching.scorers.high_res_other_hla_types_additive_scorer import \
     HighResWithDQDPScorer
+from txmatching.scorers.scorer_constants import TRANSPLANT_IMPOSSIBLE_SCORE
 from txmatching.scorers.split_hla_additive_scorer import SplitScorer
 from txmatching.utils.blood_groups import BloodGroup
 from txmatching.utils.country_enum import Country
+from txmatching.utils.hla_system.compatibility_index import compatibility_index
 
 
 class TestHlaScorer(DbTests):
@@ -109,6 +113,30 @@ class TestHlaScorer(DbTests):
         # DR4, DR11 - SPLIT +2 +2
         self._test_all_scorers(donor, recipient, (22, 6, 6))
 
+    def test_recipient_scoring_context(self):
+        donor = _create_donor(joe_hla_typing)
+        recipient = _create_recipient(jack_hla_typing)
+        original_donor = _create_donor(jack_hla_typing)
+
+        with mock.patch('txmatching.scorers.hla_additive_scorer.compatibility_index',
+                        wraps=compatibility_index) as compatibility_index_mock:
+            # the original donors are not needed without the better match requirements
+            recipient_context = self.split_scorer.get_recipient_scoring_context(recipient, [original_donor])
+            self.assertEqual(0.0, recipient_context.best_related_donor_recipient_ci)
+            self.assertEqual(frozenset({BloodGroup.A, BloodGroup.ZERO}), recipient_context.compatible_blood_groups)
+            self.assertEqual(0, compatibility_index_mock.call_count)
+            self.assertEqual(22, self.split_scorer.score_transplant_with_recipient_context(donor, recipient,
+                                                                                           recipient_context))
+
+            scorer = SplitScorer(ConfigParameters(require_better_match_in_compatibility_index=True))
+            recipient_context = scorer.get_recipient_scoring_context(recipient, [original_donor])
+            self.assertEqual(2, compatibility_index_mock.call_count)
+            # the original donor matches better
+            self.assertLess(22, recipient_context.best_related_donor_recipient_ci)
+            self.assertEqual(TRANSPLANT_IMPOSSIBLE_SCORE,
+                             scorer.score_transplant_with_recipient_context(donor, recipient, recipient_context))
+            self.assertEqual(3, compatibility_index_mock.call_count)
+
     def _test_all_scorers(self, donor, recipient, scores):
         original_donor = _create_donor([])
         self.assertEqual(scores[0], self.split_scorer.score_transplant(donor=donor, recipient=recipient,
@@ -0,0 +1,207 @@
+import dataclasses
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+
+from local_testing_utilities.generate_patients import (
+    GENERATED_TXM_EVENT_NAME, store_generated_patients_from_folder)
+from local_testing_utilities.populate_db import PATIENT_DATA_OBFUSCATED
+from tests.test_utilities.prepare_app_for_tests import DbTests
+from txmatching.configuration.config_parameters import (
+    ConfigParameters, ManualDonorRecipientScore)
+from txmatching.configuration.subclasses import ForbiddenCountryCombination
+from txmatching.database.db import db
+from txmatching.database.services.compatibility_cache_service import (
+    COMPATIBILITY_CACHE_MAX_AGE_DAYS, DbCompatibilityCache,
+    delete_expired_compatibilities)
+from txmatching.database.services.score_matrix_snapshot_service import \
+    DbScoreMatrixSnapshotStore
+from txmatching.database.services.txm_event_service import (
+    get_txm_event_complete, get_txm_event_db_id_by_name)
+from txmatching.database.sql_alchemy_schema import PairCompatibilityModel
+from txmatching.patients.patient import Donor, Recipient, TxmEvent
+from txmatching.scorers.additive_scorer import AdditiveScorer
+from txmatching.scorers.compatibility_cache import PairCompatibility
+from txmatching.scorers.high_res_hla_additive_scorer import HighResScorer
+from txmatching.scorers.high_res_other_hla_types_additive_scorer import \
+    HighResWithDQDPScorer
+from txmatching.scorers.split_hla_additive_scorer import SplitScorer
+from txmatching.utils.country_enum import Country
+from txmatching.utils.enums import HLACrossmatchLevel
+from txmatching.utils.get_absolute_path import get_absolute_path
+
+SCORERS = [SplitScorer, HighResScorer, HighResWithDQDPScorer]
+
+
+class TestScoreMatrix(DbTests):
+
+    def test_score_matrix_same_as_scoring_each_transplant_obfuscated_data(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        self._assert_score_matrix_same_as_scoring_each_transplant(get_txm_event_complete(txm_event_db_id))
+
+    def test_score_matrix_same_as_scoring_each_transplant_high_res_data(self):
+        store_generated_patients_from_folder()
+        txm_event = get_txm_event_complete(get_txm_event_db_id_by_name(GENERATED_TXM_EVENT_NAME))
+        self._assert_score_matrix_same_as_scoring_each_transplant(txm_event)
+
+    def test_score_matrix_with_no_patients(self):
+        for scorer_class in SCORERS:
+            scorer = scorer_class(ConfigParameters())
+            self.assertEqual((0,), scorer.get_score_matrix({}, {}).shape)
+
+    def test_score_matrix_with_compatibility_cache(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        donors_dict = txm_event.active_and_valid_donors_dict
+        recipients_dict = txm_event.active_and_valid_recipients_dict
+        expected_score_matrix = SplitScorer(ConfigParameters()).get_score_matrix(recipients_dict, donors_dict)
+
+        # pylint: disable=protected-access
+        # the computed parts of the matrix are checked
+        def get_score_matrix_with_cache():
+            scorer = SplitScorer(ConfigParameters())
+            scorer.compatibility_cache = DbCompatibilityCache()
+            with mock.patch.object(SplitScorer, '_compute_compatibility_matrices', autospec=True,
+                                   side_effect=SplitScorer._compute_compatibility_matrices) as compute_mock:
+                score_matrix = scorer.get_score_matrix(recipients_dict, donors_dict)
+            computed_shapes = [(len(call.args[1]), len(call.args[2])) for call in compute_mock.call_args_list]
+            return score_matrix, computed_shapes
+        # pylint: enable=protected-access
+
+        score_matrix, computed_shapes = get_score_matrix_with_cache()
+        self.assertTrue(np.array_equal(expected_score_matrix, score_matrix))
+        self.assertEqual([(len(donors_dict), len(recipients_dict))], computed_shapes)
+
+        score_matrix, computed_shapes = get_score_matrix_with_cache()
+        self.assertTrue(np.array_equal(expected_score_matrix, score_matrix))
+        self.assertEqual([], computed_shapes)
+
+        # only the row of the changed donor is computed
+        donor_db_id = next(iter(donors_dict))
+        donors_dict = dict(donors_dict)
+        donors_dict[donor_db_id] = dataclasses.replace(
+            donors_dict[donor_db_id],
+            parameters=next(iter(recipients_dict.values())).parameters
+        )
+        expected_score_matrix = SplitScorer(ConfigParameters()).get_score_matrix(recipients_dict, donors_dict)
+        score_matrix, computed_shapes = get_score_matrix_with_cache()
+        self.assertTrue(np.array_equal(expected_score_matrix, score_matrix))
+        self.assertEqual([(1, len(recipients_dict))], computed_shapes)
+
+    def test_compatibility_cache_deletes_expired_compatibilities(self):
+        cache = DbCompatibilityCache()
+        cache.save_compatibilities(1, {(1, 1): PairCompatibility(10.0, False), (1, 2): PairCompatibility(5.0, True)})
+        self.assertEqual({(1, 1): PairCompatibility(10.0, False)}, cache.get_compatibilities(1, [1], [1]))
+
+        expired_at = datetime.now(timezone.utc) - timedelta(days=COMPATIBILITY_CACHE_MAX_AGE_DAYS + 1)
+        PairCompatibilityModel.query.filter(PairCompatibilityModel.recipient_hash == 1).update(
+            {'created_at': expired_at})
+        db.session.commit()
+        cache.save_compatibilities(1, {(2, 1): PairCompatibility(1.0, False)})
+        delete_expired_compatibilities()
+        self.assertEqual({(1, 2): PairCompatibility(5.0, True), (2, 1): PairCompatibility(1.0, False)},
+                         cache.get_compatibilities(1, [1, 2], [1, 2]))
+
+    def test_score_matrix_with_snapshot_store(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        donors_dict = txm_event.active_and_valid_donors_dict
+        recipients_dict = txm_event.active_and_valid_recipients_dict
+        # the scores depend also on the related donors of the recipients
+        config_parameters = ConfigParameters(require_better_match_in_compatibility_index=True)
+
+        # pylint: disable=protected-access
+        # the computed parts of the matrix are checked
+        def assert_score_matrix_with_snapshot_store(expected_computed_shapes):
+            expected_score_matrix = SplitScorer(config_parameters).get_score_matrix(recipients_dict, donors_dict)
+            scorer = SplitScorer(config_parameters)
+            scorer.score_matrix_snapshot_store = DbScoreMatrixSnapshotStore(txm_event_db_id)
+            with mock.patch.object(SplitScorer, '_score_matrix_block', autospec=True,
+                                   side_effect=SplitScorer._score_matrix_block) as block_mock:
+                score_matrix = scorer.get_score_matrix(recipients_dict, donors_dict)
+            self.assertTrue(np.array_equal(expected_score_matrix, score_matrix))
+            self.assertEqual(expected_computed_shapes,
+                             [(len(call.args[1]), len(call.args[2])) for call in block_mock.call_args_list])
+        # pylint: enable=protected-access
+
+        assert_score_matrix_with_snapshot_store([(len(donors_dict), len(recipients_dict))])
+        assert_score_matrix_with_snapshot_store([])
+
+        # the row of the changed donor and the column of its related recipient are computed
+        donors_dict = dict(donors_dict)
+        donor = next(donor for donor in donors_dict.values() if donor.related_recipient_db_id in recipients_dict)
+        donors_dict[donor.db_id] = dataclasses.replace(donor,
+                                                       parameters=next(iter(recipients_dict.values())).parameters)
+        assert_score_matrix_with_snapshot_store([(1, len(recipients_dict)), (len(donors_dict) - 1, 1)])
+
+        # only the column of the changed recipient is computed
+        recipients_dict = dict(recipients_dict)
+        recipient = list(recipients_dict.values())[-1]
+        recipients_dict[recipient.db_id] = dataclasses.replace(recipient, acceptable_blood_groups=[])
+        assert_score_matrix_with_snapshot_store([(len(donors_dict), 1)])
+
+        # nothing is computed when a donor is removed
+        del donors_dict[list(donors_dict)[-1]]
+        assert_score_matrix_with_snapshot_store([])
+
+        # a changed configuration is computed from scratch
+        config_parameters = ConfigParameters(require_better_match_in_compatibility_index=True,
+                                             use_binary_scoring=True)
+        assert_score_matrix_with_snapshot_store([(len(donors_dict), len(recipients_dict))])
+
+    def test_score_matrix_snapshot_uses_stored_persistent_hashes(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        donors_dict = txm_event.active_and_valid_donors_dict
+        recipients_dict = txm_event.active_and_valid_recipients_dict
+        expected_score_matrix = SplitScorer().get_score_matrix(recipients_dict, donors_dict)
+
+        for _ in range(2):
+            scorer = SplitScorer()
+            scorer.score_matrix_snapshot_store = DbScoreMatrixSnapshotStore(
+                txm_event_db_id,
+                donors_persistent_hashes=txm_event.donors_persistent_hashes,
+                recipients_persistent_hashes=txm_event.recipients_persistent_hashes
+            )
+            with mock.patch.object(Donor, 'persistent_hash', side_effect=AssertionError('Donor hashed again.')), \
+                    mock.patch.object(Recipient, 'persistent_hash', side_effect=AssertionError('Recipient hashed again.')):
+                score_matrix = scorer.get_score_matrix(recipients_dict, donors_dict)
+            self.assertTrue(np.array_equal(expected_score_matrix, score_matrix))
+
+    def _assert_score_matrix_same_as_scoring_each_transplant(self, txm_event: TxmEvent):
+        donors_dict = txm_event.active_and_valid_donors_dict
+        recipients_dict = txm_event.active_and_valid_recipients_dict
+        donor_db_ids = list(donors_dict)
+        recipient_db_ids = list(recipients_dict)
+
+        configurations = [
+            ConfigParameters(),
+            ConfigParameters(use_high_resolution=False),
+            ConfigParameters(hla_crossmatch_level=HLACrossmatchLevel.NONE),
+            ConfigParameters(hla_crossmatch_level=HLACrossmatchLevel.BROAD),
+            ConfigParameters(hla_crossmatch_level=HLACrossmatchLevel.SPLIT_AND_BROAD, use_high_resolution=False),
+            ConfigParameters(require_compatible_blood_group=True, minimum_total_score=5),
+            ConfigParameters(require_better_match_in_compatibility_index=True,
+                             require_better_match_in_compatibility_index_or_blood_group=True),
+            ConfigParameters(use_binary_scoring=True, blood_group_compatibility_bonus=3),
+            ConfigParameters(
+                forbidden_country_combinations=[ForbiddenCountryCombination(Country.CZE, Country.CAN),
+                                                ForbiddenCountryCombination(Country.IND, Country.IND)],
+                manual_donor_recipient_scores=[
+                    ManualDonorRecipientScore(donor_db_id=donor_db_ids[0], recipient_db_id=recipient_db_ids[0],
+                                              score=7),
+                    ManualDonorRecipientScore(donor_db_id=donor_db_ids[-1], recipient_db_id=recipient_db_ids[-1],
+                                              score=-1)
+                ]
+            ),
+        ]
+
+        for configuration in configurations:
+            for scorer_class in SCORERS:
+                scorer = scorer_class(configuration)
+                with self.subTest(scorer=scorer_class.__name__, configuration=configuration):
+                    expected_score_matrix = AdditiveScorer.get_score_matrix(scorer, recipients_dict, donors_dict)
+                    score_matrix = scorer.get_score_matrix(recipients_dict, donors_dict)
+                    self.assertEqual(expected_score_matrix.shape, score_matrix.shape)
+                    self.assertTrue(np.array_equal(expected_score_matrix, score_matrix))
@@ -1,38 +1,94 @@
 import threading
 import time
+from typing import Dict
 from unittest import TestCase, mock
 
 from txmatching.auth.exceptions import SolverAlreadyRunningException
-from txmatching.solve_service.solver_lock import run_with_solver_lock
+from txmatching.solve_service.solver_lock import (LocalSolverLocks,
+                                                  run_single_flight_solve)
 
 
 class TestSolverLock(TestCase):
+    def setUp(self) -> None:
+        self._model = mock.MagicMock()
+        self._model.run_times = 0
+        self._results: Dict[int, str] = {}
 
     def test_solver_lock_should_work(self):
-        model = mock.MagicMock()
-        model.run_times = 0
+        solver_locks = LocalSolverLocks(max_solves_running_per_txm_event=1)
 
-        self.assertEqual('hello', run_with_solver_lock(lambda: self._some_function_computing_stuff(model, 0)))
-        self.assertEqual('hello', run_with_solver_lock(lambda: self._some_function_computing_stuff(model, 0)))
-        self.assertEqual(2, model.run_times)
+        self.assertEqual('hello', self._run_solve(solver_locks, 1, 1, 0))
+        self.assertEqual('hello', self._run_solve(solver_locks, 2, 1, 0))
+        self.assertEqual(2, self._model.run_times)
+
+        # the result is found without solving
+        self.assertEqual('hello', self._run_solve(solver_locks, 1, 1, 0))
+        self.assertEqual(2, self._model.run_times)
+
+    def test_identical_solves_should_be_solved_once(self):
+        solver_locks = LocalSolverLocks(max_solves_running_per_txm_event=1)
+        thread_results = []
+
+        threads = [threading.Thread(
+            target=lambda: thread_results.append(self._run_solve(solver_locks, 1, 1, 1)))
+            for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(['hello'] * 3, thread_results)
+        self.assertEqual(1, self._model.run_times)
 
     def test_solver_lock_should_throw_exception(self):
-        model = mock.MagicMock()
-        model.run_times = 0
+        solver_locks = LocalSolverLocks(max_solves_running_per_txm_event=1)
 
-        thread = threading.Thread(
-            target=lambda: run_with_solver_lock(lambda: self._some_function_computing_stuff(model, 1)),
-            args=[])
+        thread = threading.Thread(target=lambda: self._run_solve(solver_locks, 1, 1, 1))
         thread.start()
+        time.sleep(0.1)
 
+        # different solve of the same txm event
         self.assertRaises(SolverAlreadyRunningException,
-                          lambda: run_with_solver_lock(lambda: self._some_function_computing_stuff(model, 0)))
+                          lambda: self._run_solve(solver_locks, 2, 1, 0))
+        # solve of another txm event
+        self.assertEqual('hello', self._run_solve(solver_locks, 3, 2, 0))
+
+        thread.join()
+        self.assertEqual(2, self._model.run_times)
+
+    def test_locks_are_removed_when_not_used(self):
+        solver_locks = LocalSolverLocks(max_solves_running_per_txm_event=1)
+        for solve_key in range(10):
+            self._run_solve(solver_locks, solve_key, solve_key, 0)
+
+        # pylint: disable=protected-access
+        self.assertEqual({}, solver_locks._solve_key_locks)
+        self.assertEqual({}, solver_locks._txm_event_solve_slots)
+        # pylint: enable=protected-access
+
+    def test_waiting_for_solve_key_lock_is_limited(self):
+        solver_locks = LocalSolverLocks(max_solves_running_per_txm_event=2)
+        thread = threading.Thread(target=lambda: self._run_solve(solver_locks, 1, 1, 1))
+        thread.start()
+        time.sleep(0.1)
+
+        with mock.patch('txmatching.solve_service.solver_lock.SOLVE_KEY_LOCK_TIMEOUT_SECONDS', 0.1):
+            self.assertRaises(SolverAlreadyRunningException, lambda: self._run_solve(solver_locks, 1, 1, 0))
 
         thread.join()
-        self.assertEqual(1, model.run_times)
+        self.assertEqual(1, self._model.run_times)
+
+    def _run_solve(self, solver_locks: LocalSolverLocks, solve_key: int, txm_event_id: int, sleep_time: int) -> str:
+        return run_single_flight_solve(
+            solver_locks=solver_locks,
+            solve_key=solve_key,
+            txm_event_id=txm_event_id,
+            find_result=lambda: self._results.get(solve_key),
+            solve=lambda: self._some_function_computing_stuff(solve_key, sleep_time)
+        )
 
-    @staticmethod
-    def _some_function_computing_stuff(model, sleep_time: int):
+    def _some_function_computing_stuff(self, solve_key: int, sleep_time: int):
         time.sleep(sleep_time)
-        model.run_times += 1
+        self._model.run_times += 1
+        self._results[solve_key] = 'hello'
         return 'hello'
@@ -0,0 +1,112 @@
+import heapq
+import itertools
+import random
+import unittest
+from typing import List, Tuple
+
+from txmatching.solvers.all_solutions_solver.clique_search import \
+    MaximalCliquesSearch
+from txmatching.solvers.all_solutions_solver.score_matrix_utils import \
+    construct_path_intersection_bitsets
+
+N_DONORS = 12
+
+
+class TestMaximalCliquesSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(42)
+
+    def test_all_maximal_cliques_are_found(self):
+        for _ in range(20):
+            paths = _random_paths(12)
+            compatible_paths_bitsets, _ = construct_path_intersection_bitsets(paths)
+            search = MaximalCliquesSearch(compatible_paths_bitsets, paths, [0.0] * 12, [0.0] * N_DONORS)
+            cliques = list(search.search())
+            self.assertEqual(len(cliques), search.evaluated_cliques_count)
+            self.assertCountEqual(_brute_force_maximal_cliques(compatible_paths_bitsets),
+                                  [frozenset(clique) for clique in cliques])
+
+    def test_best_cliques_are_found(self):
+        for max_number_of_cliques in range(1, 6):
+            paths = _random_paths(16)
+            compatible_paths_bitsets, _ = construct_path_intersection_bitsets(paths)
+            transplant_scores = [[random.randint(0, 30) / 2 for _ in range(N_DONORS)] for _ in range(N_DONORS)]
+            path_scores = [sum(transplant_scores[donor][next_donor] for donor, next_donor in zip(path, path[1:]))
+                           for path in paths]
+
+            clique_key = _get_clique_key(paths, path_scores)
+
+            search = MaximalCliquesSearch(compatible_paths_bitsets, paths, path_scores,
+                                          [max(donor_scores) for donor_scores in transplant_scores],
+                                          clique_key, max_number_of_cliques)
+            found_keys = [clique_key(clique) for clique in search.search()]
+
+            all_cliques = _brute_force_maximal_cliques(compatible_paths_bitsets)
+            all_keys = [clique_key(list(clique)) for clique in all_cliques if 0 not in clique]
+            self.assertTrue(search.all_cliques_searched)
+            self.assertEqual(len(all_cliques), search.found_cliques_count)
+            self.assertEqual(heapq.nlargest(max_number_of_cliques, all_keys),
+                             heapq.nlargest(max_number_of_cliques, found_keys))
+
+    def test_best_cliques_are_found_when_counting_is_stopped(self):
+        max_evaluated_cliques = 8
+        counting_stopped_with_best_cliques_found = False
+        for _ in range(20):
+            paths = _random_paths(16)
+            compatible_paths_bitsets, _ = construct_path_intersection_bitsets(paths)
+            path_scores = [float(random.randint(0, 30)) for _ in paths]
+            clique_key = _get_clique_key(paths, path_scores)
+
+            search = MaximalCliquesSearch(compatible_paths_bitsets, paths, path_scores, [30.0] * N_DONORS,
+                                          clique_key, max_number_of_cliques=1)
+            found_keys = [clique_key(clique) for clique in search.search(max_evaluated_cliques)]
+
+            if search.all_cliques_searched:
+                all_cliques = _brute_force_maximal_cliques(compatible_paths_bitsets)
+                self.assertEqual(min(len(all_cliques), max_evaluated_cliques), search.found_cliques_count)
+                self.assertEqual(len(all_cliques) <= max_evaluated_cliques, search.all_cliques_counted)
+                all_keys = [clique_key(list(clique)) for clique in all_cliques if 0 not in clique]
+                self.assertEqual(heapq.nlargest(1, all_keys), heapq.nlargest(1, found_keys))
+                counting_stopped_with_best_cliques_found |= not search.all_cliques_counted
+        self.assertTrue(counting_stopped_with_best_cliques_found)
+
+    def test_search_is_stopped_after_max_evaluated_cliques(self):
+        paths = _random_paths(12)
+        compatible_paths_bitsets, _ = construct_path_intersection_bitsets(paths)
+        search = MaximalCliquesSearch(compatible_paths_bitsets, paths, [0.0] * 12, [0.0] * N_DONORS,
+                                      lambda clique: (0, 0.0, 0), max_number_of_cliques=100)
+        self.assertEqual(1, len(list(search.search(max_evaluated_cliques=1))))
+        self.assertFalse(search.all_cliques_searched)
+
+
+def _get_clique_key(paths: List[Tuple[int, ...]], path_scores: List[float]):
+    def clique_key(clique: List[int]):
+        if 0 in clique:
+            return None
+        return (sum(len(paths[path]) - 1 for path in clique),
+                sum(path_scores[path] for path in clique),
+                len(clique))
+
+    return clique_key
+
+
+def _random_paths(n_paths: int) -> List[Tuple[int, ...]]:
+    paths = []
+    for _ in range(n_paths):
+        path = tuple(random.sample(range(N_DONORS), random.randint(2, 4)))
+        # some of the paths are cycles
+        paths.append(path + path[:1] if random.random() < 0.5 else path)
+    return paths
+
+
+def _brute_force_maximal_cliques(compatible_paths_bitsets: List[int]) -> List[frozenset]:
+    n_paths = len(compatible_paths_bitsets)
+
+    def is_clique(paths) -> bool:
+        return all(compatible_paths_bitsets[path_i] >> path_j & 1 for path_i, path_j in itertools.combinations(paths, 2))
+
+    cliques = [frozenset(paths) for size in range(1, n_paths + 1)
+               for paths in itertools.combinations(range(n_paths), size) if is_clique(paths)]
+    cliques_set = set(cliques)
+    return [clique for clique in cliques if
+            not any(clique | {path} in cliques_set for path in range(n_paths) if path not in clique)]
@@ -0,0 +1,99 @@
+import unittest
+from typing import List
+from unittest import mock
+
+import numpy as np
+
+from txmatching.auth.exceptions import TooComplicatedDataForAllSolutionsSolver
+from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.patients.hla_model import HLATyping
+from txmatching.patients.patient import Donor
+from txmatching.patients.patient_parameters import PatientParameters
+from txmatching.solvers.all_solutions_solver.score_matrix_utils import (
+    construct_path_intersection_bitsets, find_all_cycles, find_all_sequences)
+from txmatching.utils.blood_groups import BloodGroup
+from txmatching.utils.country_enum import Country
+
+
+class TestScoreMatrixUtils(unittest.TestCase):
+    def setUp(self) -> None:
+        # donors 0, 1 and 2 are related to recipients 0, 1 and 2, donor 3 is a bridge donor
+        self._score_matrix = np.array([[-2.0, 1.0, 1.0],
+                                       [1.0, -2.0, 1.0],
+                                       [1.0, -1.0, -2.0],
+                                       [1.0, 1.0, -1.0]])
+        self._compatible_donor_idxs_per_donor_idx = {0: [1, 2], 1: [0, 2], 2: [0], 3: [0, 1]}
+        self._donors = _get_donors_from_countries([Country.CZE, Country.CZE, Country.AUT, Country.CZE])
+
+    def test_find_all_sequences(self):
+        self.assertCountEqual(
+            [(3, 0), (3, 0, 1), (3, 0, 1, 2), (3, 0, 2), (3, 1), (3, 1, 0), (3, 1, 0, 2), (3, 1, 2), (3, 1, 2, 0)],
+            self._find_all_sequences(max_length=100, max_countries=100))
+
+    def test_find_all_sequences_bounded_length(self):
+        self.assertCountEqual([(3, 0), (3, 0, 1), (3, 0, 2), (3, 1), (3, 1, 0), (3, 1, 2)],
+                              self._find_all_sequences(max_length=2, max_countries=100))
+        self.assertCountEqual([], self._find_all_sequences(max_length=0, max_countries=100))
+
+    def test_find_all_sequences_bounded_countries(self):
+        self.assertCountEqual([(3, 0), (3, 0, 1), (3, 1), (3, 1, 0)],
+                              self._find_all_sequences(max_length=100, max_countries=1))
+
+    def test_find_all_cycles(self):
+        self.assertCountEqual([(0, 1, 0), (0, 1, 2, 0), (0, 2, 0)],
+                              self._find_all_cycles(ConfigParameters(max_cycle_length=100,
+                                                                     max_number_of_distinct_countries_in_round=100)))
+
+    def test_find_all_cycles_bounded_length_and_countries(self):
+        self.assertCountEqual([(0, 1, 0), (0, 2, 0)],
+                              self._find_all_cycles(ConfigParameters(max_cycle_length=2,
+                                                                     max_number_of_distinct_countries_in_round=100)))
+        self.assertCountEqual([(0, 1, 0)],
+                              self._find_all_cycles(ConfigParameters(max_cycle_length=100,
+                                                                     max_number_of_distinct_countries_in_round=1)))
+
+    def test_find_all_cycles_counts_only_usable_cycles(self):
+        self.assertCountEqual([(0, 1, 0)],
+                              self._find_all_cycles(ConfigParameters(max_cycle_length=2,
+                                                                     max_number_of_distinct_countries_in_round=1,
+                                                                     max_cycles_in_all_solutions_solver=1)))
+        self.assertRaises(TooComplicatedDataForAllSolutionsSolver,
+                          lambda: self._find_all_cycles(ConfigParameters(max_cycle_length=100,
+                                                                         max_number_of_distinct_countries_in_round=100,
+                                                                         max_cycles_in_all_solutions_solver=1)))
+
+    def test_construct_path_intersection_bitsets(self):
+        paths = [(0, 1, 0), (2, 3), (3, 4, 5), (1, 70, 2), (6, 128)]
+        compatible_paths_bitsets, path_number_to_path = construct_path_intersection_bitsets(paths)
+
+        self.assertEqual(dict(enumerate(paths)), path_number_to_path)
+        self.assertEqual([0b10110, 0b10001, 0b11001, 0b10100, 0b01111], compatible_paths_bitsets)
+
+        with mock.patch('txmatching.solvers.all_solutions_solver.score_matrix_utils.'
+                        'MAX_PATH_INTERSECTION_BITSETS_BYTES', 2):
+            self.assertRaises(TooComplicatedDataForAllSolutionsSolver,
+                              lambda: construct_path_intersection_bitsets(paths))
+
+    def _find_all_cycles(self, config_parameters: ConfigParameters) -> List[tuple]:
+        return find_all_cycles(len(self._donors), self._compatible_donor_idxs_per_donor_idx, self._donors,
+                               config_parameters)
+
+    def _find_all_sequences(self, max_length: int, max_countries: int) -> List[tuple]:
+        return list(find_all_sequences(self._score_matrix, self._compatible_donor_idxs_per_donor_idx, max_length,
+                                       self._donors, max_countries))
+
+
+def _get_donors_from_countries(countries: List[Country]) -> List[Donor]:
+    return [
+        Donor(
+            parameters=PatientParameters(country_code=country,
+                                         blood_group=BloodGroup.ZERO,
+                                         hla_typing=HLATyping(hla_types_raw_list=[], hla_per_groups=[])
+                                         ),
+            db_id=db_id,
+            medical_id='test',
+            etag=1,
+            parsing_issues=[]
+        )
+        for db_id, country in enumerate(countries, start=1)
+    ]
@@ -13,7 +13,18 @@ class TestLargeMatchingDoesNotFail(DbTests):
         self.assertRaises(
             TooComplicatedDataForAllSolutionsSolver,
             lambda: solve_from_configuration(
-                ConfigParameters(solver_constructor_name=Solver.AllSolutionsSolver),
+                ConfigParameters(solver_constructor_name=Solver.AllSolutionsSolver,
+                                 max_cycle_length=100,
+                                 max_number_of_distinct_countries_in_round=100,
+                                 max_cycles_in_all_solutions_solver=10000),
                 txm_event
             )
         )
+
+    def testing_cycles_too_long_to_be_used_do_not_count_towards_the_limit(self):
+        txm_event = prepare_txm_event_with_too_many_solutions()
+        solution = solve_from_configuration(
+            ConfigParameters(solver_constructor_name=Solver.AllSolutionsSolver),
+            txm_event
+        )
+        self.assertLess(0, len(solution.calculated_matchings_list))
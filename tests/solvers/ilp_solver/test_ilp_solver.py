@@ -13,8 +13,11 @@ from txmatching.configuration.config_parameters import (
 from txmatching.database.services.txm_event_service import (
     get_txm_event_complete, get_txm_event_db_id_by_name)
 from txmatching.patients.patient import Donor
+from txmatching.scorers.scorer_from_config import scorer_from_configuration
 from txmatching.solve_service.solve_from_configuration import \
     solve_from_configuration
+from txmatching.solvers.ilp_solver.txm_configuration_for_ilp import \
+    DataAndConfigurationForILPSolver
 from txmatching.utils.blood_groups import BloodGroup
 from txmatching.utils.country_enum import Country
 from txmatching.utils.enums import HLACrossmatchLevel, Solver
@@ -42,6 +45,22 @@ class TestSolveFromDbAndItsSupportFunctionality(DbTests):
                                 len(list(
                                     solve_from_configuration(config_parameters, txm_event).calculated_matchings_list)))
 
+    def test_solve_from_configuration_reports_progress(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        progress_reports = []
+        matchings = solve_from_configuration(ConfigParameters(solver_constructor_name=Solver.ILPSolver,
+                                                              max_number_of_matchings=5),
+                                             txm_event,
+                                             progress_callback=progress_reports.append).calculated_matchings_list
+
+        self.assertEqual(5, len(matchings))
+        # scoring, every matching found and the end of the search
+        self.assertEqual(7, len(progress_reports))
+        self.assertEqual(sorted(progress_reports), progress_reports)
+        self.assertLess(0.0, progress_reports[0])
+        self.assertLess(progress_reports[-1], 1.0)
+
     def test_solve_from_configuration_multiple_countries_old_version(self):
         txm_event_db_id = self.fill_db_with_patients(get_absolute_path('/tests/resources/data2.xlsx'))
         txm_event = get_txm_event_complete(txm_event_db_id)
@@ -353,6 +372,59 @@ class TestSolveFromDbAndItsSupportFunctionality(DbTests):
 
         solve_from_configuration(config_parameters, txm_event)
 
+    def test_ilp_graph_is_built_from_score_matrix(self):
+        store_generated_patients_from_folder(SMALL_DATA_FOLDER_MULTIPLE_DONORS)
+
+        txm_event = get_txm_event_complete(get_txm_event_db_id_by_name(GENERATED_TXM_EVENT_NAME))
+        config_parameters = ConfigParameters(solver_constructor_name=Solver.ILPSolver)
+        scorer = scorer_from_configuration(config_parameters)
+        donors_dict = txm_event.active_and_valid_donors_dict
+        recipients_dict = txm_event.active_and_valid_recipients_dict
+        score_matrix = scorer.get_score_matrix(recipients_dict, donors_dict)
+
+        data_and_configuration = DataAndConfigurationForILPSolver(donors_dict, recipients_dict, config_parameters,
+                                                                  score_matrix)
+
+        donors = list(donors_dict.values())
+        expected_edges = {}
+        for from_node, donor in enumerate(donors):
+            for to_node, donor_for_recipient in enumerate(donors):
+                recipient = recipients_dict.get(donor_for_recipient.related_recipient_db_id)
+                if recipient is None or donor.related_recipient_db_id == recipient.db_id:
+                    continue
+                original_donors = [donors_dict[donor_db_id] for donor_db_id in recipient.related_donors_db_ids]
+                weight = int(scorer.score_transplant_including_original_tuple(donor, recipient, original_donors))
+                if weight >= 0:
+                    expected_edges[(from_node, to_node)] = weight
+
+        self.assertEqual(expected_edges,
+                         {(from_node, to_node): weight for from_node, to_node, weight in
+                          data_and_configuration.graph.edges.data('weight')})
+
+    def test_cycle_formulation_finds_the_same_matchings(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        best_matching = solve_from_configuration(ConfigParameters(), txm_event).calculated_matchings_list[0]
+        for config_parameters in [
+            ConfigParameters(max_number_of_matchings=10),
+            ConfigParameters(max_number_of_matchings=10, max_cycle_length=3, max_sequence_length=2),
+            ConfigParameters(max_number_of_matchings=10, max_number_of_distinct_countries_in_round=1),
+            ConfigParameters(max_number_of_matchings=10, max_debt_for_country=1,
+                             max_debt_for_country_for_blood_group_zero=1),
+            ConfigParameters(max_number_of_matchings=10,
+                             required_patient_db_ids=[pair.recipient.db_id for pair in best_matching.matching_pairs][:2]),
+            # too many cycles, the edge formulation is used
+            ConfigParameters(max_number_of_matchings=10, max_cycles_in_all_solutions_solver=1)
+        ]:
+            scores = {}
+            for solver in [Solver.ILPSolver, Solver.ILPCycleFormulationSolver]:
+                config_parameters.solver_constructor_name = solver
+                scores[solver] = [matching.score for matching in
+                                  solve_from_configuration(config_parameters, txm_event).calculated_matchings_list]
+            self.assertLess(0, len(scores[Solver.ILPSolver]))
+            self.assertEqual(scores[Solver.ILPSolver], scores[Solver.ILPCycleFormulationSolver], config_parameters)
+
+
 def _set_donor_blood_group(donor: Donor) -> Donor:
     if donor.db_id % 2 == 0:
         donor.parameters.blood_group = BloodGroup.ZERO
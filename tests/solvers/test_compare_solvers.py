@@ -1,9 +1,13 @@
+import itertools
+from unittest import mock
+
 from local_testing_utilities.populate_db import PATIENT_DATA_OBFUSCATED
 from tests.solvers.best_solution_use_split_resolution_true import (
     BEST_SOLUTION_use_high_resolution_TRUE,
     get_donor_recipient_pairs_from_solution)
 from tests.test_utilities.prepare_app_for_tests import DbTests
 from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.configuration.subclasses import ForbiddenCountryCombination
 from txmatching.database.services.txm_event_service import \
     get_txm_event_complete
 from txmatching.solve_service.solve_from_configuration import \
@@ -45,3 +49,40 @@ class TestSolveFromDbAndItsSupportFunctionality(DbTests):
         all_sol_solver_scores = [sol.score for sol in solutions_all_sol_solver[:ILP_SCORES_NUMBER]]
         self.maxDiff = None
         self.assertListEqual(ilp_scores, all_sol_solver_scores)
+
+    def test_independent_components_give_the_same_matchings(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        txm_event = get_txm_event_complete(txm_event_db_id)
+        countries = {donor.parameters.country_code for donor in txm_event.active_and_valid_donors_dict.values()}
+        # the patients of each country form a separate component when no transplants between countries are allowed
+        forbidden_country_combinations = [ForbiddenCountryCombination(donor_country, recipient_country)
+                                          for donor_country, recipient_country in itertools.permutations(countries, 2)]
+        for solver in [Solver.ILPSolver, Solver.ILPCycleFormulationSolver, Solver.AllSolutionsSolver]:
+            config_parameters = ConfigParameters(solver_constructor_name=solver,
+                                                 forbidden_country_combinations=forbidden_country_combinations,
+                                                 max_debt_for_country=100,
+                                                 max_debt_for_country_for_blood_group_zero=100,
+                                                 max_number_of_matchings=10)
+            with self.assertLogs('txmatching.solvers.solver_base', level='INFO'):
+                pairing_result = solve_from_configuration(config_parameters, txm_event)
+            with mock.patch('txmatching.solvers.solver_base.can_be_solved_by_components', return_value=False):
+                expected_pairing_result = solve_from_configuration(config_parameters, txm_event)
+            matchings = pairing_result.calculated_matchings_list
+            expected_matchings = expected_pairing_result.calculated_matchings_list
+
+            self.assertLess(1, len(matchings))
+            self.assertEqual(expected_pairing_result.found_matchings_count, pairing_result.found_matchings_count, solver)
+            self.assertEqual(expected_pairing_result.all_results_found, pairing_result.all_results_found, solver)
+            self.assertEqual([matching.get_sort_key() for matching in expected_matchings],
+                             [matching.get_sort_key() for matching in matchings], solver)
+            self.assertEqual(expected_matchings[0].matching_pairs, matchings[0].matching_pairs, solver)
+
+        # the matchings are counted only up to max_matchings_in_all_solutions_solver in both cases
+        config_parameters.max_matchings_in_all_solutions_solver = 5
+        pairing_result = solve_from_configuration(config_parameters, txm_event)
+        with mock.patch('txmatching.solvers.solver_base.can_be_solved_by_components', return_value=False):
+            expected_pairing_result = solve_from_configuration(config_parameters, txm_event)
+        self.assertEqual(5, pairing_result.found_matchings_count)
+        self.assertEqual(expected_pairing_result.found_matchings_count, pairing_result.found_matchings_count)
+        self.assertFalse(pairing_result.all_results_found)
+        self.assertFalse(expected_pairing_result.all_results_found)
@@ -0,0 +1,34 @@
+import unittest
+from unittest import mock
+
+from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.solvers.independent_components import (
+    can_be_solved_by_components, get_best_combinations, solve_components)
+
+
+class TestIndependentComponents(unittest.TestCase):
+
+    def test_get_best_combinations(self):
+        sort_keys_per_component = [
+            [(3, 10), (2, 30), (2, 5)],
+            [(2, 8), (2, 1)],
+        ]
+        self.assertEqual([(0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 1)],
+                         get_best_combinations(sort_keys_per_component, 10))
+        self.assertEqual([(0, 0), (0, 1)], get_best_combinations(sort_keys_per_component, 2))
+        self.assertEqual([(0,), (1,)], get_best_combinations([[(1, 1), (1, 0)]], 5)[:2])
+        self.assertEqual([], get_best_combinations([], 5))
+
+    def test_can_be_solved_by_components_without_patients(self):
+        self.assertTrue(can_be_solved_by_components(ConfigParameters(), [], []))
+        self.assertFalse(can_be_solved_by_components(ConfigParameters(required_patient_db_ids=[1]), [], []))
+
+    def test_solve_components_sequentially_in_daemonic_process(self):
+        with mock.patch('multiprocessing.current_process', return_value=mock.Mock(daemon=True)), \
+                mock.patch('txmatching.solvers.independent_components.ProcessPoolExecutor') as executor:
+            self.assertEqual([1, 4, 9], solve_components(_square, [1, 2, 3], donors_count=1000, max_workers=3))
+        executor.assert_not_called()
+
+
+def _square(number: int) -> int:
+    return number * number
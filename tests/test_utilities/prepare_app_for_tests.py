@@ -22,12 +22,15 @@ from txmatching.database.services.pairing_result_service import \
     solve_from_configuration_and_save
 from txmatching.database.services.patient_upload_service import \
     replace_or_add_patients_from_excel
+from txmatching.database.services.solve_job_service import run_next_solve_job
+from txmatching.database.services.txm_event_cache import txm_event_cache
 from txmatching.database.services.txm_event_service import \
     get_txm_event_complete
 from txmatching.utils.excel_parsing.parse_excel_data import parse_excel_data
 from txmatching.utils.get_absolute_path import get_absolute_path
-from txmatching.web import (API_VERSION, USER_NAMESPACE, add_all_namespaces,
-                            register_error_handlers)
+from txmatching.web import (API_VERSION, MATCHING_NAMESPACE,
+                            TXM_EVENT_NAMESPACE, USER_NAMESPACE,
+                            add_all_namespaces, register_error_handlers)
 
 ROLE_CREDENTIALS = {
     UserRole.ADMIN: ADMIN_USER,
@@ -77,6 +80,8 @@ class DbTests(unittest.TestCase):
         self._load_local_development_config()
 
         db.create_all()
+        # the txm events cached for the previous test would be seen as valid in the new database
+        txm_event_cache.clear()
 
         self.app.app_context().push()
         self.api = Api(self.app)
@@ -104,6 +109,18 @@ class DbTests(unittest.TestCase):
         )
         return txm_event_db_id
 
+    def post_calculate_for_config(self, client, txm_event_db_id: int, conf_dto: Dict, query: str = ''):
+        """
+        Posts the configuration to calculate-for-config. If its solving was enqueued, runs the solve job
+        and posts the configuration again.
+        """
+        url = f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/{MATCHING_NAMESPACE}/calculate-for-config{query}'
+        res = client.post(url, json=conf_dto, headers=self.auth_headers)
+        if res.status_code == 202:
+            self.assertTrue(run_next_solve_job())
+            res = client.post(url, json=conf_dto, headers=self.auth_headers)
+        return res
+
     @staticmethod
     def fill_db_with_patients(file=get_absolute_path('/tests/resources/data.xlsx'), txm_event='test') -> int:
         patients = parse_excel_data(file, txm_event, None)
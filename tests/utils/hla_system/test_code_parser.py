@@ -1,4 +1,7 @@
+import os
+import pickle
 import re
+import tempfile
 from typing import List
 
 import pandas as pd
@@ -17,13 +20,15 @@ from txmatching.utils.hla_system.hla_table import \
 from txmatching.utils.hla_system.hla_transformations.get_mfi_from_multiple_hla_codes import \
     get_mfi_from_multiple_hla_codes
 from txmatching.utils.hla_system.hla_transformations.hla_transformations import (
+    clear_hla_code_parsing_cache, get_hla_code_parsing_cache_statistics,
     parse_hla_raw_code_with_details, preprocess_hla_code_in)
 from txmatching.utils.hla_system.hla_transformations.hla_transformations_store import (
     basic_group_is_empty, group_exceedes_max_number_of_hla_types)
 from txmatching.utils.hla_system.hla_transformations.parsing_issue_detail import (
     ERROR_PROCESSING_RESULTS, OK_PROCESSING_RESULTS,
     WARNING_PROCESSING_RESULTS, ParsingIssueDetail)
-from txmatching.utils.hla_system.rel_dna_ser_parsing import parse_rel_dna_ser
+from txmatching.utils.hla_system.rel_dna_ser_parsing import (load_rel_dna_ser,
+                                                             parse_rel_dna_ser)
 
 codes = {
     'A1': (HLACode(None, 'A1', 'A1'), ParsingIssueDetail.SUCCESSFULLY_PARSED),
@@ -146,6 +151,47 @@ class TestCodeParser(DbTests):
         self.assertEqual('CW14', parsing_result.loc['C*14:02:01:01'].split)
         self.assertEqual('CW8', parsing_result.loc['C*09'].split)
 
+    def test_load_rel_dna_ser_artifact(self):
+        path_to_rel_dna_ser = get_absolute_path('tests/utils/hla_system/rel_dna_ser_test.txt')
+        expected = parse_rel_dna_ser(path_to_rel_dna_ser)
+        with tempfile.TemporaryDirectory() as artifact_dir:
+            path_to_artifact = os.path.join(artifact_dir, 'rel_dna_ser.pickle')
+
+            # the artifact is built on the first load
+            self.assertTrue(expected.equals(load_rel_dna_ser(path_to_rel_dna_ser, path_to_artifact)))
+            self.assertTrue(os.path.exists(path_to_artifact))
+            self.assertTrue(expected.equals(load_rel_dna_ser(path_to_rel_dna_ser, path_to_artifact)))
+
+            # an artifact of a different file is not used
+            with open(path_to_artifact, 'wb') as file:
+                pickle.dump({'checksum': 'other', 'rel_dna_ser_df': expected.head(1)}, file)
+            self.assertTrue(expected.equals(load_rel_dna_ser(path_to_rel_dna_ser, path_to_artifact)))
+
+            # a broken artifact is rebuilt
+            with open(path_to_artifact, 'wb') as file:
+                file.write(b'broken')
+            self.assertTrue(expected.equals(load_rel_dna_ser(path_to_rel_dna_ser, path_to_artifact)))
+            self.assertTrue(expected.equals(load_rel_dna_ser(path_to_rel_dna_ser, path_to_artifact)))
+
+    def test_parsing_cache(self):
+        clear_hla_code_parsing_cache()
+        first_result = parse_hla_raw_code_with_details('A*01:01:01:01')
+        self.assertIs(first_result, parse_hla_raw_code_with_details('A*01:01:01:01'))
+        self.assertEqual(['DPA1*01:03', 'DPB1*04:02'], preprocess_hla_code_in('DP4 [01:03, 04:02]'))
+        self.assertEqual(['DPA1*01:03', 'DPB1*04:02'], preprocess_hla_code_in('DP4 [01:03, 04:02]'))
+
+        statistics = {cache_statistics.name: cache_statistics
+                      for cache_statistics in get_hla_code_parsing_cache_statistics()}
+        self.assertEqual((1, 1, 1), (statistics['hla_code_parsing'].hits, statistics['hla_code_parsing'].misses,
+                                     statistics['hla_code_parsing'].size))
+        self.assertEqual((1, 1, 1),
+                         (statistics['hla_code_preprocessing'].hits, statistics['hla_code_preprocessing'].misses,
+                          statistics['hla_code_preprocessing'].size))
+
+        clear_hla_code_parsing_cache()
+        self.assertIsNot(first_result, parse_hla_raw_code_with_details('A*01:01:01:01'))
+        self.assertEqual(first_result, parse_hla_raw_code_with_details('A*01:01:01:01'))
+
     def test_preprocessing(self):
         self.assertSetEqual({'DPA1*01:03', 'DPB1*04:02'}, set(preprocess_hla_code_in('DP4 [01:03, 04:02]')))
         self.assertSetEqual({'DQA1*01:03', 'DQB1*06:03'}, set(preprocess_hla_code_in('DQ[01:03,      06:03]')))
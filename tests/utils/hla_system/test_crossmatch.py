@@ -343,3 +343,34 @@ class TestCrossmatch(unittest.TestCase):
                                          [create_antibody('A*23:01', 2100, 2000),
                                           create_antibody('A*23:04', 2100, 2000)], True,
                                          HLACrossmatchLevel.SPLIT_AND_BROAD)
+
+    def test_positive_crossmatch_same_as_crossmatched_antibodies(self):
+        hla_typings = [
+            create_hla_typing(hla_types_list=['A*01:01', 'A*23:01', 'B7', 'DR11', 'DQA1*01:01', 'DPB1*04:01']),
+            create_hla_typing(hla_types_list=['A9', 'B*07:02', 'DR4', 'DQB1*03:10']),
+            create_hla_typing(hla_types_list=['A24', 'A2', 'B*44:02', 'DRB1*11:01'])
+        ]
+        hla_antibodies = create_antibodies(hla_antibodies_list=[
+            create_antibody('A*01:01', 2100, 2000),
+            create_antibody('A*23:01', 2100, 2000),
+            create_antibody('A*24:02', 1900, 2000),
+            create_antibody('B*07:02', 2100, 2000),
+            create_antibody('B*44:02', 1900, 2000),
+            create_antibody('DRB1*11:01', 2100, 2000),
+            create_antibody('DQB1*03:10', 2100, 2000),
+            create_antibody('DPB1*04:01', 1900, 2000)
+        ])
+
+        for hla_typing in hla_typings:
+            for use_high_resolution in [True, False]:
+                crossmatched_antibodies = get_crossmatched_antibodies(hla_typing, hla_antibodies, use_high_resolution)
+                for crossmatch_level in HLACrossmatchLevel:
+                    expected = any(antibody_match.match_type.is_positive_for_level(crossmatch_level)
+                                   for antibody_group in crossmatched_antibodies
+                                   for antibody_match in antibody_group.antibody_matches)
+                    self.assertEqual(expected,
+                                     is_positive_hla_crossmatch(hla_typing, hla_antibodies, use_high_resolution,
+                                                                crossmatch_level),
+                                     f'{hla_typing}, use_high_resolution={use_high_resolution}, {crossmatch_level}')
+
+        self.assertIs(hla_antibodies.index_per_groups, hla_antibodies.index_per_groups)
@@ -3,7 +3,7 @@ import dataclasses
 from tests.test_utilities.prepare_app_for_tests import DbTests
 from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.web import (API_VERSION, CONFIGURATION_NAMESPACE,
-                            MATCHING_NAMESPACE, TXM_EVENT_NAMESPACE)
+                            TXM_EVENT_NAMESPACE)
 
 
 class TestPatientService(DbTests):
@@ -32,13 +32,7 @@ class TestPatientService(DbTests):
 
     def _calculate_for_config(self, configuration, txm_event_db_id):
         with self.app.test_client() as client:
-            conf_dto = dataclasses.asdict(configuration)
-
-        res = client.post(
-            f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/{MATCHING_NAMESPACE}/calculate-for-config',
-            json=conf_dto,
-            headers=self.auth_headers
-        )
+            res = self.post_calculate_for_config(client, txm_event_db_id, dataclasses.asdict(configuration))
 
         self.assertEqual(200, res.status_code)
         return res.json
@@ -8,6 +8,7 @@ from txmatching.database.services.config_service import \
     save_config_parameters_to_db
 from txmatching.database.services.pairing_result_service import \
     solve_from_configuration_and_save
+from txmatching.database.services.solve_job_service import run_next_solve_job
 from txmatching.database.services.txm_event_service import \
     get_txm_event_complete
 from txmatching.patients.hla_code import HLACode
@@ -249,10 +250,7 @@ class TestSaveAndGetConfiguration(DbTests):
             conf_dto = dataclasses.asdict(ConfigParameters(solver_constructor_name=Solver.AllSolutionsSolver,
                                                            max_number_of_distinct_countries_in_round=1))
 
-            res = client.post(f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/'
-                              f'{MATCHING_NAMESPACE}/calculate-for-config',
-                              json=conf_dto,
-                              headers=self.auth_headers)
+            res = self.post_calculate_for_config(client, txm_event_db_id, conf_dto)
             self.assertEqual(200, res.status_code)
             self.assertEqual(9, res.json['found_matchings_count'])
 
@@ -260,13 +258,35 @@ class TestSaveAndGetConfiguration(DbTests):
                                                             max_number_of_distinct_countries_in_round=50,
                                                             hla_crossmatch_level=HLACrossmatchLevel.NONE))
 
-            res = client.post(f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/'
-                              f'{MATCHING_NAMESPACE}/calculate-for-config',
-                              json=conf_dto2,
-                              headers=self.auth_headers)
+            res = self.post_calculate_for_config(client, txm_event_db_id, conf_dto2)
             self.assertEqual(200, res.status_code)
             self.assertEqual(947, res.json['found_matchings_count'])
 
+    def test_get_matchings_page(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        url = f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/{MATCHING_NAMESPACE}/calculate-for-config'
+
+        with self.app.test_client() as client:
+            conf_dto = dataclasses.asdict(ConfigParameters(solver_constructor_name=Solver.AllSolutionsSolver,
+                                                           max_number_of_distinct_countries_in_round=50,
+                                                           max_number_of_matchings=5))
+
+            res = self.post_calculate_for_config(client, txm_event_db_id, conf_dto)
+            self.assertEqual(200, res.status_code)
+            all_matchings = res.json['calculated_matchings']
+            self.assertEqual(5, len(all_matchings))
+
+            res = client.post(f'{url}?offset=1&limit=2', json=conf_dto, headers=self.auth_headers)
+            self.assertEqual(200, res.status_code)
+            self.assertEqual(all_matchings[1:3], res.json['calculated_matchings'])
+            self.assertEqual(947, res.json['found_matchings_count'])
+
+            res = client.post(f'{url}?offset=4&limit=10', json=conf_dto, headers=self.auth_headers)
+            self.assertEqual(all_matchings[4:], res.json['calculated_matchings'])
+
+            res = client.post(f'{url}?offset=-1', json=conf_dto, headers=self.auth_headers)
+            self.assertEqual(400, res.status_code)
+
     def test_solver_multiple_txm_events(self):
         txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
 
@@ -274,17 +294,45 @@ class TestSaveAndGetConfiguration(DbTests):
             conf_dto = dataclasses.asdict(ConfigParameters(solver_constructor_name=Solver.AllSolutionsSolver,
                                                            max_number_of_distinct_countries_in_round=1))
 
-            res = client.post(f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/'
-                              f'{MATCHING_NAMESPACE}/calculate-for-config',
-                              json=conf_dto,
-                              headers=self.auth_headers)
+            res = self.post_calculate_for_config(client, txm_event_db_id, conf_dto)
             self.assertEqual(9, res.json['found_matchings_count'])
             self.assertEqual(200, res.status_code)
 
             txm_event_db_id_2 = create_or_overwrite_txm_event(name='test2').db_id
-            res = client.post(f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id_2}/'
-                              f'{MATCHING_NAMESPACE}/calculate-for-config',
-                              json=conf_dto,
-                              headers=self.auth_headers)
+            res = self.post_calculate_for_config(client, txm_event_db_id_2, conf_dto)
             self.assertEqual(200, res.status_code)
             self.assertEqual(0, res.json['found_matchings_count'])
+
+    def test_solve_job(self):
+        txm_event_db_id = self.fill_db_with_patients(get_absolute_path(PATIENT_DATA_OBFUSCATED))
+        url = f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/{MATCHING_NAMESPACE}'
+
+        with self.app.test_client() as client:
+            conf_dto = dataclasses.asdict(ConfigParameters(solver_constructor_name=Solver.AllSolutionsSolver,
+                                                           max_number_of_distinct_countries_in_round=1))
+
+            res = client.post(f'{url}/calculate-for-config', json=conf_dto, headers=self.auth_headers)
+            self.assertEqual(202, res.status_code)
+            self.assertEqual('QUEUED', res.json['status'])
+            solve_job_id = res.json['id']
+
+            # the configuration is not enqueued twice
+            res = client.post(f'{url}/calculate-for-config', json=conf_dto, headers=self.auth_headers)
+            self.assertEqual(202, res.status_code)
+            self.assertEqual(solve_job_id, res.json['id'])
+
+            self.assertTrue(run_next_solve_job())
+            self.assertFalse(run_next_solve_job())
+
+            res = client.get(f'{url}/solve-job/{solve_job_id}', headers=self.auth_headers)
+            self.assertEqual(200, res.status_code)
+            self.assertEqual('FINISHED', res.json['status'])
+            self.assertEqual(1.0, res.json['progress'])
+            self.assertIsNotNone(res.json['pairing_result_id'])
+
+            res = client.post(f'{url}/calculate-for-config', json=conf_dto, headers=self.auth_headers)
+            self.assertEqual(200, res.status_code)
+            self.assertEqual(9, res.json['found_matchings_count'])
+
+            res = client.get(f'{url}/solve-job/{solve_job_id + 1}', headers=self.auth_headers)
+            self.assertEqual('Not Found', res.json['error'])
@@ -1,6 +1,6 @@
 import os
 
-from sqlalchemy import and_
+from sqlalchemy import and_, event
 
 from local_testing_utilities.populate_db import (EDITOR_WITH_ONLY_ONE_COUNTRY,
                                                  PATIENT_DATA_OBFUSCATED)
@@ -9,6 +9,7 @@ from tests.test_utilities.hla_preparation_utils import (create_antibodies,
                                                         create_antibody,
                                                         create_hla_typing)
 from tests.test_utilities.prepare_app_for_tests import DbTests
+from txmatching.database.db import db
 from txmatching.database.services.txm_event_service import \
     get_txm_event_complete
 from txmatching.database.sql_alchemy_schema import (ConfigModel, DonorModel,
@@ -753,3 +754,58 @@ class TestPatientService(DbTests):
             self.assertEqual(406, res.status_code)
 
             self.assertFalse(recipient_db_id in txm_event.active_and_valid_recipients_dict)
+
+    def test_get_patients_query_count_does_not_depend_on_patients_count(self):
+        txm_event_db_id = create_or_overwrite_txm_event(name='test').db_id
+
+        self._add_pairs(txm_event_db_id, pairs_count=2)
+        query_count_for_two_pairs = self._count_queries_of_get_patients(txm_event_db_id)
+
+        self._add_pairs(txm_event_db_id, pairs_count=5, first_pair_number=2)
+        query_count_for_seven_pairs = self._count_queries_of_get_patients(txm_event_db_id)
+
+        self.assertEqual(query_count_for_two_pairs, query_count_for_seven_pairs)
+
+    def _add_pairs(self, txm_event_db_id: int, pairs_count: int, first_pair_number: int = 0):
+        with self.app.test_client() as client:
+            for pair_number in range(first_pair_number, first_pair_number + pairs_count):
+                json_data = {
+                    'donor': {
+                        'medical_id': f'donor_{pair_number}',
+                        'blood_group': 'A',
+                        # unknown code, so that the donor has a parsing issue
+                        'hla_typing': ['A1', 'B7', 'DR11', 'A999'],
+                        'donor_type': DonorType.DONOR.value,
+                    },
+                    'recipient': {
+                        'medical_id': f'recipient_{pair_number}',
+                        'acceptable_blood_groups': [],
+                        'blood_group': 'A',
+                        'hla_typing': ['A2', 'B8', 'DR4'],
+                        'recipient_cutoff': 2000,
+                        'hla_antibodies': [{'name': 'A9', 'mfi': 2500, 'cutoff': 2000}],
+                    },
+                    'country_code': 'CZE'
+                }
+                res = client.post(f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/'
+                                  f'{PATIENT_NAMESPACE}/pairs',
+                                  headers=self.auth_headers, json=json_data)
+                self.assertEqual(200, res.status_code)
+
+    def _count_queries_of_get_patients(self, txm_event_db_id: int) -> int:
+        statements = []
+
+        # pylint: disable=too-many-arguments,unused-argument
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            with self.app.test_client() as client:
+                res = client.get(f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{txm_event_db_id}/'
+                                 f'{PATIENT_NAMESPACE}/configs/default',
+                                 headers=self.auth_headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+        self.assertEqual(200, res.status_code)
+        return len(statements)
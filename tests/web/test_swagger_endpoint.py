@@ -40,13 +40,7 @@ class TestSwaggerEndpoints(DbTests):
 
         # add configuration to db
         with self.app.test_client() as client:
-            conf_dto = dataclasses.asdict(ConfigParameters())
-
-        res = client.post(
-            f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/{self.txm_event_db_id}/{MATCHING_NAMESPACE}/calculate-for-config',
-            json=conf_dto,
-            headers=self.auth_headers
-        )
+            res = self.post_calculate_for_config(client, self.txm_event_db_id, dataclasses.asdict(ConfigParameters()))
         self.assertEqual(200, res.status_code)
 
         special_status_code_for_paths = {
@@ -55,7 +49,10 @@ class TestSwaggerEndpoints(DbTests):
             },
             'post': {
                 f'{API_VERSION[1:]}/{USER_NAMESPACE}/login': [401],
-                f'{API_VERSION[1:]}/{USER_NAMESPACE}/otp': [403]
+                f'{API_VERSION[1:]}/{USER_NAMESPACE}/otp': [403],
+                # the example configuration differs from the solved one, its solving is enqueued
+                f'{API_VERSION[1:]}/{TXM_EVENT_NAMESPACE}/{{txm_event_id}}/{MATCHING_NAMESPACE}/calculate-for-config': [
+                    202]
             },
             'put': {
                 f'{API_VERSION[1:]}/{USER_NAMESPACE}/otp': [403],
@@ -61,6 +61,9 @@ class ApplicationConfiguration:
     authentic_client_secret: str
     authentic_client_redirect_uri: str
 
+    # max number of solves that can run for a txm event at once
+    max_solves_running_per_txm_event: int
+
 
 def get_application_configuration() -> ApplicationConfiguration:
     """
@@ -101,6 +104,8 @@ def _build_application_configuration() -> ApplicationConfiguration:
         authentic_client_id=_get_prop('AUTHENTIC_CLIENT_ID'),
         authentic_client_secret=_get_prop('AUTHENTIC_CLIENT_SECRET'),
         authentic_client_redirect_uri=_get_prop('AUTHENTIC_REDIRECT_URI'),
+        max_solves_running_per_txm_event=int(_get_prop('MAX_SOLVES_RUNNING_PER_TXM_EVENT', optional=True,
+                                                       default='1')),
     )
     return config
 
@@ -8,6 +8,9 @@ from txmatching.configuration.subclasses import (ForbiddenCountryCombination,
                                                  PatientDbId)
 from txmatching.utils.country_enum import Country
 from txmatching.utils.enums import HLACrossmatchLevel, Scorer, Solver
+from txmatching.utils.persistent_hash import (get_hash_digest,
+                                              initialize_persistent_hash,
+                                              update_persistent_hash)
 
 DEFAULT_FORBIDDEN_COUNTRY_LIST = [ForbiddenCountryCombination(Country.AUT, Country.ISR),
                                   ForbiddenCountryCombination(Country.ISR, Country.AUT)]
@@ -52,7 +55,8 @@ class ConfigParameters:
     max_matchings_in_all_solutions_solver: Max allowed number of matchings all solutions solver searches for (to limit
      the duration of the computation)
     max_cycles_in_all_solutions_solver: Max allowed number of cycles all solutions solver searches for in the
-    initial step of the comutation (to limit the duration of the computation)
+    initial step of the comutation (to limit the duration of the computation), ILP cycle formulation solver uses
+    the edge formulation if there are more cycles
     max_matchings_in_ilp_solver: Max allowed number of matchings ilp solver searches for (to limit
      the duration of the computation)
     """
@@ -141,6 +145,25 @@ class ConfigParameters:
                         return False
         return True
 
+    def comparison_fingerprint(self) -> int:
+        """
+        Persistent hash of the fields that have to be equal (lists as sets) for the configurations to be comparable.
+        Comparable configurations have the same fingerprint.
+        """
+        hash_ = initialize_persistent_hash()
+        for fld in dataclasses.fields(self):
+            comparison_mode = fld.metadata.get(COMPARISON_MODE, None)
+            if not fld.compare or comparison_mode in {ComparisonMode.SMALLER, ComparisonMode.IGNORE}:
+                continue
+            value = getattr(self, fld.name, None)
+            if comparison_mode == ComparisonMode.SET:
+                value = sorted({dataclasses.astuple(item) if dataclasses.is_dataclass(item) else item
+                                for item in value})
+            update_persistent_hash(hash_, fld.name)
+            # equal numbers have to get the same fingerprint as they are equal in comparable()
+            update_persistent_hash(hash_, _normalize_numbers(value))
+        return get_hash_digest(hash_)
+
     def non_negative(self):
         """
         Check all the fields that have to be non-negative
@@ -153,3 +176,15 @@ class ConfigParameters:
 
     def __post_init__(self):
         self.non_negative()
+
+
+def _normalize_numbers(value):
+    """
+    Converts the numbers to floats (also in lists and tuples), so that equal numbers (e.g. 3 and 3.0) get the same
+    persistent hash.
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value)(_normalize_numbers(item) for item in value)
+    if isinstance(value, (int, float)) and not isinstance(value, (bool, Enum)):
+        return float(value)
+    return value
@@ -1,8 +1,8 @@
 from txmatching.patients.patient import DonorType
 from txmatching.utils.blood_groups import BloodGroup
 from txmatching.utils.country_enum import Country
-from txmatching.utils.enums import (HLACrossmatchLevel, Scorer, Sex, Solver,
-                                    TxmEventState)
+from txmatching.utils.enums import (HLACrossmatchLevel, Scorer, Sex,
+                                    SolveJobStatus, Solver, TxmEventState)
 from txmatching.web.web_utils.namespaces import enums_api
 
 CountryCodeJson = enums_api.schema_model('CountryCode', {
@@ -46,3 +46,8 @@ TxmEventStateJson = enums_api.schema_model('TxmEventState', {
     'enum': [state.value for state in TxmEventState],
     'type': 'string'
 })
+
+SolveJobStatusJson = enums_api.schema_model('SolveJobStatus', {
+    'enum': [status.value for status in SolveJobStatus],
+    'type': 'string'
+})
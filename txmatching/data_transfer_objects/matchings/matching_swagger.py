@@ -1,5 +1,6 @@
 from flask_restx import fields
 
+from txmatching.data_transfer_objects.enums_swagger import SolveJobStatusJson
 from txmatching.data_transfer_objects.hla.hla_swagger import (HLAAntibody,
                                                               HLAType)
 from txmatching.utils.enums import (GENE_HLA_GROUPS_WITH_OTHER,
@@ -124,3 +125,13 @@ CalculatedMatchingsJson = matching_api.model('CalculatedMatchings', {
     'show_not_all_matchings_found': fields.Boolean(required=True),
     'config_id': fields.Integer(required=True),
 })
+
+SolveJobJson = matching_api.model('SolveJob', {
+    'id': fields.Integer(required=True),
+    'status': fields.Nested(SolveJobStatusJson, required=True),
+    'progress': fields.Float(required=True, example=0.5,
+                             description='Fraction of the solve that was done, between 0 and 1.'),
+    'config_id': fields.Integer(required=True),
+    'pairing_result_id': fields.Integer(required=False),
+    'error_message': fields.String(required=False),
+})
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from txmatching.utils.enums import SolveJobStatus
+
+
+@dataclass
+class SolveJobDTOOut:
+    # pylint:disable=invalid-name
+    id: int
+    # pylint:enable=invalid-name
+    status: SolveJobStatus
+    progress: float
+    config_id: int
+    pairing_result_id: Optional[int]
+    error_message: Optional[str]
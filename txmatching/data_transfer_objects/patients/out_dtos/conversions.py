@@ -1,4 +1,4 @@
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.data_transfer_objects.hla.parsing_issue_dto import ParsingIssue
@@ -6,8 +6,6 @@ from txmatching.data_transfer_objects.patients.out_dtos.donor_dto_out import \
     DonorDTOOut
 from txmatching.data_transfer_objects.patients.out_dtos.recipient_dto_out import \
     RecipientDTOOut
-from txmatching.database.services.parsing_issue_service import \
-    get_parsing_issues_for_patients
 from txmatching.patients.patient import Donor, Recipient, TxmEvent
 from txmatching.scorers.additive_scorer import AdditiveScorer
 from txmatching.scorers.scorer_from_config import scorer_from_configuration
@@ -33,9 +31,7 @@ def to_lists_for_fe(txm_event: TxmEvent, configuration_parameters: ConfigParamet
             key=lambda donor: (
             not donor.active_and_valid_pair, _patient_order_for_fe(donor))),
         'recipients': sorted([
-            recipient_to_recipient_dto_out(
-                recipient, txm_event.db_id
-            ) for recipient in txm_event.all_recipients],
+            recipient_to_recipient_dto_out(recipient) for recipient in txm_event.all_recipients],
             key=_patient_order_for_fe)
     }
 
@@ -44,7 +40,7 @@ def _patient_order_for_fe(patient: Union[DonorDTOOut, RecipientDTOOut]) -> str:
     return f'{patient.parameters.country_code.value}_{patient.medical_id}'
 
 
-def recipient_to_recipient_dto_out(recipient: Recipient, txm_event_id: int) -> RecipientDTOOut:
+def recipient_to_recipient_dto_out(recipient: Recipient) -> RecipientDTOOut:
     return RecipientDTOOut(
         db_id=recipient.db_id,
         medical_id=recipient.medical_id,
@@ -59,7 +55,7 @@ def recipient_to_recipient_dto_out(recipient: Recipient, txm_event_id: int) -> R
         waiting_since=recipient.waiting_since,
         previous_transplants=recipient.previous_transplants,
         internal_medical_id=recipient.internal_medical_id,
-        all_messages=get_messages(recipient_id=recipient.db_id, txm_event_id=txm_event_id)
+        all_messages=get_messages(recipient.parsing_issues)
     )
 
 
@@ -77,7 +73,7 @@ def donor_to_donor_dto_out(donor: Donor,
                             active=donor.active,
                             internal_medical_id=donor.internal_medical_id,
                             parsing_issues=donor.parsing_issues,
-                            all_messages=get_messages(donor_id=donor.db_id, txm_event_id=txm_event.db_id),
+                            all_messages=get_messages(donor.parsing_issues),
                             active_and_valid_pair=donor.db_id in txm_event.active_and_valid_donors_dict
                             )
     if donor.related_recipient_db_id:
@@ -140,14 +136,9 @@ def get_detailed_score(compatibility_index_detailed: List[DetailedCompatibilityI
     return detailed_scores
 
 
-def get_messages(txm_event_id: int, recipient_id: int = None, donor_id: int = None) -> Dict[
-        str, List[ParsingIssue]]:
-    if donor_id is not None:
-        donor_id = [donor_id]
-    if recipient_id is not None:
-        recipient_id = [recipient_id]
-
-    parsing_issues = get_parsing_issues_for_patients(txm_event_id, donor_id, recipient_id)
+def get_messages(parsing_issues: Optional[List[ParsingIssue]]) -> Dict[str, List[ParsingIssue]]:
+    if parsing_issues is None:
+        parsing_issues = []
 
     return {
         'infos': [],
@@ -0,0 +1,47 @@
+--
+-- file: txmatching/database/db_migrations/0034.add-solve-job-table.sql
+-- depends: 0033.make-txm-event-id-required-in-parsing-issue
+--
+
+CREATE TYPE SOLVE_JOB_STATUS AS ENUM (
+    'QUEUED',
+    'RUNNING',
+    'FINISHED',
+    'FAILED'
+    );
+
+CREATE TABLE solve_job
+(
+    id                BIGSERIAL        NOT NULL,
+    txm_event_id      BIGINT           NOT NULL,
+    config_id         BIGINT           NOT NULL,
+    status            SOLVE_JOB_STATUS NOT NULL DEFAULT 'QUEUED',
+    progress          FLOAT            NOT NULL DEFAULT 0,
+    pairing_result_id BIGINT,
+    error_message     TEXT,
+    created_by        BIGINT           NOT NULL,
+    created_at        TIMESTAMPTZ      NOT NULL,
+    updated_at        TIMESTAMPTZ      NOT NULL,
+    deleted_at        TIMESTAMPTZ,
+    CONSTRAINT pk_solve_job_id PRIMARY KEY (id),
+    CONSTRAINT fk_solve_job_txm_event_id_txm_event_id FOREIGN KEY (txm_event_id) REFERENCES txm_event(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_solve_job_config_id_config_id FOREIGN KEY (config_id) REFERENCES config(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_solve_job_pairing_result_id_pairing_result_id FOREIGN KEY (pairing_result_id) REFERENCES pairing_result(id) ON DELETE SET NULL ON UPDATE CASCADE,
+    CONSTRAINT fk_solve_job_created_by_app_user_id FOREIGN KEY (created_by) REFERENCES app_user(id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- the workers poll for the queued job that was updated the longest time ago (the jobs queued again go last) and for
+-- the running jobs whose lease (renewed by updating the job) expired
+CREATE INDEX idx_solve_job_status_updated_at_id ON solve_job (status, updated_at, id);
+
+CREATE TRIGGER trg_solve_job_set_created_at
+    BEFORE INSERT
+    ON solve_job
+    FOR EACH ROW
+    EXECUTE PROCEDURE set_created_at();
+
+CREATE TRIGGER trg_solve_job_set_updated_at
+    BEFORE UPDATE
+    ON solve_job
+    FOR EACH ROW
+    EXECUTE PROCEDURE set_updated_at();
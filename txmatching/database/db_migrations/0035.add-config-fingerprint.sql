@@ -0,0 +1,16 @@
+--
+-- file: txmatching/database/db_migrations/0035.add-config-fingerprint.sql
+-- depends: 0034.add-solve-job-table
+--
+
+-- The fingerprints are computed by the application (ConfigParameters.comparison_fingerprint), the rows created before
+-- this migration are not found by the fingerprint until they are filled by make fill-missing-config-fingerprints.
+ALTER TABLE config
+    ADD COLUMN comparison_fingerprint BIGINT;
+
+ALTER TABLE pairing_result
+    ADD COLUMN config_fingerprint BIGINT;
+
+CREATE INDEX idx_config_txm_event_id_comparison_fingerprint ON config (txm_event_id, comparison_fingerprint);
+
+CREATE INDEX idx_pairing_result_patients_hash_config_fingerprint ON pairing_result (patients_hash, config_fingerprint);
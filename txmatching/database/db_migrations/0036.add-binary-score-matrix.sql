@@ -0,0 +1,12 @@
+--
+-- file: txmatching/database/db_migrations/0036.add-binary-score-matrix.sql
+-- depends: 0035.add-config-fingerprint
+--
+
+-- New pairing results store the score matrix in .npy format only, the json score matrix is kept for the pairing
+-- results created before.
+ALTER TABLE pairing_result
+    ADD COLUMN score_matrix_npy BYTEA;
+
+ALTER TABLE pairing_result
+    ALTER COLUMN score_matrix DROP NOT NULL;
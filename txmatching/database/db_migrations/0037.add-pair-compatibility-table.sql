@@ -0,0 +1,26 @@
+--
+-- file: txmatching/database/db_migrations/0037.add-pair-compatibility-table.sql
+-- depends: 0036.add-binary-score-matrix
+--
+
+-- Cache of compatibility index and crossmatch of donor-recipient pairs (see CompatibilityCache), the patients are
+-- identified by the hashes of their HLA data.
+CREATE TABLE pair_compatibility
+(
+    scorer_key          BIGINT      NOT NULL,
+    donor_hash          BIGINT      NOT NULL,
+    recipient_hash      BIGINT      NOT NULL,
+    compatibility_index FLOAT       NOT NULL,
+    positive_crossmatch BOOLEAN     NOT NULL,
+    created_at          TIMESTAMPTZ NOT NULL,
+    CONSTRAINT pk_pair_compatibility PRIMARY KEY (scorer_key, donor_hash, recipient_hash)
+);
+
+-- The expired compatibilities are deleted from the cache by their age.
+CREATE INDEX idx_pair_compatibility_created_at ON pair_compatibility (created_at);
+
+CREATE TRIGGER trg_pair_compatibility_set_created_at
+    BEFORE INSERT
+    ON pair_compatibility
+    FOR EACH ROW
+    EXECUTE PROCEDURE set_created_at();
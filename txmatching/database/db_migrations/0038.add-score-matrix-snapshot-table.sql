@@ -0,0 +1,31 @@
+--
+-- file: txmatching/database/db_migrations/0038.add-score-matrix-snapshot-table.sql
+-- depends: 0037.add-pair-compatibility-table
+--
+
+-- The last score matrix computed for the txm event (see ScoreMatrixSnapshotStore), the rows and the columns are
+-- identified by the score hashes of the donors and the recipients.
+CREATE TABLE score_matrix_snapshot
+(
+    txm_event_id     BIGINT      NOT NULL,
+    scorer_key       BIGINT      NOT NULL,
+    donor_hashes     JSONB       NOT NULL,
+    recipient_hashes JSONB       NOT NULL,
+    score_matrix_npy BYTEA       NOT NULL,
+    created_at       TIMESTAMPTZ NOT NULL,
+    updated_at       TIMESTAMPTZ NOT NULL,
+    CONSTRAINT pk_score_matrix_snapshot PRIMARY KEY (txm_event_id, scorer_key),
+    CONSTRAINT fk_score_matrix_snapshot_txm_event_id_txm_event_id FOREIGN KEY (txm_event_id) REFERENCES txm_event(id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE TRIGGER trg_score_matrix_snapshot_set_created_at
+    BEFORE INSERT
+    ON score_matrix_snapshot
+    FOR EACH ROW
+    EXECUTE PROCEDURE set_created_at();
+
+CREATE TRIGGER trg_score_matrix_snapshot_set_updated_at
+    BEFORE UPDATE
+    ON score_matrix_snapshot
+    FOR EACH ROW
+    EXECUTE PROCEDURE set_updated_at();
@@ -0,0 +1,9 @@
+--
+-- file: txmatching/database/db_migrations/0039.add-txm-event-patients-revision.sql
+-- depends: 0038.add-score-matrix-snapshot-table
+--
+
+-- Increased by every change of the patients of the txm event, the cached txm events (see TxmEventCache) are valid
+-- as long as it does not change.
+ALTER TABLE txm_event
+    ADD COLUMN patients_revision BIGINT NOT NULL DEFAULT 1;
@@ -0,0 +1,12 @@
+--
+-- file: txmatching/database/db_migrations/0040.add-patient-persistent-hash.sql
+-- depends: 0039.add-txm-event-patients-revision
+--
+
+-- Persistent hash of the patient computed when the patient is written, it is computed when the txm event is loaded
+-- for the rows without it until the patient is updated or its parsing recomputed.
+ALTER TABLE donor
+    ADD COLUMN persistent_hash BIGINT;
+
+ALTER TABLE recipient
+    ADD COLUMN persistent_hash BIGINT;
@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from txmatching.database.db import db
+from txmatching.database.sql_alchemy_schema import PairCompatibilityModel
+from txmatching.scorers.compatibility_cache import (CompatibilityCache,
+                                                    PairCompatibility,
+                                                    PairHashes)
+
+logger = logging.getLogger(__name__)
+
+# number of rows inserted by a single statement
+_INSERT_BATCH_SIZE = 1000
+# cached compatibilities older than this are deleted, so that the cache does not keep the pairs of patients that are
+# not in any txm event anymore forever
+COMPATIBILITY_CACHE_MAX_AGE_DAYS = 30
+
+
+class DbCompatibilityCache(CompatibilityCache):
+    """
+    Compatibility cache stored in the database, shared by all the txm events and all the workers.
+    """
+
+    def get_compatibilities(self,
+                            scorer_key: int,
+                            donor_hashes: Iterable[int],
+                            recipient_hashes: Iterable[int]) -> Dict[PairHashes, PairCompatibility]:
+        donor_hashes = set(donor_hashes)
+        recipient_hashes = set(recipient_hashes)
+        if not donor_hashes or not recipient_hashes:
+            return {}
+
+        rows = db.session.query(
+            PairCompatibilityModel.donor_hash,
+            PairCompatibilityModel.recipient_hash,
+            PairCompatibilityModel.compatibility_index,
+            PairCompatibilityModel.positive_crossmatch
+        ).filter(
+            PairCompatibilityModel.scorer_key == scorer_key,
+            PairCompatibilityModel.donor_hash.in_(donor_hashes),
+            PairCompatibilityModel.recipient_hash.in_(recipient_hashes)
+        ).all()
+
+        compatibilities = {
+            (donor_hash, recipient_hash): PairCompatibility(compatibility_index, positive_crossmatch)
+            for donor_hash, recipient_hash, compatibility_index, positive_crossmatch in rows
+        }
+        logger.debug(f'Found {len(compatibilities)} cached compatibilities of '
+                     f'{len(donor_hashes) * len(recipient_hashes)} pairs')
+        return compatibilities
+
+    def save_compatibilities(self, scorer_key: int, compatibilities: Dict[PairHashes, PairCompatibility]):
+        rows = [
+            {
+                'scorer_key': scorer_key,
+                'donor_hash': donor_hash,
+                'recipient_hash': recipient_hash,
+                'compatibility_index': compatibility.compatibility_index,
+                'positive_crossmatch': compatibility.positive_crossmatch
+            } for (donor_hash, recipient_hash), compatibility in compatibilities.items()
+        ]
+        # the same pairs might have been saved by another solve in the meantime
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+        # saved on a separate connection and committed right away, the session of the solve is not committed
+        # in the middle of the solve
+        with db.engine.begin() as connection:
+            for batch_start in range(0, len(rows), _INSERT_BATCH_SIZE):
+                connection.execute(
+                    insert(PairCompatibilityModel).values(rows[batch_start:batch_start + _INSERT_BATCH_SIZE])
+                    .on_conflict_do_nothing()
+                )
+        logger.debug(f'Saved {len(rows)} compatibilities to the cache')
+
+
+def delete_expired_compatibilities():
+    """
+    Deletes the cached compatibilities older than COMPATIBILITY_CACHE_MAX_AGE_DAYS. Run periodically by the solve job
+    workers.
+    """
+    expired_before = datetime.now(timezone.utc) - timedelta(days=COMPATIBILITY_CACHE_MAX_AGE_DAYS)
+    expired_count = db.session.query(PairCompatibilityModel).filter(
+        PairCompatibilityModel.created_at < expired_before
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f'Deleted {expired_count} expired compatibilities from the cache')
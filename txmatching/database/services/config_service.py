@@ -53,6 +53,7 @@ def _config_parameters_to_config_model(
 ) -> ConfigModel:
     return ConfigModel(
         parameters=dataclasses.asdict(config_parameters),
+        comparison_fingerprint=config_parameters.comparison_fingerprint(),
         txm_event_id=txm_event_db_id,
         created_by=user_id
     )
@@ -119,15 +120,31 @@ def find_config_for_parameters(
         txm_event_id: int
 ) -> Optional[Configuration]:
     logger.debug('Searching models for configuration')
+    # equal configurations have the same comparison fingerprint, only the configs with the same fingerprint are
+    # deserialized and compared
     config_models = ConfigModel.query.filter(
-        ConfigModel.txm_event_id == txm_event_id
-    ).all()
+        ConfigModel.txm_event_id == txm_event_id,
+        ConfigModel.comparison_fingerprint == configuration_parameters.comparison_fingerprint()
+    ).order_by(ConfigModel.id).all()
 
     for config_model in config_models:
         config_from_model = configuration_from_config_model(config_model)
         if configuration_parameters == config_from_model.parameters:
             logger.debug(f'Found config for config parameters with id {config_model.id}')
-            return configuration_from_config_model(config_model)
+            return config_from_model
 
     logger.info(f'Provided configuration parameters for event {txm_event_id} is not in db yet')
     return None
+
+
+def fill_missing_comparison_fingerprints():
+    """
+    Computes the comparison fingerprints of the configs created before the fingerprints were added, the configs
+    without the fingerprint are not found by find_config_for_parameters.
+    """
+    config_models = ConfigModel.query.filter(ConfigModel.comparison_fingerprint.is_(None)).all()
+    for config_model in config_models:
+        config_model.comparison_fingerprint = configuration_parameters_from_dict(
+            config_model.parameters).comparison_fingerprint()
+    db.session.commit()
+    logger.info(f'Filled comparison fingerprints of {len(config_models)} configs')
@@ -1,5 +1,5 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
 from typing import Dict, List, Optional, Tuple
 
@@ -12,22 +12,23 @@ from txmatching.data_transfer_objects.patients.out_dtos.conversions import \
 from txmatching.database.services.config_service import \
     configuration_from_config_model
 from txmatching.database.services.scorer_service import (
-    matchings_model_from_dict, score_matrix_from_dict)
+    matchings_model_from_dict, stored_score_matrix_to_array)
 from txmatching.database.sql_alchemy_schema import PairingResultModel
 from txmatching.patients.patient import (Donor, Recipient,
                                          RecipientRequirements, TxmEvent)
 from txmatching.patients.patient_parameters import PatientParameters
 from txmatching.scorers.matching import get_count_of_transplants
+from txmatching.scorers.score_matrix import ScoreMatrix
 from txmatching.scorers.scorer_from_config import scorer_from_configuration
 from txmatching.solvers.donor_recipient_pair import DonorRecipientPair
 from txmatching.solvers.matching.matching_with_score import MatchingWithScore
 from txmatching.utils.blood_groups import blood_groups_compatible
 from txmatching.utils.enums import AntibodyMatchTypes
 from txmatching.utils.hla_system.compatibility_index import (
-    DetailedCompatibilityIndexForHLAGroup, get_detailed_compatibility_index)
+    CIConfiguration, get_detailed_compatibility_index)
 from txmatching.utils.hla_system.detailed_score import DetailedScoreForHLAGroup
-from txmatching.utils.hla_system.hla_crossmatch import (
-    AntibodyMatchForHLAGroup, get_crossmatched_antibodies)
+from txmatching.utils.hla_system.hla_crossmatch import \
+    get_crossmatched_antibodies
 from txmatching.utils.transplantation_warning import (TransplantWarningDetail,
                                                       TransplantWarnings)
 
@@ -36,15 +37,49 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class MatchingsDetailed:
+    """
+    Matchings of a pairing result. The details of the transplants are computed only for the donor-recipient pairs
+    that are asked for (i.e. the pairs in the matchings that are shown) and are memoized.
+    """
     # pylint: disable=too-many-instance-attributes
     matchings: List[MatchingWithScore]
-    scores_tuples: Dict[Tuple[int, int], float]
-    blood_compatibility_tuples: Dict[Tuple[int, int], bool]
-    detailed_score_tuples: Dict[Tuple[int, int], List[DetailedCompatibilityIndexForHLAGroup]]
-    antibody_matches_tuples: Dict[Tuple[int, int], List[AntibodyMatchForHLAGroup]]
     found_matchings_count: Optional[int]
     show_not_all_matchings_found: bool
     max_transplant_score: float
+    score_matrix: ScoreMatrix
+    donors_dict: Dict[int, Donor]
+    recipients_dict: Dict[int, Recipient]
+    ci_configuration: CIConfiguration
+    use_high_resolution: bool
+    _donor_indices: Dict[int, int] = field(init=False)
+    _recipient_indices: Dict[int, int] = field(init=False)
+    _detailed_scores: Dict[Tuple[int, int], List[DetailedScoreForHLAGroup]] = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        self._donor_indices = {donor_db_id: index for index, donor_db_id in enumerate(self.donors_dict)}
+        self._recipient_indices = {recipient_db_id: index for index, recipient_db_id in enumerate(self.recipients_dict)}
+
+    def get_score(self, donor_db_id: int, recipient_db_id: int) -> float:
+        return float(self.score_matrix[self._donor_indices[donor_db_id], self._recipient_indices[recipient_db_id]])
+
+    def get_blood_compatibility(self, donor_db_id: int, recipient_db_id: int) -> bool:
+        return blood_groups_compatible(self.donors_dict[donor_db_id].parameters.blood_group,
+                                       self.recipients_dict[recipient_db_id].parameters.blood_group)
+
+    def get_detailed_score(self, donor_db_id: int, recipient_db_id: int) -> List[DetailedScoreForHLAGroup]:
+        key = (donor_db_id, recipient_db_id)
+        if key not in self._detailed_scores:
+            donor = self.donors_dict[donor_db_id]
+            recipient = self.recipients_dict[recipient_db_id]
+            self._detailed_scores[key] = get_detailed_score(
+                get_detailed_compatibility_index(donor.parameters.hla_typing,
+                                                 recipient.parameters.hla_typing,
+                                                 ci_configuration=self.ci_configuration),
+                get_crossmatched_antibodies(donor.parameters.hla_typing,
+                                            recipient.hla_antibodies,
+                                            self.use_high_resolution)
+            )
+        return self._detailed_scores[key]
 
 
 def get_matchings_detailed_for_pairing_result_model(
@@ -55,56 +90,25 @@ def get_matchings_detailed_for_pairing_result_model(
     configuration_parameters = configuration_from_config_model(pairing_result_model.original_config).parameters
     scorer = scorer_from_configuration(configuration_parameters)
 
-    score_matrix = score_matrix_from_dict(pairing_result_model.score_matrix)
+    score_matrix = stored_score_matrix_to_array(pairing_result_model.score_matrix_npy,
+                                                pairing_result_model.score_matrix)
     matchings_model = matchings_model_from_dict(pairing_result_model.calculated_matchings)
 
     logger.debug('Getting matchings with score')
     matchings_with_score = _matchings_dto_to_matching_with_score(matchings_model,
                                                                  txm_event.active_and_valid_donors_dict,
                                                                  txm_event.active_and_valid_recipients_dict)
-    logger.debug('Getting score dict with score')
-    score_dict = {
-        (donor_db_id, recipient_db_id): score for donor_db_id, row in
-        zip(txm_event.active_and_valid_donors_dict, score_matrix) for recipient_db_id, score in
-        zip(txm_event.active_and_valid_recipients_dict, row)
-    }
-    logger.debug('Getting compatible_blood dict with score')
-    compatible_blood_dict = {(donor_db_id, recipient_db_id): blood_groups_compatible(donor.parameters.blood_group,
-                                                                                     recipient.parameters.blood_group)
-                             for donor_db_id, donor in txm_event.active_and_valid_donors_dict.items()
-                             for recipient_db_id, recipient in txm_event.active_and_valid_recipients_dict.items() if
-                             score_dict[(donor_db_id, recipient_db_id)] >= 0
-                             }
-    logger.debug('Getting has crossmatch')
-    logger.debug('Getting ci dict dict with score')
-    detailed_compatibility_index_dict = {
-        (donor_db_id, recipient_db_id): get_detailed_compatibility_index(donor.parameters.hla_typing,
-                                                                         recipient.parameters.hla_typing,
-                                                                         ci_configuration=scorer.ci_configuration)
-        for donor_db_id, donor in txm_event.active_and_valid_donors_dict.items()
-        for recipient_db_id, recipient in txm_event.active_and_valid_recipients_dict.items() if
-        score_dict[(donor_db_id, recipient_db_id)] >= 0
-    }
-    logger.debug('Getting antibody matches dict dict with score')
-    antibody_matches_dict = {
-        (donor_db_id, recipient_db_id): get_crossmatched_antibodies(donor.parameters.hla_typing,
-                                                                    recipient.hla_antibodies,
-                                                                    configuration_parameters.use_high_resolution
-                                                                    )
-        for donor_db_id, donor in txm_event.active_and_valid_donors_dict.items()
-        for recipient_db_id, recipient in txm_event.active_and_valid_recipients_dict.items() if
-        score_dict[(donor_db_id, recipient_db_id)] >= 0
-    }
 
     return MatchingsDetailed(
-        matchings_with_score,
-        score_dict,
-        compatible_blood_dict,
-        detailed_compatibility_index_dict,
-        antibody_matches_dict,
-        matchings_model.found_matchings_count,
-        matchings_model.show_not_all_matchings_found,
-        scorer.max_transplant_score
+        matchings=matchings_with_score,
+        found_matchings_count=matchings_model.found_matchings_count,
+        show_not_all_matchings_found=matchings_model.show_not_all_matchings_found,
+        max_transplant_score=scorer.max_transplant_score,
+        score_matrix=score_matrix,
+        donors_dict=txm_event.active_and_valid_donors_dict,
+        recipients_dict=txm_event.active_and_valid_recipients_dict,
+        ci_configuration=scorer.ci_configuration,
+        use_high_resolution=configuration_parameters.use_high_resolution
     )
 
 
@@ -138,29 +142,27 @@ def create_calculated_matchings_dto(
     Method that creates common DTOs for FE and reports.
     """
     logger.debug('Creating calculated matchings DTO')
-
-    def _create_transplant_dto(pair: DonorRecipientPair):
-        detailed_scores = get_detailed_score(
-            latest_matchings_detailed.detailed_score_tuples[
-                (pair.donor.db_id, pair.recipient.db_id)],
-            latest_matchings_detailed.antibody_matches_tuples[
-                (pair.donor.db_id, pair.recipient.db_id)]
-        )
-
-        return TransplantDTOOut(
-            score=latest_matchings_detailed.scores_tuples[(pair.donor.db_id, pair.recipient.db_id)],
-            max_score=latest_matchings_detailed.max_transplant_score,
-            compatible_blood=latest_matchings_detailed.blood_compatibility_tuples[
-                (pair.donor.db_id, pair.recipient.db_id)],
-            donor=pair.donor.medical_id,
-            recipient=pair.recipient.medical_id,
-            detailed_score_per_group=detailed_scores,
-            transplant_messages=get_transplant_messages(
-                pair.donor.parameters,
-                pair.recipient.recipient_requirements,
-                detailed_scores
+    # the same transplant is usually part of many matchings
+    transplant_dtos: Dict[Tuple[int, int], TransplantDTOOut] = {}
+
+    def _create_transplant_dto(pair: DonorRecipientPair) -> TransplantDTOOut:
+        key = (pair.donor.db_id, pair.recipient.db_id)
+        if key not in transplant_dtos:
+            detailed_scores = latest_matchings_detailed.get_detailed_score(*key)
+            transplant_dtos[key] = TransplantDTOOut(
+                score=latest_matchings_detailed.get_score(*key),
+                max_score=latest_matchings_detailed.max_transplant_score,
+                compatible_blood=latest_matchings_detailed.get_blood_compatibility(*key),
+                donor=pair.donor.medical_id,
+                recipient=pair.recipient.medical_id,
+                detailed_score_per_group=detailed_scores,
+                transplant_messages=get_transplant_messages(
+                    pair.donor.parameters,
+                    pair.recipient.recipient_requirements,
+                    detailed_scores
+                )
             )
-        )
+        return transplant_dtos[key]
 
     return CalculatedMatchingsDTO(
         calculated_matchings=[MatchingDTO(
@@ -8,29 +8,44 @@ from txmatching.data_transfer_objects.matchings.donor_recipient_model import \
 from txmatching.data_transfer_objects.matchings.matchings_model import (
     MatchingModel, MatchingsModel)
 from txmatching.database.db import db
-from txmatching.database.services.config_service import \
-    configuration_from_config_model
+from txmatching.database.services.compatibility_cache_service import \
+    DbCompatibilityCache
+from txmatching.database.services.config_service import (
+    configuration_from_config_model, configuration_parameters_from_dict)
 from txmatching.database.services.patient_service import \
     get_patients_persistent_hash
-from txmatching.database.services.scorer_service import score_matrix_to_dict
+from txmatching.database.services.score_matrix_snapshot_service import \
+    DbScoreMatrixSnapshotStore
+from txmatching.database.services.scorer_service import score_matrix_to_bytes
 from txmatching.database.sql_alchemy_schema import PairingResultModel
 from txmatching.patients.patient import TxmEvent
-from txmatching.solve_service.solve_from_configuration import \
-    solve_from_configuration
+from txmatching.solve_service.solve_from_configuration import (
+    ProgressCallback, solve_from_configuration)
+from txmatching.solve_service.solver_lock import (get_solver_locks,
+                                                  run_single_flight_solve)
 from txmatching.solvers.pairing_result import PairingResult
+from txmatching.utils.persistent_hash import (get_hash_digest,
+                                              initialize_persistent_hash,
+                                              update_persistent_hash)
 
 logger = logging.getLogger(__name__)
 
 
 def get_pairing_result_comparable_to_config_or_solve(
         configuration: Configuration,
-        txm_event: TxmEvent
+        txm_event: TxmEvent,
+        progress_callback: Optional[ProgressCallback] = None
 ) -> PairingResultModel:
-    maybe_pairing_result_model = get_pairing_result_comparable_to_config(configuration, txm_event)
-    if maybe_pairing_result_model is not None:
-        return maybe_pairing_result_model
-    else:
-        return solve_from_configuration_and_save(configuration, txm_event)
+    """
+    Identical solves requested at the same time (by any of the workers) are solved only once, the result is shared.
+    """
+    return run_single_flight_solve(
+        solver_locks=get_solver_locks(),
+        solve_key=_get_solve_key(configuration, txm_event),
+        txm_event_id=txm_event.db_id,
+        find_result=lambda: get_pairing_result_comparable_to_config(configuration, txm_event),
+        solve=lambda: solve_from_configuration_and_save(configuration, txm_event, progress_callback)
+    )
 
 
 def get_pairing_result_comparable_to_config(
@@ -39,9 +54,11 @@ def get_pairing_result_comparable_to_config(
 ) -> Optional[PairingResultModel]:
     logger.debug(f'Searching pairing result models comparable to configuration {configuration.id}')
     patients_hash = get_patients_persistent_hash(txm_event)
+    # comparable configurations have the same fingerprint, only the fields compared as SMALLER are left to be checked
     pairing_result_models = PairingResultModel.query.filter(
-        PairingResultModel.patients_hash == patients_hash
-    ).all()
+        PairingResultModel.patients_hash == patients_hash,
+        PairingResultModel.config_fingerprint == configuration.parameters.comparison_fingerprint()
+    ).order_by(PairingResultModel.id).all()
 
     for pairing_result_model in pairing_result_models:  # type: PairingResultModel
         config_from_model = configuration_from_config_model(pairing_result_model.original_config)
@@ -57,18 +74,49 @@ def get_pairing_result_comparable_to_config(
 
 def solve_from_configuration_and_save(
         configuration: Configuration,
-        txm_event: TxmEvent
+        txm_event: TxmEvent,
+        progress_callback: Optional[ProgressCallback] = None
 ) -> PairingResultModel:
-    pairing_result = solve_from_configuration(configuration.parameters, txm_event=txm_event)
-    pairing_result_model = _save_pairing_result(pairing_result, configuration.id, txm_event)
+    score_matrix_snapshot_store = DbScoreMatrixSnapshotStore(
+        txm_event.db_id,
+        donors_persistent_hashes=txm_event.donors_persistent_hashes,
+        recipients_persistent_hashes=txm_event.recipients_persistent_hashes
+    )
+    pairing_result = solve_from_configuration(configuration.parameters, txm_event=txm_event,
+                                              progress_callback=progress_callback,
+                                              compatibility_cache=DbCompatibilityCache(),
+                                              score_matrix_snapshot_store=score_matrix_snapshot_store)
+    pairing_result_model = _save_pairing_result(pairing_result, configuration.id,
+                                                configuration.parameters.comparison_fingerprint(), txm_event)
     logger.info(f'Pairing was solved from configuration {configuration.id} '
                 f'and saved as pairing result {pairing_result_model.id}')
     return pairing_result_model
 
 
+def _get_solve_key(configuration: Configuration, txm_event: TxmEvent) -> int:
+    hash_ = initialize_persistent_hash()
+    update_persistent_hash(hash_, get_patients_persistent_hash(txm_event))
+    update_persistent_hash(hash_, configuration.parameters.comparison_fingerprint())
+    return get_hash_digest(hash_)
+
+
+def fill_missing_config_fingerprints():
+    """
+    Computes the config fingerprints of the pairing results created before the fingerprints were added, the pairing
+    results without the fingerprint are not found by get_pairing_result_comparable_to_config.
+    """
+    pairing_result_models = PairingResultModel.query.filter(PairingResultModel.config_fingerprint.is_(None)).all()
+    for pairing_result_model in pairing_result_models:  # type: PairingResultModel
+        pairing_result_model.config_fingerprint = configuration_parameters_from_dict(
+            pairing_result_model.original_config.parameters).comparison_fingerprint()
+    db.session.commit()
+    logger.info(f'Filled config fingerprints of {len(pairing_result_models)} pairing results')
+
+
 def _save_pairing_result(
         pairing_result: PairingResult,
         original_config_id: int,
+        config_fingerprint: int,
         txm_event: TxmEvent
 ) -> PairingResultModel:
     calculated_matchings_model = dataclasses.asdict(
@@ -77,10 +125,11 @@ def _save_pairing_result(
     patients_hash = get_patients_persistent_hash(txm_event)
 
     pairing_result_model = PairingResultModel(
-        score_matrix=score_matrix_to_dict(pairing_result.score_matrix),
+        score_matrix_npy=score_matrix_to_bytes(pairing_result.score_matrix),
         calculated_matchings=calculated_matchings_model,
         original_config_id=original_config_id,
         patients_hash=patients_hash,
+        config_fingerprint=config_fingerprint,
         valid=True
     )
     db.session.add(pairing_result_model)
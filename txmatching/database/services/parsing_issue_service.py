@@ -10,6 +10,8 @@ from txmatching.data_transfer_objects.hla.parsing_issue_dto import (
 from txmatching.data_transfer_objects.patients.utils import \
     parsing_issue_model_to_parsing_issue
 from txmatching.database.db import db
+from txmatching.database.services.txm_event_cache import \
+    increase_patients_revision
 from txmatching.database.sql_alchemy_schema import ParsingIssueModel
 from txmatching.utils.hla_system.hla_transformations.parsing_issue_detail import \
     WARNING_PROCESSING_RESULTS
@@ -30,6 +32,7 @@ def confirm_a_parsing_issue(user_id: int, parsing_issue_id: int,
 
     parsing_issue.confirmed_by = user_id
     parsing_issue.confirmed_at = datetime.now()
+    increase_patients_revision(txm_event_id)
 
     db.session.commit()
     return parsing_issue_model_to_parsing_issue(parsing_issue)
@@ -49,6 +52,7 @@ def unconfirm_a_parsing_issue(parsing_issue_id: int, txm_event_id: int) -> Parsi
 
     parsing_issue.confirmed_by = None
     parsing_issue.confirmed_at = None
+    increase_patients_revision(txm_event_id)
 
     db.session.commit()
     return parsing_issue_model_to_parsing_issue(parsing_issue)
@@ -1,13 +1,18 @@
 import dataclasses
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from typing import List, Optional, Tuple, Union
+from typing import Callable, Iterable, List, Optional, Tuple, Union
 
 import dacite
+from sqlalchemy import or_
 
 from txmatching.auth.exceptions import (InvalidArgumentException,
                                         OverridingException)
-from txmatching.data_transfer_objects.hla.parsing_issue_dto import ParsingIssue
+from txmatching.data_transfer_objects.hla.parsing_issue_dto import (
+    ParsingIssue, ParsingIssueBase)
 from txmatching.data_transfer_objects.patients.hla_antibodies_dto import \
     HLAAntibodiesDTO
 from txmatching.data_transfer_objects.patients.patient_parameters_dto import (
@@ -26,9 +31,11 @@ from txmatching.database.services.parsing_issue_service import (
     delete_parsing_issues_for_patient, delete_parsing_issues_for_txm_event_id,
     get_parsing_issues_for_txm_event_id, parsing_issues_bases_to_models)
 from txmatching.database.services.parsing_utils import parse_date_to_datetime
+from txmatching.database.services.txm_event_cache import \
+    increase_patients_revision
 from txmatching.database.sql_alchemy_schema import (
-    DonorModel, HLAAntibodyRawModel, RecipientAcceptableBloodModel,
-    RecipientModel)
+    DonorModel, HLAAntibodyRawModel, ParsingIssueModel,
+    RecipientAcceptableBloodModel, RecipientModel, TxmEventModel)
 from txmatching.patients.hla_model import (HLAAntibodies, HLAAntibodyRaw,
                                            HLATypeRaw, HLATyping)
 from txmatching.patients.patient import (Donor, Patient, Recipient,
@@ -43,6 +50,10 @@ from txmatching.utils.persistent_hash import (get_hash_digest,
 
 logger = logging.getLogger(__name__)
 
+# parsing of smaller txm events takes less time than starting the processes
+_MIN_PATIENTS_FOR_PARALLEL_PARSING = 1000
+_PARSING_CHUNK_SIZE = 100
+
 
 def get_donor_from_donor_model(donor_model: DonorModel) -> Donor:
     base_patient = _get_base_patient_from_patient_model(donor_model)
@@ -59,9 +70,14 @@ def get_donor_from_donor_model(donor_model: DonorModel) -> Donor:
                  )
 
 
-def get_recipient_from_recipient_model(recipient_model: RecipientModel) -> Recipient:
-    related_donors_db_ids = [donor.id for donor in DonorModel.query.filter(
-        DonorModel.recipient_id == recipient_model.id).all()]
+def get_recipient_from_recipient_model(recipient_model: RecipientModel,
+                                      related_donors_db_ids: Optional[List[int]] = None) -> Recipient:
+    """
+    :param related_donors_db_ids: ids of the donors of the recipient, queried from the db if not provided
+    """
+    if related_donors_db_ids is None:
+        related_donors_db_ids = [donor.id for donor in DonorModel.query.filter(
+            DonorModel.recipient_id == recipient_model.id).all()]
     base_patient = _get_base_patient_from_patient_model(recipient_model)
 
     recipient = Recipient(base_patient.db_id,
@@ -243,6 +259,8 @@ def update_recipient(recipient_update_dto: RecipientUpdateDTO, txm_event_db_id:
     recipient_update_dict['previous_transplants'] = recipient_update_dto.previous_transplants
 
     RecipientModel.query.filter(RecipientModel.id == recipient_update_dto.db_id).update(recipient_update_dict)
+    update_patients_persistent_hashes(donor_models=[], recipient_models=[old_recipient_model])
+    increase_patients_revision(txm_event_db_id)
     db.session.commit()
     return get_recipient_from_recipient_model(
         RecipientModel.query.get(recipient_update_dto.db_id))
@@ -268,13 +286,24 @@ def update_donor(donor_update_dto: DonorUpdateDTO, txm_event_db_id: int) -> Dono
     if donor_update_dto.active is not None:
         donor_update_dict['active'] = donor_update_dto.active
     DonorModel.query.filter(DonorModel.id == donor_update_dto.db_id).update(donor_update_dict)
+    update_patients_persistent_hashes(donor_models=[old_donor_model], recipient_models=[])
+    increase_patients_revision(txm_event_db_id)
     db.session.commit()
     return get_donor_from_donor_model(DonorModel.query.get(donor_update_dto.db_id))
 
 
 def recompute_hla_and_antibodies_parsing_for_all_patients_in_txm_event(
-        txm_event_id: int
+        txm_event_id: int,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        max_workers: Optional[int] = None
 ) -> PatientsRecomputeParsingSuccessDTOOut:
+    """
+    Parses again HLA typing of all patients and HLA antibodies of all recipients of the txm event and replaces
+    the parsed values and the parsing issues in the db. Large events are parsed in a pool of processes, the db is
+    updated by bulk statements in a single transaction.
+    :param progress_callback: called with the fraction (between 0 and 1) of the patients that were parsed
+    :param max_workers: maximal number of processes parsing the patients, defaults to the number of CPUs
+    """
     result = PatientsRecomputeParsingSuccessDTOOut(
         patients_checked_antigens=0,
         patients_changed_antigens=0,
@@ -286,50 +315,53 @@ def recompute_hla_and_antibodies_parsing_for_all_patients_in_txm_event(
     delete_parsing_issues_for_txm_event_id(txm_event_id)
 
     # Get donors and recipients
-    donor_models = DonorModel.query.filter(DonorModel.txm_event_id == txm_event_id).all()
-    recipient_models = RecipientModel.query.filter(RecipientModel.txm_event_id == txm_event_id).all()
-
-    # Update hla_typing for donors and recipients
-    for patient_model in donor_models + recipient_models:
-        hla_typing_raw = dacite.from_dict(data_class=HLATypingRawDTO, data=patient_model.hla_typing_raw)
-        patient_parsing_issues, hla_typing = parse_hla_typing_raw_and_return_parsing_issue_list(hla_typing_raw)
-        if patient_model in donor_models:
-            new_parsing_issues = parsing_issues_bases_to_models(parsing_issues_temp=patient_parsing_issues,
-                                                                donor_id=patient_model.id,
-                                                                txm_event_id=patient_model.txm_event_id)
-        else:
-            new_parsing_issues = parsing_issues_bases_to_models(parsing_issues_temp=patient_parsing_issues,
-                                                                recipient_id=patient_model.id,
-                                                                txm_event_id=patient_model.txm_event_id)
-        db.session.add_all(new_parsing_issues)
-        patient_model.parsing_issues = new_parsing_issues
-        new_hla_typing = dataclasses.asdict(hla_typing)
-
-        if new_hla_typing != patient_model.hla_typing:
-            logger.debug(f'Updating hla_typing of {patient_model}:')
-            patient_model.hla_typing = new_hla_typing
-            result.patients_changed_antigens += 1
+    patients_hla_raw = _get_patients_hla_raw(txm_event_id)
+    patients_hla_parsed = _parse_patients_hla(patients_hla_raw, progress_callback, max_workers)
 
+    donor_updates = []
+    recipient_updates = []
+    parsing_issues = []
+    for patient_hla_raw, patient_hla_parsed in zip(patients_hla_raw, patients_hla_parsed):
+        patient_update = {'id': patient_hla_raw.db_id}
+        patient_id_key = 'donor_id' if patient_hla_raw.is_donor else 'recipient_id'
+        parsing_issues.extend({patient_id_key: patient_hla_raw.db_id, 'txm_event_id': txm_event_id,
+                               **dataclasses.asdict(parsing_issue)}
+                              for parsing_issue in patient_hla_parsed.parsing_issues)
+
+        if patient_hla_parsed.hla_typing != patient_hla_raw.hla_typing:
+            logger.debug(f'Updating hla_typing of {"donor" if patient_hla_raw.is_donor else "recipient"} '
+                         f'{patient_hla_raw.db_id}')
+            patient_update['hla_typing'] = patient_hla_parsed.hla_typing
+            result.patients_changed_antigens += 1
         result.patients_checked_antigens += 1
 
-    # Update hla_antibodies for recipients
-    for recipient_model in recipient_models:
-        hla_antibodies_raw = recipient_model.hla_antibodies_raw
-        patient_parsing_issues, hla_antibodies = parse_hla_antibodies_raw_and_return_parsing_issue_list(
-            hla_antibodies_raw)
-        new_parsing_issues = parsing_issues_bases_to_models(parsing_issues_temp=patient_parsing_issues,
-                                                            recipient_id=recipient_model.id,
-                                                            txm_event_id=recipient_model.txm_event_id)
-        new_hla_antibodies = dataclasses.asdict(hla_antibodies)
-        db.session.add_all(new_parsing_issues)
-        recipient_model.parsing_issues = recipient_model.parsing_issues + new_parsing_issues
-        if new_hla_antibodies != recipient_model.hla_antibodies:
-            logger.debug(f'Updating hla_antibodies of {recipient_model}:')
-            recipient_model.hla_antibodies = new_hla_antibodies
-            result.patients_changed_antibodies += 1
-
-        result.patients_checked_antibodies += 1
-
+        if not patient_hla_raw.is_donor:
+            if patient_hla_parsed.hla_antibodies != patient_hla_raw.hla_antibodies:
+                logger.debug(f'Updating hla_antibodies of recipient {patient_hla_raw.db_id}')
+                patient_update['hla_antibodies'] = patient_hla_parsed.hla_antibodies
+                result.patients_changed_antibodies += 1
+            result.patients_checked_antibodies += 1
+
+        if len(patient_update) > 1:
+            (donor_updates if patient_hla_raw.is_donor else recipient_updates).append(patient_update)
+
+    db.session.bulk_update_mappings(DonorModel, donor_updates)
+    db.session.bulk_update_mappings(RecipientModel, recipient_updates)
+    db.session.bulk_insert_mappings(ParsingIssueModel, parsing_issues)
+    # the hashes missing in the rows created before they were stored are filled in as well
+    update_patients_persistent_hashes(
+        donor_models=DonorModel.query.filter(
+            DonorModel.txm_event_id == txm_event_id,
+            or_(DonorModel.id.in_([donor_update['id'] for donor_update in donor_updates]),
+                DonorModel.persistent_hash.is_(None))
+        ).all(),
+        recipient_models=RecipientModel.query.filter(
+            RecipientModel.txm_event_id == txm_event_id,
+            or_(RecipientModel.id.in_([recipient_update['id'] for recipient_update in recipient_updates]),
+                RecipientModel.persistent_hash.is_(None))
+        ).all()
+    )
+    increase_patients_revision(txm_event_id)
     db.session.commit()
 
     # Get parsing issues
@@ -338,28 +370,156 @@ def recompute_hla_and_antibodies_parsing_for_all_patients_in_txm_event(
     return result
 
 
-def get_patients_persistent_hash(txm_event: TxmEvent) -> int:
-    donors = tuple(txm_event.active_and_valid_donors_dict.values())
-    recipients = tuple(txm_event.active_and_valid_recipients_dict.values())
+def recompute_hla_and_antibodies_parsing_for_all_txm_events(max_workers: Optional[int] = None):
+    txm_event_ids = [txm_event_id for txm_event_id, in db.session.query(TxmEventModel.id).order_by(TxmEventModel.id)]
+    for txm_event_number, txm_event_id in enumerate(txm_event_ids, start=1):
+        logger.info(f'Recomputing parsing of txm event {txm_event_id} ({txm_event_number}/{len(txm_event_ids)})')
+        result = recompute_hla_and_antibodies_parsing_for_all_patients_in_txm_event(
+            txm_event_id,
+            progress_callback=lambda progress, txm_event_id=txm_event_id: logger.info(
+                f'Txm event {txm_event_id}: {progress:.0%} of patients parsed'),
+            max_workers=max_workers
+        )
+        logger.info(f'Recomputed parsing of txm event {txm_event_id}: '
+                    f'{result.patients_changed_antigens}/{result.patients_checked_antigens} patients with changed '
+                    f'antigens, {result.patients_changed_antibodies}/{result.patients_checked_antibodies} '
+                    f'with changed antibodies, {len(result.parsing_issues)} parsing issues')
+
+
+@dataclasses.dataclass
+class _PatientHLARaw:
+    db_id: int
+    is_donor: bool
+    hla_typing_raw: dict
+    # parsed values currently stored in the db, antibodies are None for donors
+    hla_typing: dict
+    hla_antibodies: Optional[dict] = None
+    hla_antibodies_raw: Optional[List[Tuple[str, int, int]]] = None
+
+
+@dataclasses.dataclass
+class _PatientHLAParsed:
+    hla_typing: dict
+    hla_antibodies: Optional[dict]
+    parsing_issues: List[ParsingIssueBase]
+
+
+def _get_patients_hla_raw(txm_event_id: int) -> List[_PatientHLARaw]:
+    """
+    Loads only the columns needed for the parsing, antibodies of all recipients are loaded by a single query.
+    """
+    hla_antibodies_raw_per_recipient = {}
+    for recipient_id, raw_code, mfi, cutoff in db.session.query(
+            HLAAntibodyRawModel.recipient_id, HLAAntibodyRawModel.raw_code, HLAAntibodyRawModel.mfi,
+            HLAAntibodyRawModel.cutoff
+    ).join(RecipientModel).filter(RecipientModel.txm_event_id == txm_event_id).order_by(HLAAntibodyRawModel.id):
+        hla_antibodies_raw_per_recipient.setdefault(recipient_id, []).append((raw_code, mfi, cutoff))
+
+    donors = [
+        _PatientHLARaw(db_id=donor_id, is_donor=True, hla_typing_raw=hla_typing_raw, hla_typing=hla_typing)
+        for donor_id, hla_typing_raw, hla_typing in db.session.query(
+            DonorModel.id, DonorModel.hla_typing_raw, DonorModel.hla_typing
+        ).filter(DonorModel.txm_event_id == txm_event_id).order_by(DonorModel.id)
+    ]
+    recipients = [
+        _PatientHLARaw(db_id=recipient_id, is_donor=False, hla_typing_raw=hla_typing_raw, hla_typing=hla_typing,
+                       hla_antibodies=hla_antibodies,
+                       hla_antibodies_raw=hla_antibodies_raw_per_recipient.get(recipient_id, []))
+        for recipient_id, hla_typing_raw, hla_typing, hla_antibodies in db.session.query(
+            RecipientModel.id, RecipientModel.hla_typing_raw, RecipientModel.hla_typing, RecipientModel.hla_antibodies
+        ).filter(RecipientModel.txm_event_id == txm_event_id).order_by(RecipientModel.id)
+    ]
+    return donors + recipients
 
-    hash_ = initialize_persistent_hash()
-    update_persistent_hash(hash_, donors)
-    update_persistent_hash(hash_, recipients)
-    hash_digest = get_hash_digest(hash_)
 
-    return hash_digest
+def _parse_patients_hla(patients_hla_raw: List[_PatientHLARaw],
+                        progress_callback: Optional[Callable[[float], None]],
+                        max_workers: Optional[int]) -> List[_PatientHLAParsed]:
+    chunks = [patients_hla_raw[chunk_start:chunk_start + _PARSING_CHUNK_SIZE]
+              for chunk_start in range(0, len(patients_hla_raw), _PARSING_CHUNK_SIZE)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+
+    if len(patients_hla_raw) < _MIN_PATIENTS_FOR_PARALLEL_PARSING or max_workers <= 1:
+        return _collect_parsed_chunks(map(_parse_patients_hla_chunk, chunks), len(patients_hla_raw),
+                                      progress_callback)
+    # spawn instead of fork, the db connections and threads of the parent must not be copied
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return _collect_parsed_chunks(executor.map(_parse_patients_hla_chunk, chunks), len(patients_hla_raw),
+                                      progress_callback)
+
+
+def _collect_parsed_chunks(chunks_parsed: Iterable[List[_PatientHLAParsed]],
+                           patients_count: int,
+                           progress_callback: Optional[Callable[[float], None]]) -> List[_PatientHLAParsed]:
+    patients_hla_parsed = []
+    for chunk_parsed in chunks_parsed:
+        patients_hla_parsed.extend(chunk_parsed)
+        if progress_callback is not None:
+            progress_callback(len(patients_hla_parsed) / patients_count)
+    return patients_hla_parsed
+
+
+def _parse_patients_hla_chunk(patients_hla_raw: List[_PatientHLARaw]) -> List[_PatientHLAParsed]:
+    return [_parse_patient_hla(patient_hla_raw) for patient_hla_raw in patients_hla_raw]
+
+
+def _parse_patient_hla(patient_hla_raw: _PatientHLARaw) -> _PatientHLAParsed:
+    hla_typing_raw = dacite.from_dict(data_class=HLATypingRawDTO, data=patient_hla_raw.hla_typing_raw)
+    parsing_issues, hla_typing = parse_hla_typing_raw_and_return_parsing_issue_list(hla_typing_raw)
+
+    hla_antibodies = None
+    if not patient_hla_raw.is_donor:
+        antibodies_parsing_issues, hla_antibodies_dto = parse_hla_antibodies_raw_and_return_parsing_issue_list([
+            HLAAntibodyRawModel(raw_code=raw_code, mfi=mfi, cutoff=cutoff)
+            for raw_code, mfi, cutoff in patient_hla_raw.hla_antibodies_raw
+        ])
+        parsing_issues = parsing_issues + antibodies_parsing_issues
+        hla_antibodies = dataclasses.asdict(hla_antibodies_dto)
+
+    return _PatientHLAParsed(hla_typing=dataclasses.asdict(hla_typing), hla_antibodies=hla_antibodies,
+                             parsing_issues=parsing_issues)
+
+
+def get_patients_persistent_hash(txm_event: TxmEvent) -> int:
+    """
+    Persistent hash of the active and valid patients, it does not depend on the order of the patients. The hash
+    combined from the hashes stored with the patients is used if the txm event was loaded from the db.
+    """
+    if txm_event.patients_hash is not None:
+        return txm_event.patients_hash
+    return combine_patients_persistent_hashes(
+        donors_hashes=[donor.persistent_hash() for donor in txm_event.active_and_valid_donors_dict.values()],
+        recipients_hashes=[recipient.persistent_hash()
+                           for recipient in txm_event.active_and_valid_recipients_dict.values()]
+    )
 
 
 def get_all_patients_persistent_hash(txm_event: TxmEvent) -> int:
-    donors = tuple(txm_event.all_donors)
-    recipients = tuple(txm_event.all_recipients)
+    return combine_patients_persistent_hashes(
+        donors_hashes=[donor.persistent_hash() for donor in txm_event.all_donors],
+        recipients_hashes=[recipient.persistent_hash() for recipient in txm_event.all_recipients]
+    )
 
-    hash_ = initialize_persistent_hash()
-    update_persistent_hash(hash_, donors)
-    update_persistent_hash(hash_, recipients)
-    hash_digest = get_hash_digest(hash_)
 
-    return hash_digest
+def combine_patients_persistent_hashes(donors_hashes: Iterable[int], recipients_hashes: Iterable[int]) -> int:
+    hash_ = initialize_persistent_hash()
+    update_persistent_hash(hash_, sorted(donors_hashes))
+    update_persistent_hash(hash_, sorted(recipients_hashes))
+    return get_hash_digest(hash_)
+
+
+def update_patients_persistent_hashes(donor_models: Iterable[DonorModel], recipient_models: Iterable[RecipientModel]):
+    """
+    Stores the persistent hashes of the patients with them. Has to be called whenever the data of the patients are
+    changed (or related donors of a recipient), the hashes are computed from the patients reloaded from the db.
+    """
+    db.session.flush()
+    for donor_model in donor_models:
+        db.session.expire(donor_model)
+        donor_model.persistent_hash = get_donor_from_donor_model(donor_model).persistent_hash()
+    for recipient_model in recipient_models:
+        db.session.expire(recipient_model)
+        recipient_model.persistent_hash = get_recipient_from_recipient_model(recipient_model).persistent_hash()
 
 
 def _get_base_patient_from_patient_model(patient_model: Union[DonorModel, RecipientModel]) -> Patient:
@@ -408,7 +568,12 @@ def delete_donor_recipient_pair(donor_id: int, txm_event_id: int):
             len(maybe_recipient.related_donors_db_ids) == 1):
         delete_parsing_issues_for_patient(recipient_id=maybe_recipient.db_id, txm_event_id=txm_event_id)
         RecipientModel.query.filter(RecipientModel.id == maybe_recipient.db_id).delete()
+    elif maybe_recipient is not None:
+        # the related donors of the recipient are part of its hash
+        update_patients_persistent_hashes(donor_models=[],
+                                          recipient_models=[RecipientModel.query.get(maybe_recipient.db_id)])
 
+    increase_patients_revision(txm_event_id)
     db.session.commit()
 
 
@@ -24,8 +24,10 @@ from txmatching.database.services.parsing_issue_service import (
     get_parsing_issues_for_patients, parsing_issues_bases_to_models)
 from txmatching.database.services.parsing_utils import (
     check_existing_ids_for_duplicates, parse_date_to_datetime)
-from txmatching.database.services.patient_service import \
-    get_hla_antibodies_from_recipient_model
+from txmatching.database.services.patient_service import (
+    get_hla_antibodies_from_recipient_model, update_patients_persistent_hashes)
+from txmatching.database.services.txm_event_cache import \
+    increase_patients_revision
 from txmatching.database.services.txm_event_service import (
     get_txm_event_complete, get_txm_event_db_id_by_name,
     remove_donors_and_recipients_from_txm_event_for_country)
@@ -246,6 +248,7 @@ def _add_patients_from_one_country(
         country_code: Country,
         txm_event_db_id: int
 ) -> Tuple[List[DonorModel], List[RecipientModel]]:
+    increase_patients_revision(txm_event_db_id)
     txm_event = get_txm_event_complete(txm_event_db_id)
 
     check_existing_ids_for_duplicates(txm_event, donors, recipients)
@@ -268,5 +271,6 @@ def _add_patients_from_one_country(
         for donor in donors
     ]
     db.session.add_all(donor_models)
+    update_patients_persistent_hashes(donor_models, recipient_models)
 
     return (donor_models, recipient_models)
@@ -0,0 +1,57 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from txmatching.database.db import db
+from txmatching.database.services.scorer_service import (
+    score_matrix_from_bytes, score_matrix_to_bytes)
+from txmatching.database.sql_alchemy_schema import ScoreMatrixSnapshotModel
+from txmatching.patients.patient_types import DonorDbId, RecipientDbId
+from txmatching.scorers.score_matrix_snapshot import (ScoreMatrixSnapshot,
+                                                      ScoreMatrixSnapshotStore)
+
+logger = logging.getLogger(__name__)
+
+
+class DbScoreMatrixSnapshotStore(ScoreMatrixSnapshotStore):
+    """
+    Score matrix snapshots of the txm event stored in the database, one for each scorer key.
+    """
+
+    def __init__(self,
+                 txm_event_id: int,
+                 donors_persistent_hashes: Optional[Dict[DonorDbId, int]] = None,
+                 recipients_persistent_hashes: Optional[Dict[RecipientDbId, int]] = None):
+        super().__init__(donors_persistent_hashes, recipients_persistent_hashes)
+        self._txm_event_id = txm_event_id
+
+    def load(self, scorer_key: int) -> Optional[ScoreMatrixSnapshot]:
+        snapshot_model = ScoreMatrixSnapshotModel.query.get((self._txm_event_id, scorer_key))
+        if snapshot_model is None:
+            return None
+        return ScoreMatrixSnapshot(donor_hashes=snapshot_model.donor_hashes,
+                                   recipient_hashes=snapshot_model.recipient_hashes,
+                                   score_matrix=score_matrix_from_bytes(snapshot_model.score_matrix_npy))
+
+    def save(self, scorer_key: int, snapshot: ScoreMatrixSnapshot):
+        values = {
+            'txm_event_id': self._txm_event_id,
+            'scorer_key': scorer_key,
+            'donor_hashes': snapshot.donor_hashes,
+            'recipient_hashes': snapshot.recipient_hashes,
+            'score_matrix_npy': score_matrix_to_bytes(snapshot.score_matrix)
+        }
+        # the snapshot might have been saved by another solve in the meantime, the last one wins
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+        statement = insert(ScoreMatrixSnapshotModel).values(values)
+        # saved on a separate connection and committed right away, the session of the solve is not committed
+        # in the middle of the solve
+        with db.engine.begin() as connection:
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[ScoreMatrixSnapshotModel.txm_event_id, ScoreMatrixSnapshotModel.scorer_key],
+                set_={column: statement.excluded[column]
+                      for column in ['donor_hashes', 'recipient_hashes', 'score_matrix_npy']}
+            ))
+        logger.debug(f'Saved {len(snapshot.donor_hashes)}x{len(snapshot.recipient_hashes)} score matrix snapshot '
+                     f'of txm event {self._txm_event_id}')
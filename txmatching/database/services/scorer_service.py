@@ -1,28 +1,62 @@
-import dataclasses
+import io
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+import numpy as np
 from dacite import from_dict
 
 from txmatching.data_transfer_objects.matchings.matchings_model import \
     MatchingsModel
 from txmatching.scorers.additive_scorer import ScoreMatrix
 
+_SCORE_MATRIX_DTYPE = np.dtype('<f8')
+
 
 @dataclass
 class ScoreMatrixDto:
     score_matrix_dto: List[List[float]]
 
 
-def score_matrix_to_dict(score_matrix: ScoreMatrix) -> Dict[str, List[List[float]]]:
-    return dataclasses.asdict(ScoreMatrixDto(score_matrix.tolist()))
-
-
 def score_matrix_from_dict(score_matrix_dict: Dict[str, List[List[float]]]) -> List[List[float]]:
     score_matrix_dto = from_dict(data_class=ScoreMatrixDto, data=score_matrix_dict)
     return score_matrix_dto.score_matrix_dto
 
 
+def score_matrix_to_bytes(score_matrix: ScoreMatrix) -> bytes:
+    """
+    Serializes the score matrix to .npy format (little-endian float64, so that the scores are kept exactly).
+    """
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(score_matrix, dtype=_SCORE_MATRIX_DTYPE), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def score_matrix_from_bytes(score_matrix_bytes: bytes) -> ScoreMatrix:
+    """
+    Deserializes the score matrix from .npy format. The returned array is read-only as it shares the memory
+    with the bytes.
+    """
+    buffer = io.BytesIO(score_matrix_bytes)
+    version = np.lib.format.read_magic(buffer)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(buffer)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(buffer)
+    return np.frombuffer(score_matrix_bytes, dtype=dtype, count=int(np.prod(shape)), offset=buffer.tell()).reshape(
+        shape, order='F' if fortran_order else 'C')
+
+
+def stored_score_matrix_to_array(score_matrix_npy: Optional[bytes],
+                                 score_matrix_dict: Optional[Dict[str, List[List[float]]]]) -> ScoreMatrix:
+    """
+    Reads the score matrix stored in pairing result, pairing results created before the .npy format was added
+    have the score matrix in json.
+    """
+    if score_matrix_npy is not None:
+        return score_matrix_from_bytes(score_matrix_npy)
+    return np.array(score_matrix_from_dict(score_matrix_dict), dtype=_SCORE_MATRIX_DTYPE)
+
+
 def matchings_model_from_dict(calculated_matchings_dict: Dict[str, any]) -> MatchingsModel:
     return from_dict(data_class=MatchingsModel,
                      data=calculated_matchings_dict)
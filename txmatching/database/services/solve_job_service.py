@@ -0,0 +1,195 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from txmatching.auth.exceptions import (NotFoundException,
+                                        SolverAlreadyRunningException)
+from txmatching.configuration.configuration import Configuration
+from txmatching.data_transfer_objects.matchings.solve_job_dto import \
+    SolveJobDTOOut
+from txmatching.database.db import db
+from txmatching.database.services.config_service import \
+    configuration_from_config_model
+from txmatching.database.services.pairing_result_service import \
+    get_pairing_result_comparable_to_config_or_solve
+from txmatching.database.services.txm_event_service import \
+    get_txm_event_complete
+from txmatching.database.sql_alchemy_schema import ConfigModel, SolveJobModel
+from txmatching.patients.patient import TxmEvent
+from txmatching.utils.enums import SolveJobStatus
+
+logger = logging.getLogger(__name__)
+
+# running solve job whose worker did not report for this long is considered abandoned (the worker crashed or was
+# stopped) and is queued again
+SOLVE_JOB_LEASE_SECONDS = 120
+# period in which the worker reports the progress of the running solve job, which also renews its lease
+SOLVE_JOB_HEARTBEAT_SECONDS = 5.0
+
+
+def create_solve_job(configuration: Configuration, txm_event: TxmEvent, user_id: int) -> SolveJobModel:
+    """
+    Enqueues solving of the configuration for the txm event. If the configuration is already queued or being solved,
+    the existing solve job is returned instead.
+    """
+    active_solve_job_model = SolveJobModel.query.filter(
+        SolveJobModel.txm_event_id == txm_event.db_id,
+        SolveJobModel.config_id == configuration.id,
+        SolveJobModel.status.in_([SolveJobStatus.QUEUED, SolveJobStatus.RUNNING])
+    ).order_by(SolveJobModel.id).first()
+    if active_solve_job_model is not None:
+        return active_solve_job_model
+
+    solve_job_model = SolveJobModel(
+        txm_event_id=txm_event.db_id,
+        config_id=configuration.id,
+        created_by=user_id,
+        status=SolveJobStatus.QUEUED,
+        progress=0.0
+    )
+    db.session.add(solve_job_model)
+    db.session.commit()
+    logger.info(f'Solve job {solve_job_model.id} for configuration {configuration.id} created')
+    return solve_job_model
+
+
+def get_solve_job(solve_job_id: int, txm_event_id: int) -> SolveJobModel:
+    solve_job_model = SolveJobModel.query.get(solve_job_id)
+    if solve_job_model is None or solve_job_model.txm_event_id != txm_event_id:
+        raise NotFoundException(f'Solve job with id {solve_job_id} not found in txm event {txm_event_id}.')
+    return solve_job_model
+
+
+def solve_job_model_to_dto(solve_job_model: SolveJobModel) -> SolveJobDTOOut:
+    return SolveJobDTOOut(
+        id=solve_job_model.id,
+        status=solve_job_model.status,
+        progress=solve_job_model.progress,
+        config_id=solve_job_model.config_id,
+        pairing_result_id=solve_job_model.pairing_result_id,
+        error_message=solve_job_model.error_message
+    )
+
+
+def run_next_solve_job() -> bool:
+    """
+    Claims the oldest queued solve job and runs it. Only one worker can claim the job (rows locked by other workers
+    are skipped), the job is then marked as running and the worker keeps renewing its lease while solving. Running jobs
+    whose lease expired are queued again. A job is queued again also if all the solve slots of its txm event are
+    occupied.
+
+    Returns False if there was no queued job that could be run.
+    """
+    _requeue_abandoned_solve_jobs()
+    # the jobs that were queued again are tried after the others
+    solve_job_model = SolveJobModel.query.filter(
+        SolveJobModel.status == SolveJobStatus.QUEUED
+    ).order_by(SolveJobModel.updated_at, SolveJobModel.id).with_for_update(skip_locked=True).first()
+    if solve_job_model is None:
+        # release the transaction so that the next poll sees new jobs
+        db.session.commit()
+        return False
+
+    solve_job_id = solve_job_model.id
+    solve_job_model.status = SolveJobStatus.RUNNING
+    db.session.commit()
+    logger.info(f'Running solve job {solve_job_id}')
+    try:
+        return _run_solve_job(solve_job_id, solve_job_model.txm_event_id, solve_job_model.config_id)
+    except BaseException:
+        # the worker is being stopped (see stop_solve_job_workers), the job is left to another worker
+        db.session.rollback()
+        _update_solve_job(solve_job_id, status=SolveJobStatus.QUEUED, progress=0.0)
+        raise
+
+
+def _requeue_abandoned_solve_jobs():
+    lease_expired_before = datetime.now(timezone.utc) - timedelta(seconds=SOLVE_JOB_LEASE_SECONDS)
+    requeued_jobs_count = SolveJobModel.query.filter(
+        SolveJobModel.status == SolveJobStatus.RUNNING,
+        SolveJobModel.updated_at < lease_expired_before
+    ).update({SolveJobModel.status: SolveJobStatus.QUEUED, SolveJobModel.progress: 0.0}, synchronize_session=False)
+    if requeued_jobs_count > 0:
+        logger.warning(f'{requeued_jobs_count} abandoned solve jobs were queued again')
+        db.session.commit()
+
+
+def _run_solve_job(solve_job_id: int, txm_event_id: int, config_id: int) -> bool:
+    # pylint: disable=broad-except
+    # the job has to be marked as failed whatever goes wrong, otherwise it would stay running until its lease expires
+    try:
+        txm_event = get_txm_event_complete(txm_event_id)
+        configuration = configuration_from_config_model(ConfigModel.query.get(config_id))
+        with _SolveJobHeartbeat(solve_job_id, db.engine) as heartbeat:
+            pairing_result_model = get_pairing_result_comparable_to_config_or_solve(
+                configuration,
+                txm_event,
+                progress_callback=heartbeat.set_progress
+            )
+    except SolverAlreadyRunningException:
+        logger.info(f'Solve job {solve_job_id} was queued again, another solve of its txm event is running')
+        db.session.rollback()
+        _update_solve_job(solve_job_id, status=SolveJobStatus.QUEUED, progress=0.0)
+        return False
+    except Exception as error:
+        logger.exception(f'Solve job {solve_job_id} failed')
+        db.session.rollback()
+        _update_solve_job(solve_job_id, status=SolveJobStatus.FAILED, error_message=str(error))
+        return True
+    # pylint: enable=broad-except
+
+    _update_solve_job(solve_job_id, status=SolveJobStatus.FINISHED, progress=1.0,
+                      pairing_result_id=pairing_result_model.id)
+    logger.info(f'Solve job {solve_job_id} finished with pairing result {pairing_result_model.id}')
+    return True
+
+
+def _update_solve_job(solve_job_id: int, **values):
+    SolveJobModel.query.filter(SolveJobModel.id == solve_job_id).update(values)
+    db.session.commit()
+
+
+class _SolveJobHeartbeat:
+    """
+    Periodically stores the progress of the running solve job (which renews its lease) from a background thread.
+    It uses its own connection, so the session of the solve is not committed in the middle of the solve.
+    """
+
+    def __init__(self, solve_job_id: int, engine: Engine, period_seconds: float = SOLVE_JOB_HEARTBEAT_SECONDS):
+        self._solve_job_id = solve_job_id
+        self._engine = engine
+        self._period_seconds = period_seconds
+        self._progress = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'solve-job-{solve_job_id}-heartbeat', daemon=True)
+
+    def __enter__(self) -> '_SolveJobHeartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def set_progress(self, progress: float):
+        self._progress = progress
+
+    def _run(self):
+        while not self._stopped.wait(self._period_seconds):
+            self.report()
+
+    def report(self):
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(update(SolveJobModel.__table__).where(
+                    SolveJobModel.id == self._solve_job_id
+                ).where(
+                    SolveJobModel.status == SolveJobStatus.RUNNING
+                ).values(progress=self._progress, updated_at=func.now()))
+        except SQLAlchemyError:
+            # the lease is renewed by the next report, or the job is run again if the database is unavailable
+            logger.exception(f'Progress of solve job {self._solve_job_id} could not be stored')
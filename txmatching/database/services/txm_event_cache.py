@@ -0,0 +1,133 @@
+import logging
+import pickle
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, OrderedDict, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from txmatching.database.db import db
+from txmatching.database.sql_alchemy_schema import TxmEventModel
+from txmatching.patients.patient import TxmEvent
+from txmatching.utils.cache_statistics import CacheStatistics
+
+logger = logging.getLogger(__name__)
+
+# number of txm events kept in memory by each worker, events loaded with and without raw antibodies count separately
+TXM_EVENT_CACHE_SIZE = 8
+
+# session info key of the ids of the txm events whose patients were changed in the current transaction
+_CHANGED_TXM_EVENT_IDS = 'changed_txm_event_ids'
+
+# (txm event id, load_antibodies_raw)
+_CacheKey = Tuple[int, bool]
+# (name, default config id, patients revision) of the txm event
+_TxmEventVersion = Tuple[str, Optional[int], int]
+
+
+@dataclass
+class _CachedTxmEvent:
+    version: _TxmEventVersion
+    txm_event: TxmEvent
+
+
+class TxmEventCache:
+    """
+    LRU cache of the complete txm events loaded by this worker. A cached txm event is used as long as its patients
+    revision (see increase_patients_revision) and the other loaded columns stay the same in the database, so that
+    its validity is checked by a single query. The cached txm events are shared, they must not be modified.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._cached_txm_events: OrderedDict[_CacheKey, _CachedTxmEvent] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, txm_event_id: int, load_antibodies_raw: bool, load_txm_event: Callable[[], TxmEvent]) -> TxmEvent:
+        if txm_event_id in db.session.info.get(_CHANGED_TXM_EVENT_IDS, ()):
+            # the patients are changed in the current transaction which might still be rolled back
+            return load_txm_event()
+
+        # the version is read before the txm event is loaded, so that a concurrent change makes the entry outdated
+        version = _get_txm_event_version(txm_event_id)
+        key = (txm_event_id, load_antibodies_raw)
+        with self._lock:
+            cached_txm_event = self._cached_txm_events.get(key)
+            if cached_txm_event is not None and cached_txm_event.version == version:
+                self._cached_txm_events.move_to_end(key)
+                self._hits += 1
+                return cached_txm_event.txm_event
+            self._misses += 1
+
+        txm_event = load_txm_event()
+        if version is not None:
+            self._store(key, _CachedTxmEvent(version=version, txm_event=txm_event))
+        return txm_event
+
+    def invalidate(self, txm_event_id: int):
+        with self._lock:
+            for load_antibodies_raw in (False, True):
+                self._cached_txm_events.pop((txm_event_id, load_antibodies_raw), None)
+
+    def clear(self):
+        with self._lock:
+            self._cached_txm_events.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            hits = self._hits
+            misses = self._misses
+            txm_events = [cached_txm_event.txm_event for cached_txm_event in self._cached_txm_events.values()]
+        # the size of the pickled txm events is an estimate of the memory they take, it is computed only here as
+        # pickling takes a while
+        return CacheStatistics(
+            name='txm_event',
+            hits=hits,
+            misses=misses,
+            size=len(txm_events),
+            max_size=self._max_size,
+            memory_size=sum(len(pickle.dumps(txm_event)) for txm_event in txm_events)
+        )
+
+    def _store(self, key: _CacheKey, cached_txm_event: _CachedTxmEvent):
+        with self._lock:
+            self._cached_txm_events[key] = cached_txm_event
+            self._cached_txm_events.move_to_end(key)
+            while len(self._cached_txm_events) > self._max_size:
+                evicted_key, _ = self._cached_txm_events.popitem(last=False)
+                logger.debug(f'Evicted TXM event {evicted_key[0]} from the cache')
+
+
+txm_event_cache = TxmEventCache(TXM_EVENT_CACHE_SIZE)
+
+
+def increase_patients_revision(txm_event_id: int):
+    """
+    Has to be called in every transaction that changes the patients of the txm event (including their parsing
+    issues), so that the cached txm event gets reloaded by all the workers.
+    """
+    TxmEventModel.query.filter(TxmEventModel.id == txm_event_id).update(
+        {TxmEventModel.patients_revision: TxmEventModel.patients_revision + 1},
+        synchronize_session=False
+    )
+    db.session.info.setdefault(_CHANGED_TXM_EVENT_IDS, set()).add(txm_event_id)
+
+
+def _get_txm_event_version(txm_event_id: int) -> Optional[_TxmEventVersion]:
+    row = db.session.query(
+        TxmEventModel.name,
+        TxmEventModel.default_config_id,
+        TxmEventModel.patients_revision
+    ).filter(TxmEventModel.id == txm_event_id).first()
+    return tuple(row) if row is not None else None
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_txm_event_ids(session: Session):
+    session.info.pop(_CHANGED_TXM_EVENT_IDS, None)
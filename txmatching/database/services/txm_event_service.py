@@ -14,7 +14,10 @@ from txmatching.database.db import db
 from txmatching.database.services.parsing_issue_service import \
     delete_parsing_issues_for_patient
 from txmatching.database.services.patient_service import (
-    get_donor_from_donor_model, get_recipient_from_recipient_model)
+    combine_patients_persistent_hashes, get_donor_from_donor_model,
+    get_recipient_from_recipient_model)
+from txmatching.database.services.txm_event_cache import (
+    increase_patients_revision, txm_event_cache)
 from txmatching.database.sql_alchemy_schema import (AppUserModel, DonorModel,
                                                     RecipientModel,
                                                     TxmEventModel,
@@ -52,11 +55,13 @@ def delete_txm_event(txm_event_id: int):
     if txm_event_to_be_deleted:
         TxmEventModel.query.filter(TxmEventModel.id == txm_event_id).delete()
         db.session.commit()
+        txm_event_cache.invalidate(txm_event_id)
     else:
         raise InvalidArgumentException(f'No TXM event with id {txm_event_id} found.')
 
 
 def remove_donors_and_recipients_from_txm_event_for_country(txm_event_db_id: int, country_code: Country):
+    increase_patients_revision(txm_event_db_id)
     # Remove parsing issues for patients that will be deleted
     donor_ids = [patient_model.id for patient_model in (
         DonorModel.query.filter(and_(DonorModel.txm_event_id == txm_event_db_id,
@@ -133,17 +138,25 @@ def get_txm_event_complete(txm_event_db_id: int, load_antibodies_raw: bool = Fal
     """
     If load_antibodies_raw is set to False, raw antibodies are not loaded and empty
     lists are returned instead. This is for performance optimization.
+    The txm event is cached by the worker until its patients change (see TxmEventCache), it must not be modified.
     """
+    return txm_event_cache.get(txm_event_db_id, load_antibodies_raw,
+                               lambda: _load_txm_event_complete(txm_event_db_id, load_antibodies_raw))
+
+
+def _load_txm_event_complete(txm_event_db_id: int, load_antibodies_raw: bool) -> TxmEvent:
     logger.debug(f'Starting to eager load data for TXM event {txm_event_db_id} with '
                  f'load_antibodies_raw={load_antibodies_raw}')
-    if load_antibodies_raw:
-        loading_options = joinedload(TxmEventModel.donors)
-    else:
-        loading_options = joinedload(TxmEventModel.donors) \
-            .joinedload(DonorModel.recipient) \
-            .noload(RecipientModel.hla_antibodies_raw)
-
-    maybe_txm_event_model = TxmEventModel.query.options(loading_options).get(txm_event_db_id)
+    # parsing issues of all the patients are loaded by a constant number of queries
+    recipient_loading_option = joinedload(TxmEventModel.donors).joinedload(DonorModel.recipient)
+    loading_options = [
+        joinedload(TxmEventModel.donors).selectinload(DonorModel.parsing_issues),
+        recipient_loading_option.selectinload(RecipientModel.parsing_issues)
+    ]
+    if not load_antibodies_raw:
+        loading_options.append(recipient_loading_option.noload(RecipientModel.hla_antibodies_raw))
+
+    maybe_txm_event_model = TxmEventModel.query.options(*loading_options).get(txm_event_db_id)
     logger.debug('Eager loaded data via sql alchemy')
 
     return _get_txm_event_from_txm_event_model(maybe_txm_event_model)
@@ -168,22 +181,45 @@ def _get_txm_event_from_txm_event_model(txm_event_model: TxmEventModel) -> TxmEv
                         key=lambda donor: donor.db_id)
     logger.debug('Prepared Donors')
 
-    all_recipients = []
-    recipient_db_ids = []
-    for donor in txm_event_model.donors:
-        if donor.recipient is not None and donor.recipient.id not in recipient_db_ids:
-            all_recipients.append(get_recipient_from_recipient_model(donor.recipient))
-            recipient_db_ids.append(donor.recipient.id)
-    all_recipients = sorted(all_recipients, key=lambda recipient: recipient.db_id)
+    # the related donors of a recipient are in the same txm event, so they do not have to be queried
+    related_donors_db_ids = {}
+    recipient_models = {}
+    for donor in sorted(txm_event_model.donors, key=lambda donor_model: donor_model.id):
+        if donor.recipient is not None:
+            related_donors_db_ids.setdefault(donor.recipient.id, []).append(donor.id)
+            recipient_models[donor.recipient.id] = donor.recipient
+    all_recipients = sorted([get_recipient_from_recipient_model(recipient_model,
+                                                                related_donors_db_ids[recipient_model.id])
+                             for recipient_model in recipient_models.values()],
+                            key=lambda recipient: recipient.db_id)
 
     logger.debug('Prepared Recipients')
+    txm_event = TxmEvent(db_id=txm_event_model.id,
+                         name=txm_event_model.name,
+                         default_config_id=txm_event_model.default_config_id,
+                         state=TxmEventState.OPEN,
+                         all_donors=all_donors,
+                         all_recipients=all_recipients)
+
+    # the hashes stored with the patients spare hashing all their data, they are missing only in old rows
+    donors_hashes = {donor_model.id: donor_model.persistent_hash for donor_model in txm_event_model.donors}
+    recipients_hashes = {recipient_model.id: recipient_model.persistent_hash
+                         for recipient_model in recipient_models.values()}
+    txm_event.donors_persistent_hashes = {
+        donor_id: donors_hashes[donor_id] if donors_hashes[donor_id] is not None else donor.persistent_hash()
+        for donor_id, donor in txm_event.active_and_valid_donors_dict.items()
+    }
+    txm_event.recipients_persistent_hashes = {
+        recipient_id: recipients_hashes[recipient_id] if recipients_hashes[recipient_id] is not None
+        else recipient.persistent_hash()
+        for recipient_id, recipient in txm_event.active_and_valid_recipients_dict.items()
+    }
+    txm_event.patients_hash = combine_patients_persistent_hashes(
+        donors_hashes=txm_event.donors_persistent_hashes.values(),
+        recipients_hashes=txm_event.recipients_persistent_hashes.values()
+    )
     logger.debug('Prepared TXM event')
-    return TxmEvent(db_id=txm_event_model.id,
-                    name=txm_event_model.name,
-                    default_config_id=txm_event_model.default_config_id,
-                    state=TxmEventState.OPEN,
-                    all_donors=all_donors,
-                    all_recipients=all_recipients)
+    return txm_event
 
 
 def get_allowed_txm_event_ids_for_current_user() -> List[int]:
@@ -1,8 +1,8 @@
 import dataclasses
 from typing import List
 
-from sqlalchemy.orm import backref, relationship
-from sqlalchemy.schema import (CheckConstraint, Column, ForeignKey,
+from sqlalchemy.orm import backref, deferred, relationship
+from sqlalchemy.schema import (CheckConstraint, Column, ForeignKey, Index,
                                UniqueConstraint)
 from sqlalchemy.sql import func
 from sqlalchemy.types import (BIGINT, BLOB, BOOLEAN, DATETIME, FLOAT, INTEGER,
@@ -15,20 +15,25 @@ from txmatching.utils.blood_groups import BloodGroup
 from txmatching.utils.country_enum import Country
 # pylint: disable=too-few-public-methods,too-many-arguments
 # disable because sqlalchemy needs classes without public methods
-from txmatching.utils.enums import Sex, TxmEventState
+from txmatching.utils.enums import Sex, SolveJobStatus, TxmEventState
 from txmatching.utils.hla_system.hla_transformations.parsing_issue_detail import \
     ParsingIssueDetail
 
 
 class ConfigModel(db.Model):
     __tablename__ = 'config'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('idx_config_txm_event_id_comparison_fingerprint', 'txm_event_id', 'comparison_fingerprint'),
+        {'extend_existing': True}
+    )
     # Here and below I am using Integer instead of BigInt because it seems that there is a bug and BigInteger is not
     # transferred to BigSerial with autoincrement True, but to BigInt only.
     id = Column(INTEGER, primary_key=True, autoincrement=True, nullable=False)
     txm_event_id = Column(INTEGER, ForeignKey('txm_event.id', onupdate='CASCADE',
                           ondelete='CASCADE'), unique=False, nullable=False)
     parameters = Column(JSON, unique=False, nullable=False)
+    # ConfigParameters.comparison_fingerprint of the parameters, it is null for configs created before it was added
+    comparison_fingerprint = Column(BIGINT, unique=False, nullable=True)
     created_by = Column(INTEGER, ForeignKey('app_user.id'), unique=False, nullable=False)
     # created at and updated at is not handled by triggers as then am not sure how tests would work, as triggers
     # seem to be specific as per db and I do not think its worth the effort as this simple approach works fine
@@ -39,15 +44,24 @@ class ConfigModel(db.Model):
 
 class PairingResultModel(db.Model):
     __tablename__ = 'pairing_result'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('idx_pairing_result_patients_hash_config_fingerprint', 'patients_hash', 'config_fingerprint'),
+        {'extend_existing': True}
+    )
 
     id = Column(INTEGER, primary_key=True, autoincrement=True, nullable=False)
     original_config_id = Column(INTEGER, ForeignKey('config.id', onupdate='CASCADE',
                                 ondelete='CASCADE'), unique=False, nullable=False)
     original_config = relationship('ConfigModel', passive_deletes=True, lazy='joined')
     patients_hash = Column(BIGINT, unique=False, nullable=False)
-    calculated_matchings = Column(JSON, unique=False, nullable=False)
-    score_matrix = Column(JSON, unique=False, nullable=False)
+    # comparison fingerprint of the original config, it is null for pairing results created before it was added
+    config_fingerprint = Column(BIGINT, unique=False, nullable=True)
+    # The results are large, they are loaded (both at once) only when accessed so that searching the pairing results
+    # does not load them.
+    calculated_matchings = deferred(Column(JSON, unique=False, nullable=False), group='results')
+    # score matrix in .npy format, pairing results created before it was added have the json score_matrix instead
+    score_matrix_npy = deferred(Column(BLOB, unique=False, nullable=True), group='results')
+    score_matrix = deferred(Column(JSON, unique=False, nullable=True), group='results')
     valid = Column(BOOLEAN, unique=False, nullable=False)
     created_at = Column(DATETIME(timezone=True), unique=False, nullable=False, server_default=func.now())
     updated_at = Column(DATETIME(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -66,6 +80,8 @@ class TxmEventModel(db.Model):
     # work otherwise (no such table: main.txm_event)
     default_config_id = Column(BIGINT, unique=False, nullable=True)
     state = Column(Enum(TxmEventState), unique=False, nullable=False, default=TxmEventState.OPEN)
+    # increased by every change of the patients, see txm_event_cache
+    patients_revision = Column(BIGINT, unique=False, nullable=False, default=1)
     donors = relationship('DonorModel', backref='txm_event', passive_deletes=True)  # type: List[DonorModel]
     created_at = Column(DATETIME(timezone=True), unique=False, nullable=False, server_default=func.now())
     updated_at = Column(DATETIME(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -105,6 +121,8 @@ class RecipientModel(db.Model):
                                       lazy='selectin')  # type: List[HLAAntibodyRawModel]
     parsing_issues = relationship('ParsingIssueModel', backref='recipient', passive_deletes=True)
     etag = Column(BIGINT, unique=False, nullable=False, default=1)
+    # see update_patients_persistent_hashes
+    persistent_hash = Column(BIGINT, unique=False, nullable=True)
     UniqueConstraint('medical_id', 'txm_event_id')
 
     def __repr__(self):
@@ -141,6 +159,8 @@ class DonorModel(db.Model):
                              lazy='joined')
     parsing_issues = relationship('ParsingIssueModel', backref='donor', passive_deletes=True)
     etag = Column(BIGINT, unique=False, nullable=False, default=1)
+    # see update_patients_persistent_hashes
+    persistent_hash = Column(BIGINT, unique=False, nullable=True)
     UniqueConstraint('medical_id', 'txm_event_id')
 
     def __repr__(self):
@@ -284,3 +304,53 @@ class UploadedFileModel(db.Model):
         onupdate=func.now()
     )
     deleted_at = Column(DATETIME(timezone=True), nullable=True)
+
+
+class SolveJobModel(db.Model):
+    __tablename__ = 'solve_job'
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(INTEGER, primary_key=True, autoincrement=True, nullable=False)
+    txm_event_id = Column(INTEGER, ForeignKey('txm_event.id', onupdate='CASCADE',
+                          ondelete='CASCADE'), unique=False, nullable=False)
+    config_id = Column(INTEGER, ForeignKey('config.id', onupdate='CASCADE',
+                       ondelete='CASCADE'), unique=False, nullable=False)
+    status = Column(Enum(SolveJobStatus), unique=False, nullable=False, default=SolveJobStatus.QUEUED)
+    progress = Column(FLOAT, unique=False, nullable=False, default=0.0)
+    pairing_result_id = Column(INTEGER, ForeignKey('pairing_result.id', onupdate='CASCADE',
+                               ondelete='SET NULL'), unique=False, nullable=True)
+    error_message = Column(TEXT, unique=False, nullable=True)
+    created_by = Column(INTEGER, ForeignKey('app_user.id', onupdate='CASCADE',
+                        ondelete='CASCADE'), unique=False, nullable=False)
+    created_at = Column(DATETIME(timezone=True), unique=False, nullable=False, server_default=func.now())
+    updated_at = Column(DATETIME(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    deleted_at = Column(DATETIME(timezone=True), nullable=True)
+
+
+class PairCompatibilityModel(db.Model):
+    __tablename__ = 'pair_compatibility'
+    __table_args__ = (
+        Index('idx_pair_compatibility_created_at', 'created_at'),
+        {'extend_existing': True}
+    )
+
+    scorer_key = Column(BIGINT, primary_key=True, nullable=False)
+    donor_hash = Column(BIGINT, primary_key=True, nullable=False)
+    recipient_hash = Column(BIGINT, primary_key=True, nullable=False)
+    compatibility_index = Column(FLOAT, unique=False, nullable=False)
+    positive_crossmatch = Column(BOOLEAN, unique=False, nullable=False)
+    created_at = Column(DATETIME(timezone=True), unique=False, nullable=False, server_default=func.now())
+
+
+class ScoreMatrixSnapshotModel(db.Model):
+    __tablename__ = 'score_matrix_snapshot'
+    __table_args__ = {'extend_existing': True}
+
+    txm_event_id = Column(INTEGER, ForeignKey('txm_event.id', onupdate='CASCADE', ondelete='CASCADE'),
+                          primary_key=True, autoincrement=False, nullable=False)
+    scorer_key = Column(BIGINT, primary_key=True, nullable=False)
+    donor_hashes = Column(JSON, unique=False, nullable=False)
+    recipient_hashes = Column(JSON, unique=False, nullable=False)
+    score_matrix_npy = Column(BLOB, unique=False, nullable=False)
+    created_at = Column(DATETIME(timezone=True), unique=False, nullable=False, server_default=func.now())
+    updated_at = Column(DATETIME(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -1,10 +1,54 @@
 import re
+import threading
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
 from txmatching.utils.enums import (GENE_HLA_GROUPS_WITH_OTHER_DETAILED,
                                     HLA_GROUPS_PROPERTIES, HLAGroup)
 
+# (high res, split, broad, group)
+_HLACodeKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[HLAGroup]]
+
+
+@dataclass(frozen=True)
+class InternedHLACode:
+    """
+    Flyweight of HLACode shared by all equal codes in the process. It keeps the properties of the code that are
+    detected by regexes, so that they are detected only once for each distinct code.
+    """
+    group: Optional[HLAGroup]
+    # high res codes with a letter at the end (e.g. A*01:01N) are not matched in compatibility index
+    high_res_without_letter: bool
+
+
+class HLACodeTable:
+    """
+    Process wide table of the interned HLA codes, each distinct code is interned only once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._interned_codes = {}  # type: Dict[_HLACodeKey, InternedHLACode]
+
+    def __len__(self):
+        return len(self._interned_codes)
+
+    def intern(self, hla_code: 'HLACode') -> InternedHLACode:
+        key = (hla_code.high_res, hla_code.split, hla_code.broad, hla_code.group)
+        interned_code = self._interned_codes.get(key)
+        if interned_code is None:
+            with self._lock:
+                interned_code = self._interned_codes.setdefault(key, InternedHLACode(
+                    group=hla_code.group,
+                    high_res_without_letter=(hla_code.high_res is None
+                                             or not re.match(r'.*[A-Z]$', hla_code.high_res))
+                ))
+        return interned_code
+
+
+HLA_CODE_TABLE = HLACodeTable()
+
 
 @dataclass
 class HLACode:
@@ -32,7 +76,20 @@ class HLACode:
         if group:
             self.group = group
         else:
-            self.group = self.group_from_hla_code
+            self.group = _group_from_codes(high_res, broad)
+        # the flyweight is not a dataclass field, so it is not part of the comparisons and serialization of the code
+        self.interned = HLA_CODE_TABLE.intern(self)
+
+    def __getstate__(self):
+        # the flyweight is shared only within the process, so it is not pickled and the code is interned again when
+        # it is unpickled (e.g. in the worker processes of the solver)
+        state = self.__dict__.copy()
+        del state['interned']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.interned = HLA_CODE_TABLE.intern(self)
 
     def __repr__(self):
         return f'HLACode({repr(self.high_res)}, {repr(self.split)}, {repr(self.broad)})'
@@ -42,15 +99,22 @@ class HLACode:
 
     @property
     def group_from_hla_code(self) -> Optional[HLAGroup]:
-        for hla_group in GENE_HLA_GROUPS_WITH_OTHER_DETAILED:
-            if self._is_raw_code_in_group(hla_group):
-                return hla_group
-        return None
-
-    def _is_raw_code_in_group(self, hla_group: HLAGroup) -> bool:
-        if self.broad is not None:
-            return bool(re.match(HLA_GROUPS_PROPERTIES[hla_group].split_code_regex, self.broad))
-        elif self.high_res is not None:
-            return bool(re.match(HLA_GROUPS_PROPERTIES[hla_group].high_res_code_regex, self.high_res))
-        else:
-            raise AssertionError(f'Broad or high res should be provided: {self}')
+        return _group_from_codes(self.high_res, self.broad)
+
+
+# the group detection is done once for each distinct code
+@lru_cache(maxsize=None)
+def _group_from_codes(high_res: Optional[str], broad: Optional[str]) -> Optional[HLAGroup]:
+    for hla_group in GENE_HLA_GROUPS_WITH_OTHER_DETAILED:
+        if _is_raw_code_in_group(high_res, broad, hla_group):
+            return hla_group
+    return None
+
+
+def _is_raw_code_in_group(high_res: Optional[str], broad: Optional[str], hla_group: HLAGroup) -> bool:
+    if broad is not None:
+        return bool(re.match(HLA_GROUPS_PROPERTIES[hla_group].split_code_regex, broad))
+    elif high_res is not None:
+        return bool(re.match(HLA_GROUPS_PROPERTIES[hla_group].high_res_code_regex, high_res))
+    else:
+        raise AssertionError(f'Broad or high res should be provided: {high_res}, {broad}')
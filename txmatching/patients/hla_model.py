@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from txmatching.patients.hla_code import HLACode
 from txmatching.utils.enums import HLAGroup
@@ -106,6 +106,48 @@ class AntibodiesPerGroup(PersistentlyHashable):
         )
 
 
+@dataclass(frozen=True)
+class MatchingAntibodies:
+    """
+    Antibodies of one group with the same code on some level (high res, split or broad) together with what
+    the crossmatch needs to know about them.
+    """
+    antibodies: Tuple[HLAAntibody, ...]
+    over_cutoff: Tuple[HLAAntibody, ...]
+    # all the antibodies are over cutoff and have high res code
+    all_over_cutoff_with_high_res: bool
+    # some antibody over cutoff has high res code
+    some_over_cutoff_with_high_res: bool
+
+
+@dataclass(frozen=True)
+class AntibodiesPerGroupIndex:
+    """
+    Antibodies of one group keyed by their codes.
+    """
+    hla_group: HLAGroup
+    by_high_res: Dict[str, MatchingAntibodies]
+    by_split: Dict[str, MatchingAntibodies]
+    by_broad: Dict[Optional[str], MatchingAntibodies]
+    # only the antibodies without split code
+    by_broad_without_split: Dict[Optional[str], MatchingAntibodies]
+    over_cutoff: Tuple[HLAAntibody, ...]
+
+    @classmethod
+    def from_antibodies(cls, antibodies_per_group: AntibodiesPerGroup) -> 'AntibodiesPerGroupIndex':
+        antibodies = antibodies_per_group.hla_antibody_list
+        return cls(
+            hla_group=antibodies_per_group.hla_group,
+            by_high_res=_index_antibodies_by_code(antibodies, 'high_res'),
+            by_split=_index_antibodies_by_code(antibodies, 'split'),
+            by_broad=_index_antibodies_by_code(antibodies, 'broad'),
+            by_broad_without_split=_index_antibodies_by_code(
+                [antibody for antibody in antibodies if antibody.code.split is None], 'broad'
+            ),
+            over_cutoff=tuple(_filter_antibodies_over_cutoff(antibodies))
+        )
+
+
 @dataclass
 class HLAAntibodies(PersistentlyHashable):
     hla_antibodies_raw_list: List[HLAAntibodyRaw]
@@ -115,6 +157,20 @@ class HLAAntibodies(PersistentlyHashable):
     def hla_antibodies_per_groups_over_cutoff(self) -> List[AntibodiesPerGroup]:
         return _filter_antibodies_per_groups_over_cutoff(self.hla_antibodies_per_groups)
 
+    @property
+    def index_per_groups(self) -> Tuple[AntibodiesPerGroupIndex, ...]:
+        """
+        Index of the antibodies of each group (in the order of hla_antibodies_per_groups), built on the first use.
+        The antibodies must not be changed afterwards.
+        """
+        # the index is not a dataclass field, so it is not part of the comparisons and serialization
+        index_per_groups = self.__dict__.get('_index_per_groups')
+        if index_per_groups is None:
+            index_per_groups = tuple(AntibodiesPerGroupIndex.from_antibodies(antibodies_per_group)
+                                     for antibodies_per_group in self.hla_antibodies_per_groups)
+            self.__dict__['_index_per_groups'] = index_per_groups
+        return index_per_groups
+
     def update_persistent_hash(self, hash_: HashType):
         update_persistent_hash(hash_, HLAAntibodies)
         update_persistent_hash(hash_, self.hla_antibodies_per_groups)
@@ -140,3 +196,24 @@ def _filter_antibodies_over_cutoff(
         hla_antibody for hla_antibody in hla_antibodies
         if hla_antibody.mfi >= hla_antibody.cutoff
     ]
+
+
+def _index_antibodies_by_code(hla_antibodies: List[HLAAntibody],
+                              level: str) -> Dict[Optional[str], MatchingAntibodies]:
+    antibodies_by_code = {}  # type: Dict[Optional[str], List[HLAAntibody]]
+    for hla_antibody in hla_antibodies:
+        code = getattr(hla_antibody.code, level)
+        # missing broad codes are compared as any other broad code
+        if code is not None or level == 'broad':
+            antibodies_by_code.setdefault(code, []).append(hla_antibody)
+
+    return {
+        code: MatchingAntibodies(
+            antibodies=tuple(antibodies),
+            over_cutoff=tuple(_filter_antibodies_over_cutoff(antibodies)),
+            all_over_cutoff_with_high_res=all(hla_antibody.mfi >= hla_antibody.cutoff and hla_antibody.code.high_res
+                                              for hla_antibody in antibodies),
+            some_over_cutoff_with_high_res=any(hla_antibody.code.high_res
+                                               for hla_antibody in _filter_antibodies_over_cutoff(antibodies))
+        ) for code, antibodies in antibodies_by_code.items()
+    }
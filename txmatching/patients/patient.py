@@ -140,6 +140,12 @@ class TxmEvent(TxmEventBase):
     all_recipients: List[Recipient]
     active_and_valid_donors_dict: Dict[DonorDbId, Donor]
     active_and_valid_recipients_dict: Dict[RecipientDbId, Recipient]
+    # persistent hash of the active and valid patients if it is known beforehand (e.g. combined from the hashes
+    # stored in the db), see get_patients_persistent_hash
+    patients_hash: Optional[int]
+    # persistent hashes of the active and valid patients known beforehand (stored in the db)
+    donors_persistent_hashes: Dict[DonorDbId, int]
+    recipients_persistent_hashes: Dict[RecipientDbId, int]
 
     # pylint: disable=too-many-arguments
     # I think it is reasonable to have multiple arguments here
@@ -148,6 +154,9 @@ class TxmEvent(TxmEventBase):
         super().__init__(db_id=db_id, name=name, default_config_id=default_config_id, state=state)
         self.all_donors = all_donors
         self.all_recipients = all_recipients
+        self.patients_hash = None
+        self.donors_persistent_hashes = {}
+        self.recipients_persistent_hashes = {}
         (
             self.active_and_valid_donors_dict,
             self.active_and_valid_recipients_dict,
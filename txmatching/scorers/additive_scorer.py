@@ -6,7 +6,9 @@ from txmatching.configuration.config_parameters import (
     ConfigParameters, ManualDonorRecipientScore)
 from txmatching.patients.patient import Donor, Recipient
 from txmatching.patients.patient_types import DonorDbId, RecipientDbId
+from txmatching.scorers.compatibility_cache import CompatibilityCache
 from txmatching.scorers.score_matrix import ScoreMatrix
+from txmatching.scorers.score_matrix_snapshot import ScoreMatrixSnapshotStore
 from txmatching.scorers.scorer_base import ScorerBase
 from txmatching.scorers.scorer_constants import ORIGINAL_DONOR_RECIPIENT_SCORE
 from txmatching.solvers.matching.matching import Matching
@@ -21,6 +23,10 @@ class AdditiveScorer(ScorerBase):
                 for don_rec_score in manual_donor_recipient_scores}
         else:
             self._manual_donor_recipient_scores = {}
+        # if set, the compatibilities computed for the score matrix are stored in it and reused
+        self.compatibility_cache: Optional[CompatibilityCache] = None
+        # if set, the score matrix is computed only for the patients that changed since the last one stored in it
+        self.score_matrix_snapshot_store: Optional[ScoreMatrixSnapshotStore] = None
 
     def score_transplant(self, donor: Donor, recipient: Recipient, original_donors: Optional[List[Donor]]) -> float:
         manual_score = self._manual_donor_recipient_scores.get((donor.db_id, recipient.db_id))
@@ -45,23 +51,22 @@ class AdditiveScorer(ScorerBase):
         total_score = 0
         for transplant in matching.get_donor_recipient_pairs():
             donor, recipient = transplant
-            original_donors = [donors_dict[donor_db_id] for donor_db_id in recipient.related_donors_db_ids if
-                               donor_db_id in donors_dict]
             total_score += self.score_transplant(donor=donor, recipient=recipient,
-                                                 original_donors=original_donors)
+                                                 original_donors=self._original_donors(recipient, donors_dict))
 
         return total_score
 
     def get_score_matrix(self,
                          recipients_dict: Dict[RecipientDbId, Recipient],
                          donors_dict: Dict[DonorDbId, Donor]) -> ScoreMatrix:
+        # the original donors are looked up once per recipient, not for each donor
+        recipients_with_original_donors = [(recipient, self._original_donors(recipient, donors_dict))
+                                           for recipient in recipients_dict.values()]
         score_matrix = np.array([
             [
                 self.score_transplant_including_original_tuple(donor=donor, recipient=recipient,
-                                                               original_donors=[donors_dict[donor_db_id] for donor_db_id
-                                                                                in recipient.related_donors_db_ids if
-                                                                                donor_db_id in donors_dict])
-                for recipient in recipients_dict.values()
+                                                               original_donors=original_donors)
+                for recipient, original_donors in recipients_with_original_donors
             ]
             for donor in donors_dict.values()])
 
@@ -75,6 +80,11 @@ class AdditiveScorer(ScorerBase):
             score = self.score_transplant(donor, recipient, original_donors)
         return score
 
+    @staticmethod
+    def _original_donors(recipient: Recipient, donors_dict: Dict[DonorDbId, Donor]) -> List[Donor]:
+        return [donors_dict[donor_db_id] for donor_db_id in recipient.related_donors_db_ids
+                if donor_db_id in donors_dict]
+
     @classmethod
     def from_config(cls, config_parameters: ConfigParameters) -> 'AdditiveScorer':
         raise NotImplementedError('Has to be overridden')
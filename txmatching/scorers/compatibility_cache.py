@@ -0,0 +1,78 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from txmatching.patients.hla_model import HLATyping
+from txmatching.patients.patient import Donor, Recipient
+from txmatching.utils.persistent_hash import (HashType, get_hash_digest,
+                                              initialize_persistent_hash,
+                                              update_persistent_hash)
+
+# (donor compatibility hash, recipient compatibility hash)
+PairHashes = Tuple[int, int]
+
+
+@dataclass
+class PairCompatibility:
+    compatibility_index: float
+    positive_crossmatch: bool
+
+
+class CompatibilityCache(ABC):
+    """
+    Stores compatibility index and crossmatch of donor-recipient pairs computed by a scorer. The pairs are identified
+    by the compatibility hashes of the patients, so the stored values are valid until the HLA data of one of
+    the patients changes. The scorer key identifies the settings of the scorer the values depend on.
+    """
+
+    @abstractmethod
+    def get_compatibilities(self,
+                            scorer_key: int,
+                            donor_hashes: Iterable[int],
+                            recipient_hashes: Iterable[int]) -> Dict[PairHashes, PairCompatibility]:
+        """
+        Returns the stored compatibilities of the pairs of the given donors and recipients.
+        """
+
+    @abstractmethod
+    def save_compatibilities(self, scorer_key: int, compatibilities: Dict[PairHashes, PairCompatibility]):
+        pass
+
+
+def donor_compatibility_hash(donor: Donor) -> int:
+    """
+    Persistent hash of the donor data the compatibility with a recipient depends on. Contrary to the persistent hash
+    of the donor, parsed HLA codes are included so that the hash changes when the HLA codes are parsed differently.
+    """
+    hash_ = initialize_persistent_hash()
+    _update_hash_with_hla_typing(hash_, donor.parameters.hla_typing)
+    return get_hash_digest(hash_)
+
+
+def recipient_compatibility_hash(recipient: Recipient) -> int:
+    """
+    Persistent hash of the recipient data the compatibility with a donor depends on (HLA typing and antibodies,
+    parsed codes included).
+    """
+    hash_ = initialize_persistent_hash()
+    _update_hash_with_hla_typing(hash_, recipient.parameters.hla_typing)
+    for antibodies_per_group in recipient.hla_antibodies.hla_antibodies_per_groups:
+        update_persistent_hash(hash_, antibodies_per_group.hla_group.name)
+        update_persistent_hash(hash_, [
+            _code_values(antibody) + [antibody.mfi, antibody.cutoff]
+            for antibody in sorted(antibodies_per_group.hla_antibody_list,
+                                   key=lambda antibody: (antibody.raw_code, antibody.mfi, antibody.cutoff))
+        ])
+    return get_hash_digest(hash_)
+
+
+def _update_hash_with_hla_typing(hash_: HashType, hla_typing: HLATyping):
+    for hla_per_group in hla_typing.hla_per_groups:
+        update_persistent_hash(hash_, hla_per_group.hla_group.name)
+        update_persistent_hash(hash_, [_code_values(hla_type) for hla_type in hla_per_group.hla_types])
+
+
+def _code_values(hla_type_or_antibody) -> List:
+    code = hla_type_or_antibody.code
+    return [hla_type_or_antibody.raw_code, code.high_res, code.split, code.broad,
+            code.group.name if code.group is not None else None]
@@ -1,18 +1,82 @@
+import dataclasses
+import functools
+import logging
 from abc import ABC
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
 
 from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.configuration.subclasses import ForbiddenCountryCombination
 from txmatching.patients.patient import Donor, Recipient
+from txmatching.patients.patient_types import DonorDbId, RecipientDbId
 from txmatching.scorers.additive_scorer import AdditiveScorer
-from txmatching.scorers.scorer_constants import NEGATIVE_SCORE_BINARY_MODE, POSITIVE_SCORE_BINARY_MODE, \
-    TRANSPLANT_IMPOSSIBLE_SCORE
-from txmatching.utils.blood_groups import blood_groups_compatible
+from txmatching.scorers.compatibility_cache import (
+    PairCompatibility, donor_compatibility_hash, recipient_compatibility_hash)
+from txmatching.scorers.score_matrix import ScoreMatrix
+from txmatching.scorers.score_matrix_snapshot import ScoreMatrixSnapshot
+from txmatching.scorers.scorer_constants import (
+    NEGATIVE_SCORE_BINARY_MODE, ORIGINAL_DONOR_RECIPIENT_SCORE,
+    POSITIVE_SCORE_BINARY_MODE, TRANSPLANT_IMPOSSIBLE_SCORE)
+from txmatching.utils.blood_groups import BloodGroup, blood_groups_compatible
 from txmatching.utils.enums import HLA_GROUPS_PROPERTIES
 from txmatching.utils.hla_system.compatibility_index import (
     CIConfiguration, compatibility_index)
 from txmatching.utils.hla_system.hla_crossmatch import \
     is_positive_hla_crossmatch
+from txmatching.utils.hla_system.hla_matrices import (
+    compatibility_index_matrix, positive_hla_crossmatch_matrix)
+from txmatching.utils.persistent_hash import (get_hash_digest,
+                                              initialize_persistent_hash,
+                                              update_persistent_hash)
+
+logger = logging.getLogger(__name__)
+
+_BLOOD_GROUPS = list(BloodGroup)
+
+# configuration the score matrix depends on (besides the scorer)
+_SCORE_MATRIX_CONFIG_FIELDS = [
+    'require_compatible_blood_group',
+    'minimum_total_score',
+    'require_better_match_in_compatibility_index',
+    'require_better_match_in_compatibility_index_or_blood_group',
+    'blood_group_compatibility_bonus',
+    'use_binary_scoring',
+    'use_high_resolution',
+    'hla_crossmatch_level',
+    'forbidden_country_combinations',
+    'manual_donor_recipient_scores',
+]
+
+
+@dataclass
+class _CompatibilityHashes:
+    """
+    Compatibility hashes of the patients (see donor_compatibility_hash), computed once for the whole score matrix.
+    """
+    donors: Dict[DonorDbId, int]
+    recipients: Dict[RecipientDbId, int]
+
+    @staticmethod
+    def of_patients(donors: List[Donor], recipients: List[Recipient]) -> '_CompatibilityHashes':
+        return _CompatibilityHashes(
+            donors={donor.db_id: donor_compatibility_hash(donor) for donor in donors},
+            recipients={recipient.db_id: recipient_compatibility_hash(recipient) for recipient in recipients}
+        )
+
+
+@dataclass(frozen=True)
+class RecipientScoringContext:
+    """
+    Scoring data that depend only on the recipient (and its original donors).
+    """
+    best_related_donor_recipient_ci: float
+    # blood groups of the donors compatible with the recipient
+    compatible_blood_groups: FrozenSet[BloodGroup]
+    require_better_match_in_compatibility_index_or_blood_group: bool
+    require_compatible_blood_group: bool
+    require_better_match_in_compatibility_index: bool
 
 
 class HLAAdditiveScorer(AdditiveScorer, ABC):
@@ -42,21 +106,60 @@ class HLAAdditiveScorer(AdditiveScorer, ABC):
         else:
             return manual_score
 
-    # it seems that it is reasonable to want many return statements here as it is still well readable
     def score_transplant_calculated(self, donor: Donor, recipient: Recipient,
                                     original_donors: Optional[List[Donor]]) -> float:
+        return self.score_transplant_with_recipient_context(
+            donor, recipient, self.get_recipient_scoring_context(recipient, original_donors))
+
+    def get_recipient_scoring_context(
+            self,
+            recipient: Recipient,
+            original_donors: Optional[List[Donor]],
+            known_original_donor_ci: Optional[Callable[[Donor], Optional[float]]] = None
+    ) -> RecipientScoringContext:
+        """
+        Computes the part of the scoring that depends only on the recipient, so that it can be computed once and used
+        for all the donors. Compatibility index of the original donors is computed only when the recipient requires
+        a better match than the original donors have.
+        :param known_original_donor_ci: returns the compatibility index of the original donor and the recipient
+        if it was already computed
+        """
+        settings = {setting_name: bool(self._get_setting_from_config_or_recipient(recipient, setting_name))
+                    for setting_name in ['require_better_match_in_compatibility_index_or_blood_group',
+                                         'require_compatible_blood_group',
+                                         'require_better_match_in_compatibility_index']}
+
+        best_related_donor_recipient_ci = 0.0
+        if original_donors and (settings['require_better_match_in_compatibility_index_or_blood_group']
+                                or settings['require_better_match_in_compatibility_index']):
+            all_related_donors_recipient_ci = []
+            for original_donor in original_donors:
+                related_donor_ci = known_original_donor_ci(original_donor) if known_original_donor_ci else None
+                if related_donor_ci is None:
+                    related_donor_ci = compatibility_index(original_donor.parameters.hla_typing,
+                                                           recipient.parameters.hla_typing,
+                                                           ci_configuration=self.ci_configuration)
+                all_related_donors_recipient_ci.append(related_donor_ci)
+            best_related_donor_recipient_ci = max(all_related_donors_recipient_ci)
+
+        return RecipientScoringContext(
+            best_related_donor_recipient_ci=best_related_donor_recipient_ci,
+            compatible_blood_groups=frozenset(blood_group for blood_group in _BLOOD_GROUPS
+                                              if blood_groups_compatible(blood_group,
+                                                                         recipient.parameters.blood_group)),
+            **settings
+        )
+
+    # it seems that it is reasonable to want many return statements here as it is still well readable
+    def score_transplant_with_recipient_context(self, donor: Donor, recipient: Recipient,
+                                                recipient_context: RecipientScoringContext) -> float:
         donor_recipient_ci = compatibility_index(
             donor.parameters.hla_typing,
             recipient.parameters.hla_typing,
             ci_configuration=self.ci_configuration
         )
-        if original_donors:
-            all_related_donors_recipient_ci = [
-                compatibility_index(original_donor.parameters.hla_typing, recipient.parameters.hla_typing,
-                                    ci_configuration=self.ci_configuration) for original_donor in original_donors]
-            best_related_donor_recipient_ci = max(all_related_donors_recipient_ci)
-        else:
-            best_related_donor_recipient_ci = 0.0
+        best_related_donor_recipient_ci = recipient_context.best_related_donor_recipient_ci
+        compatible_blood_group = donor.parameters.blood_group in recipient_context.compatible_blood_groups
 
         # We can't do exchanges between some countries
         if ForbiddenCountryCombination(donor.parameters.country_code, recipient.parameters.country_code) \
@@ -64,8 +167,7 @@ class HLAAdditiveScorer(AdditiveScorer, ABC):
             return TRANSPLANT_IMPOSSIBLE_SCORE
 
         # Donor must have blood group that is acceptable or compatible for the recipient
-        if not (donor.parameters.blood_group in recipient.acceptable_blood_groups
-                or blood_groups_compatible(donor.parameters.blood_group, recipient.parameters.blood_group)):
+        if not (donor.parameters.blood_group in recipient.acceptable_blood_groups or compatible_blood_group):
             return TRANSPLANT_IMPOSSIBLE_SCORE
 
         # Recipient can't have antibodies that donor has hla_typing for
@@ -76,34 +178,24 @@ class HLAAdditiveScorer(AdditiveScorer, ABC):
         if positive_crossmatch:
             return TRANSPLANT_IMPOSSIBLE_SCORE
 
-        better_match_in_ci_or_br = self._get_setting_from_config_or_recipient(
-            recipient,
-            'require_better_match_in_compatibility_index_or_blood_group'
-        )
-
-        if better_match_in_ci_or_br and (
-                not blood_groups_compatible(donor.parameters.blood_group, recipient.parameters.blood_group)
-                and donor_recipient_ci <= best_related_donor_recipient_ci):
+        if recipient_context.require_better_match_in_compatibility_index_or_blood_group and (
+                not compatible_blood_group and donor_recipient_ci <= best_related_donor_recipient_ci):
             return TRANSPLANT_IMPOSSIBLE_SCORE
-        require_compatible_blood_group = self._get_setting_from_config_or_recipient(recipient,
-                                                                                    'require_compatible_blood_group')
+
         # If required, the donor must have the compatible blood group with recipient
-        if require_compatible_blood_group and not blood_groups_compatible(donor.parameters.blood_group,
-                                                                          recipient.parameters.blood_group):
+        if recipient_context.require_compatible_blood_group and not compatible_blood_group:
             return TRANSPLANT_IMPOSSIBLE_SCORE
 
-        better_match_in_ci = self._get_setting_from_config_or_recipient(recipient,
-                                                                        'require_better_match_in_compatibility_index')
-
         # If required, the compatibility index between donor and recipient must be higher than
         # between recipient and the donor related to him
-        if better_match_in_ci and donor_recipient_ci <= best_related_donor_recipient_ci:
+        if recipient_context.require_better_match_in_compatibility_index \
+                and donor_recipient_ci <= best_related_donor_recipient_ci:
             return TRANSPLANT_IMPOSSIBLE_SCORE
 
         if self._configuration.use_binary_scoring:
             return 1.0
         else:
-            blood_group_bonus = self._blood_group_compatibility_bonus(donor, recipient)
+            blood_group_bonus = self._configuration.blood_group_compatibility_bonus if compatible_blood_group else 0.0
             total_score = donor_recipient_ci + blood_group_bonus
 
             # The total score must be higher than the minimum required
@@ -112,11 +204,288 @@ class HLAAdditiveScorer(AdditiveScorer, ABC):
             else:
                 return total_score
 
-    def _blood_group_compatibility_bonus(self, donor: Donor, recipient: Recipient):
-        if blood_groups_compatible(donor.parameters.blood_group, recipient.parameters.blood_group):
-            return self._configuration.blood_group_compatibility_bonus
+    def get_score_matrix(self,
+                         recipients_dict: Dict[RecipientDbId, Recipient],
+                         donors_dict: Dict[DonorDbId, Donor]) -> ScoreMatrix:
+        """
+        Computes the same matrix as AdditiveScorer.get_score_matrix, but all the conditions of
+        score_transplant_calculated are evaluated for the whole matrix at once. If score matrix snapshot store is set,
+        only the rows and the columns of the patients that changed since the last computed matrix are computed.
+        """
+        if len(donors_dict) == 0 or len(recipients_dict) == 0:
+            return super().get_score_matrix(recipients_dict, donors_dict)
+
+        if self.score_matrix_snapshot_store is None:
+            return self._score_matrix_block(list(donors_dict.values()), list(recipients_dict.values()), donors_dict)
+        return self._get_score_matrix_incrementally(recipients_dict, donors_dict)
+
+    # pylint: disable=too-many-locals
+    # the matrices follow the steps of score_transplant_calculated
+    def _score_matrix_block(self,
+                            donors: List[Donor],
+                            recipients: List[Recipient],
+                            donors_dict: Dict[DonorDbId, Donor],
+                            compatibility_hashes: Optional[_CompatibilityHashes] = None) -> ScoreMatrix:
+        """
+        Computes the part of the score matrix with the rows of the donors and the columns of the recipients.
+        """
+        donor_db_id_to_idx = {donor.db_id: donor_idx for donor_idx, donor in enumerate(donors)}
+
+        ci_matrix, positive_crossmatch = self._compatibility_matrices(donors, recipients, compatibility_hashes)
+
+        def known_original_donor_ci(original_donor: Donor, recipient_idx: int) -> Optional[float]:
+            donor_idx = donor_db_id_to_idx.get(original_donor.db_id)
+            return ci_matrix[donor_idx, recipient_idx] if donor_idx is not None else None
+
+        recipient_contexts = [
+            self.get_recipient_scoring_context(recipient, self._original_donors(recipient, donors_dict),
+                                               functools.partial(known_original_donor_ci, recipient_idx=recipient_idx))
+            for recipient_idx, recipient in enumerate(recipients)
+        ]
+        ci_not_better_than_related_donor = ci_matrix <= np.array(
+            [recipient_context.best_related_donor_recipient_ci for recipient_context in recipient_contexts])
+
+        forbidden_country = self._forbidden_country_combination_matrix(donors, recipients)
+        compatible_blood_group, acceptable_blood_group = self._blood_group_matrices(donors, recipients)
+
+        better_match_in_ci_or_br, require_compatible_blood_group, better_match_in_ci = (
+            np.array([getattr(recipient_context, setting_name) for recipient_context in recipient_contexts])
+            for setting_name in ['require_better_match_in_compatibility_index_or_blood_group',
+                                 'require_compatible_blood_group',
+                                 'require_better_match_in_compatibility_index']
+        )
+
+        transplant_impossible = (
+                forbidden_country
+                | ~(acceptable_blood_group | compatible_blood_group)
+                | positive_crossmatch
+                | (better_match_in_ci_or_br & ~compatible_blood_group & ci_not_better_than_related_donor)
+                | (require_compatible_blood_group & ~compatible_blood_group)
+                | (better_match_in_ci & ci_not_better_than_related_donor)
+        )
+
+        if self._configuration.use_binary_scoring:
+            score_matrix = np.where(transplant_impossible, TRANSPLANT_IMPOSSIBLE_SCORE, 1.0)
         else:
-            return 0.0
+            total_score = ci_matrix + np.where(compatible_blood_group,
+                                               self._configuration.blood_group_compatibility_bonus,
+                                               0.0)
+            score_matrix = np.where(transplant_impossible | (total_score < self._configuration.minimum_total_score),
+                                    TRANSPLANT_IMPOSSIBLE_SCORE,
+                                    total_score)
+
+        recipient_db_id_to_idx = {recipient.db_id: recipient_idx for recipient_idx, recipient in enumerate(recipients)}
+        for (donor_db_id, recipient_db_id), manual_score in self._manual_donor_recipient_scores.items():
+            if donor_db_id in donor_db_id_to_idx and recipient_db_id in recipient_db_id_to_idx:
+                score_matrix[donor_db_id_to_idx[donor_db_id], recipient_db_id_to_idx[recipient_db_id]] = \
+                    self.get_score_when_manual_score_set(manual_score)
+
+        for recipient_idx, recipient in enumerate(recipients):
+            for donor_db_id in recipient.related_donors_db_ids:
+                if donor_db_id in donor_db_id_to_idx:
+                    score_matrix[donor_db_id_to_idx[donor_db_id], recipient_idx] = ORIGINAL_DONOR_RECIPIENT_SCORE
+
+        return score_matrix
+
+    def _get_score_matrix_incrementally(self,
+                                        recipients_dict: Dict[RecipientDbId, Recipient],
+                                        donors_dict: Dict[DonorDbId, Donor]) -> ScoreMatrix:
+        scorer_key = self._score_matrix_key()
+        donors = list(donors_dict.values())
+        recipients = list(recipients_dict.values())
+        compatibility_hashes = _CompatibilityHashes.of_patients(donors, recipients)
+        donor_hashes = [self._donor_score_hash(donor, compatibility_hashes) for donor in donors]
+        recipient_hashes = [self._recipient_score_hash(recipient, compatibility_hashes) for recipient in recipients]
+
+        snapshot = self.score_matrix_snapshot_store.load(scorer_key)
+        snapshot_donor_idxs = {donor_hash: donor_idx for donor_idx, donor_hash
+                               in enumerate(snapshot.donor_hashes)} if snapshot is not None else {}
+        snapshot_recipient_idxs = {recipient_hash: recipient_idx for recipient_idx, recipient_hash
+                                   in enumerate(snapshot.recipient_hashes)} if snapshot is not None else {}
+        kept_donor_idxs = [donor_idx for donor_idx, donor_hash in enumerate(donor_hashes)
+                           if donor_hash in snapshot_donor_idxs]
+        changed_donor_idxs = [donor_idx for donor_idx, donor_hash in enumerate(donor_hashes)
+                              if donor_hash not in snapshot_donor_idxs]
+        kept_recipient_idxs = [recipient_idx for recipient_idx, recipient_hash in enumerate(recipient_hashes)
+                               if recipient_hash in snapshot_recipient_idxs]
+        changed_recipient_idxs = [recipient_idx for recipient_idx, recipient_hash in enumerate(recipient_hashes)
+                                  if recipient_hash not in snapshot_recipient_idxs]
+
+        score_matrix = np.zeros((len(donors), len(recipients)))
+        if kept_donor_idxs and kept_recipient_idxs:
+            score_matrix[np.ix_(kept_donor_idxs, kept_recipient_idxs)] = snapshot.score_matrix[np.ix_(
+                [snapshot_donor_idxs[donor_hashes[donor_idx]] for donor_idx in kept_donor_idxs],
+                [snapshot_recipient_idxs[recipient_hashes[recipient_idx]] for recipient_idx in kept_recipient_idxs]
+            )]
+        if changed_donor_idxs:
+            score_matrix[changed_donor_idxs, :] = self._score_matrix_block(
+                [donors[donor_idx] for donor_idx in changed_donor_idxs], recipients, donors_dict, compatibility_hashes)
+        if kept_donor_idxs and changed_recipient_idxs:
+            score_matrix[np.ix_(kept_donor_idxs, changed_recipient_idxs)] = self._score_matrix_block(
+                [donors[donor_idx] for donor_idx in kept_donor_idxs],
+                [recipients[recipient_idx] for recipient_idx in changed_recipient_idxs],
+                donors_dict,
+                compatibility_hashes)
+        logger.debug(f'Computed {len(changed_donor_idxs)} rows and {len(changed_recipient_idxs)} columns '
+                     f'of {len(donors)}x{len(recipients)} score matrix')
+
+        if snapshot is None or donor_hashes != snapshot.donor_hashes or recipient_hashes != snapshot.recipient_hashes:
+            self.score_matrix_snapshot_store.save(scorer_key, ScoreMatrixSnapshot(donor_hashes=donor_hashes,
+                                                                                  recipient_hashes=recipient_hashes,
+                                                                                  score_matrix=score_matrix))
+        return score_matrix
+
+    # pylint: enable=too-many-locals
+
+    def _score_matrix_key(self) -> int:
+        hash_ = initialize_persistent_hash()
+        update_persistent_hash(hash_, type(self).__name__)
+        for config_field in _SCORE_MATRIX_CONFIG_FIELDS:
+            value = getattr(self._configuration, config_field)
+            if isinstance(value, list):
+                value = [dataclasses.astuple(item) for item in value]
+            update_persistent_hash(hash_, config_field)
+            update_persistent_hash(hash_, value)
+        return get_hash_digest(hash_)
+
+    def _donor_score_hash(self, donor: Donor, compatibility_hashes: _CompatibilityHashes) -> int:
+        """
+        Hash of the donor data the scores in the row of the donor depend on. The persistent hash does not cover
+        the parsed HLA codes, the compatibility hash does.
+        """
+        hash_ = initialize_persistent_hash()
+        update_persistent_hash(hash_, donor.db_id)
+        update_persistent_hash(hash_, self.score_matrix_snapshot_store.donor_persistent_hash(donor))
+        update_persistent_hash(hash_, compatibility_hashes.donors[donor.db_id])
+        return get_hash_digest(hash_)
+
+    def _recipient_score_hash(self, recipient: Recipient, compatibility_hashes: _CompatibilityHashes) -> int:
+        """
+        Hash of the recipient data the scores in the column of the recipient depend on, the scores depend also on
+        the HLA of the related donors.
+        """
+        hash_ = initialize_persistent_hash()
+        update_persistent_hash(hash_, recipient.db_id)
+        update_persistent_hash(hash_, self.score_matrix_snapshot_store.recipient_persistent_hash(recipient))
+        update_persistent_hash(hash_, compatibility_hashes.recipients[recipient.db_id])
+        for donor_db_id in sorted(recipient.related_donors_db_ids):
+            update_persistent_hash(hash_, donor_db_id)
+            update_persistent_hash(hash_, compatibility_hashes.donors.get(donor_db_id))
+        return get_hash_digest(hash_)
+
+    # pylint: disable=too-many-locals
+    # the cached and the computed parts of the matrices are put together
+    def _compatibility_matrices(self, donors: List[Donor],
+                                recipients: List[Recipient],
+                                compatibility_hashes: Optional[_CompatibilityHashes] = None
+                                ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns compatibility index matrix and positive crossmatch matrix. If compatibility cache is set, only the rows
+        (or the columns) of the patients with some pair missing in the cache are computed.
+        """
+        if self.compatibility_cache is None:
+            return self._compute_compatibility_matrices(donors, recipients)
+
+        scorer_key = self._compatibility_cache_key()
+        if compatibility_hashes is None:
+            compatibility_hashes = _CompatibilityHashes.of_patients(donors, recipients)
+        donor_hashes = [compatibility_hashes.donors[donor.db_id] for donor in donors]
+        recipient_hashes = [compatibility_hashes.recipients[recipient.db_id] for recipient in recipients]
+        cached_compatibilities = self.compatibility_cache.get_compatibilities(scorer_key, donor_hashes,
+                                                                              recipient_hashes)
+
+        ci_matrix = np.zeros((len(donors), len(recipients)))
+        positive_crossmatch = np.zeros((len(donors), len(recipients)), dtype=bool)
+        is_cached = np.zeros((len(donors), len(recipients)), dtype=bool)
+        for donor_idx, donor_hash in enumerate(donor_hashes):
+            for recipient_idx, recipient_hash in enumerate(recipient_hashes):
+                compatibility = cached_compatibilities.get((donor_hash, recipient_hash))
+                if compatibility is not None:
+                    ci_matrix[donor_idx, recipient_idx] = compatibility.compatibility_index
+                    positive_crossmatch[donor_idx, recipient_idx] = compatibility.positive_crossmatch
+                    is_cached[donor_idx, recipient_idx] = True
+
+        missing_donor_idxs = np.flatnonzero(~is_cached.all(axis=1))
+        missing_recipient_idxs = np.flatnonzero(~is_cached.all(axis=0))
+        if len(missing_donor_idxs) == 0:
+            return ci_matrix, positive_crossmatch
+
+        # either all the rows or all the columns with a missing pair are computed, whatever is smaller
+        if len(missing_donor_idxs) * len(recipients) <= len(donors) * len(missing_recipient_idxs):
+            computed_idxs = np.ix_(missing_donor_idxs, np.arange(len(recipients)))
+            computed_donors, computed_recipients = [donors[idx] for idx in missing_donor_idxs], recipients
+        else:
+            computed_idxs = np.ix_(np.arange(len(donors)), missing_recipient_idxs)
+            computed_donors, computed_recipients = donors, [recipients[idx] for idx in missing_recipient_idxs]
+        ci_matrix[computed_idxs], positive_crossmatch[computed_idxs] = self._compute_compatibility_matrices(
+            computed_donors, computed_recipients)
+
+        self.compatibility_cache.save_compatibilities(scorer_key, {
+            (donor_hashes[donor_idx], recipient_hashes[recipient_idx]): PairCompatibility(
+                compatibility_index=float(ci_matrix[donor_idx, recipient_idx]),
+                positive_crossmatch=bool(positive_crossmatch[donor_idx, recipient_idx])
+            )
+            for donor_idx, recipient_idx in zip(*np.nonzero(~is_cached))
+        })
+        return ci_matrix, positive_crossmatch
+
+    # pylint: enable=too-many-locals
+
+    def _compute_compatibility_matrices(self, donors: List[Donor],
+                                        recipients: List[Recipient]) -> Tuple[np.ndarray, np.ndarray]:
+        donor_hla_typings = [donor.parameters.hla_typing for donor in donors]
+        ci_matrix = compatibility_index_matrix(donor_hla_typings,
+                                               [recipient.parameters.hla_typing for recipient in recipients],
+                                               ci_configuration=self.ci_configuration)
+        positive_crossmatch = positive_hla_crossmatch_matrix(donor_hla_typings,
+                                                             [recipient.hla_antibodies for recipient in recipients],
+                                                             self._configuration.use_high_resolution,
+                                                             self._configuration.hla_crossmatch_level)
+        return ci_matrix, positive_crossmatch
+
+    def _compatibility_cache_key(self) -> int:
+        # the scorer determines the compatibility index, the crossmatch depends on the two settings
+        hash_ = initialize_persistent_hash()
+        update_persistent_hash(hash_, type(self).__name__)
+        update_persistent_hash(hash_, self._configuration.use_high_resolution)
+        update_persistent_hash(hash_, self._configuration.hla_crossmatch_level.name)
+        return get_hash_digest(hash_)
+
+    def _forbidden_country_combination_matrix(self, donors: List[Donor], recipients: List[Recipient]) -> np.ndarray:
+        countries = list({patient.parameters.country_code for patient in donors + recipients})
+        country_to_idx = {country: country_idx for country_idx, country in enumerate(countries)}
+        forbidden_combinations = np.array([
+            [ForbiddenCountryCombination(donor_country, recipient_country)
+             in self._configuration.forbidden_country_combinations
+             for recipient_country in countries]
+            for donor_country in countries
+        ], dtype=bool)
+        return forbidden_combinations[
+            np.array([country_to_idx[donor.parameters.country_code] for donor in donors])[:, np.newaxis],
+            np.array([country_to_idx[recipient.parameters.country_code] for recipient in recipients])
+        ]
+
+    @staticmethod
+    def _blood_group_matrices(donors: List[Donor], recipients: List[Recipient]):
+        """
+        Returns matrices telling whether donor blood group is compatible with the recipient and whether it is among
+        the blood groups acceptable for the recipient.
+        """
+        donor_blood_group_idxs = np.array([_BLOOD_GROUPS.index(donor.parameters.blood_group) for donor in donors])
+        compatible_blood_groups = np.array([
+            [blood_groups_compatible(donor_blood_group, recipient_blood_group) for recipient_blood_group in _BLOOD_GROUPS]
+            for donor_blood_group in _BLOOD_GROUPS
+        ], dtype=bool)
+        compatible_blood_group = compatible_blood_groups[
+            donor_blood_group_idxs[:, np.newaxis],
+            np.array([_BLOOD_GROUPS.index(recipient.parameters.blood_group) for recipient in recipients])
+        ]
+        recipient_acceptable_blood_groups = np.array([
+            [blood_group in recipient.acceptable_blood_groups for blood_group in _BLOOD_GROUPS]
+            for recipient in recipients
+        ], dtype=bool)
+        acceptable_blood_group = recipient_acceptable_blood_groups[:, donor_blood_group_idxs].T
+        return compatible_blood_group, acceptable_blood_group
 
     def _get_setting_from_config_or_recipient(self, recipient: Recipient,
                                               setting_name):
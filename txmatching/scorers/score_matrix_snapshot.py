@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from txmatching.patients.patient import Donor, Recipient
+from txmatching.patients.patient_types import DonorDbId, RecipientDbId
+from txmatching.scorers.score_matrix import ScoreMatrix
+
+
+@dataclass
+class ScoreMatrixSnapshot:
+    """
+    Score matrix together with the score hashes of the donors (rows) and the recipients (columns) it was computed for.
+    A score of a pair stays valid as long as the score hashes of the donor and the recipient do not change.
+    """
+    donor_hashes: List[int]
+    recipient_hashes: List[int]
+    score_matrix: ScoreMatrix
+
+
+class ScoreMatrixSnapshotStore(ABC):
+    """
+    Stores the last score matrix computed by a scorer. The scorer key identifies the scorer and the configuration
+    the scores depend on. The score hashes of the patients are based on their persistent hashes, the ones known
+    beforehand (e.g. stored in the db) are not computed again.
+    """
+
+    def __init__(self,
+                 donors_persistent_hashes: Optional[Dict[DonorDbId, int]] = None,
+                 recipients_persistent_hashes: Optional[Dict[RecipientDbId, int]] = None):
+        self._donors_persistent_hashes = donors_persistent_hashes or {}
+        self._recipients_persistent_hashes = recipients_persistent_hashes or {}
+
+    def donor_persistent_hash(self, donor: Donor) -> int:
+        persistent_hash = self._donors_persistent_hashes.get(donor.db_id)
+        return persistent_hash if persistent_hash is not None else donor.persistent_hash()
+
+    def recipient_persistent_hash(self, recipient: Recipient) -> int:
+        persistent_hash = self._recipients_persistent_hashes.get(recipient.db_id)
+        return persistent_hash if persistent_hash is not None else recipient.persistent_hash()
+
+    @abstractmethod
+    def load(self, scorer_key: int) -> Optional[ScoreMatrixSnapshot]:
+        pass
+
+    @abstractmethod
+    def save(self, scorer_key: int, snapshot: ScoreMatrixSnapshot):
+        pass
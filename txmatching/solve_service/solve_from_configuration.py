@@ -1,31 +1,49 @@
 import heapq
 import logging
-from typing import Iterator, List, Optional, Tuple
+from typing import Callable, Iterator, List, Optional, Tuple
 
 from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.filters.filter_base import FilterBase
 from txmatching.filters.filter_from_config import filter_from_config
 from txmatching.patients.patient import TxmEvent
+from txmatching.scorers.compatibility_cache import CompatibilityCache
+from txmatching.scorers.score_matrix_snapshot import ScoreMatrixSnapshotStore
 from txmatching.scorers.scorer_from_config import scorer_from_configuration
-from txmatching.solve_service.solver_lock import run_with_solver_lock
 from txmatching.solvers.matching.matching_with_score import MatchingWithScore
 from txmatching.solvers.pairing_result import PairingResult
 from txmatching.solvers.solver_from_config import solver_from_configuration
-from txmatching.utils.enums import Solver
+from txmatching.utils.enums import ILP_SOLVERS
 
 logger = logging.getLogger(__name__)
 
-
-def solve_from_configuration(config_parameters: ConfigParameters, txm_event: TxmEvent) -> PairingResult:
-    return run_with_solver_lock(lambda: _solve_from_configuration_unsafe(config_parameters, txm_event))
-
-
-def _solve_from_configuration_unsafe(config_parameters: ConfigParameters, txm_event: TxmEvent) -> PairingResult:
+# fractions of the solve done when the score matrix is computed (and the search of the matchings starts) and when
+# the search of the matchings is finished (only the result is stored then)
+_SCORING_DONE_PROGRESS = 0.1
+_SEARCH_DONE_PROGRESS = 0.95
+
+ProgressCallback = Callable[[float], None]
+
+
+def solve_from_configuration(config_parameters: ConfigParameters,
+                             txm_event: TxmEvent,
+                             progress_callback: Optional[ProgressCallback] = None,
+                             compatibility_cache: Optional[CompatibilityCache] = None,
+                             score_matrix_snapshot_store: Optional[ScoreMatrixSnapshotStore] = None) -> PairingResult:
+    """
+    :param progress_callback: called repeatedly with the fraction (between 0 and 1) of the solve that was done
+    :param compatibility_cache: cache of the compatibilities used by the scorer
+    :param score_matrix_snapshot_store: store of the last score matrix of the txm event, only the scores of the changed
+    patients are computed if set
+    """
     scorer = scorer_from_configuration(config_parameters)
+    scorer.compatibility_cache = compatibility_cache
+    scorer.score_matrix_snapshot_store = score_matrix_snapshot_store
     solver = solver_from_configuration(config_parameters,
                                        donors_dict=txm_event.active_and_valid_donors_dict,
                                        recipients_dict=txm_event.active_and_valid_recipients_dict,
                                        scorer=scorer)
+    if progress_callback is not None:
+        progress_callback(_SCORING_DONE_PROGRESS)
 
     all_matchings = solver.solve()
     matching_filter = filter_from_config(config_parameters)
@@ -33,7 +51,13 @@ def _solve_from_configuration_unsafe(config_parameters: ConfigParameters, txm_ev
     matchings_filtered_sorted, all_results_found, matching_count = _filter_and_sort_matchings(
         all_matchings,
         matching_filter,
-        config_parameters)
+        config_parameters,
+        progress_callback)
+    if progress_callback is not None:
+        progress_callback(_SEARCH_DONE_PROGRESS)
+    all_results_found = all_results_found and solver.all_results_found
+    if solver.found_matchings_count is not None:
+        matching_count = solver.found_matchings_count
 
     logger.info(f'{len(matchings_filtered_sorted)} matchings were found.')
 
@@ -47,17 +71,20 @@ def _solve_from_configuration_unsafe(config_parameters: ConfigParameters, txm_ev
 
 def _filter_and_sort_matchings(all_matchings: Iterator[MatchingWithScore],
                                matching_filter: FilterBase,
-                               config_parameters: ConfigParameters
+                               config_parameters: ConfigParameters,
+                               progress_callback: Optional[ProgressCallback] = None
                                ) -> Tuple[List[MatchingWithScore], bool, Optional[int]]:
     matchings_heap = []
     all_results_found = True
+    expected_matchings_count = _get_expected_matchings_count(config_parameters)
     i = -1
     for i, matching in enumerate(all_matchings):
+        if progress_callback is not None:
+            progress_callback(_SCORING_DONE_PROGRESS + (_SEARCH_DONE_PROGRESS - _SCORING_DONE_PROGRESS)
+                              * min(i + 1, expected_matchings_count) / expected_matchings_count)
         if matching_filter.keep(matching):
             matching_entry = (
-                len(matching.get_donor_recipient_pairs()),
-                matching.score,
-                len(matching.get_rounds()),
+                *matching.get_sort_key(),
                 i,  # we want to skip sorting by matching
                 matching
             )
@@ -81,9 +108,17 @@ def _filter_and_sort_matchings(all_matchings: Iterator[MatchingWithScore],
     for idx, matching_in_good_order in enumerate(matchings):
         matching_in_good_order.set_order_id(idx + 1)
 
-    if config_parameters.solver_constructor_name == Solver.ILPSolver:
+    if config_parameters.solver_constructor_name in ILP_SOLVERS:
         result_count = None
     else:
         result_count = i + 1
 
     return matchings, all_results_found, result_count
+
+
+def _get_expected_matchings_count(config_parameters: ConfigParameters) -> int:
+    if config_parameters.solver_constructor_name in ILP_SOLVERS:
+        return max(min(config_parameters.max_number_of_matchings, config_parameters.max_matchings_in_ilp_solver), 1)
+    # AllSolutionsSolver yields the matchings that get among the best ones found so far, that is always the case for
+    # the first max_number_of_matchings of them, the rest of the search only improves them
+    return max(config_parameters.max_number_of_matchings, 1)
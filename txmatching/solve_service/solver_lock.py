@@ -1,32 +1,189 @@
 import threading
-from typing import Callable, TypeVar
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import (Callable, ContextManager, Dict, Generic, Iterator,
+                    Optional, TypeVar)
+
+from flask import current_app as app
+from sqlalchemy import text
 
 from txmatching.auth.exceptions import SolverAlreadyRunningException
+from txmatching.configuration.app_configuration.application_configuration import \
+    get_application_configuration
+from txmatching.database.db import db
 
-# because these are not constants
+# because this is not constant
 # pylint: disable=invalid-name
+T = TypeVar('T')
+L = TypeVar('L')
+# pylint: enable=invalid-name
 
-_solver_running_lock = threading.Lock()
-_solver_running = False
+# SolverAlreadyRunningException is raised if the lock of the solve key can not be obtained for this long
+SOLVE_KEY_LOCK_TIMEOUT_SECONDS = 600.0
+# the lock of the solve key held by another process is tried again after this long, the wait doubles up to the max
+_SOLVE_KEY_LOCK_MIN_RETRY_SECONDS = 0.05
+_SOLVE_KEY_LOCK_MAX_RETRY_SECONDS = 2.0
 
-T = TypeVar('T')
 
+class SolverLocks(ABC):
+    """
+    Locks that coordinate the solves running at the same time.
+    """
+
+    def __init__(self, max_solves_running_per_txm_event: int):
+        self._max_solves_running_per_txm_event = max_solves_running_per_txm_event
+
+    @abstractmethod
+    def solve_key_lock(self, solve_key: int) -> ContextManager[None]:
+        """
+        Waits until no one else holds the lock of the solve key, raises SolverAlreadyRunningException if it takes more
+        than SOLVE_KEY_LOCK_TIMEOUT_SECONDS.
+        """
+
+    @abstractmethod
+    def txm_event_solve_slot(self, txm_event_id: int) -> ContextManager[None]:
+        """
+        Occupies one of the solve slots of the txm event, raises SolverAlreadyRunningException if all of them are
+        occupied.
+        """
+
+
+@dataclass
+class _SharedLock(Generic[L]):
+    lock: L
+    users_count: int = 0
+
+
+class LocalSolverLocks(SolverLocks):
+    """
+    Locks shared only by the threads of the current process. The lock of a solve key or a txm event exists only while
+    someone uses it.
+    """
+
+    def __init__(self, max_solves_running_per_txm_event: int):
+        super().__init__(max_solves_running_per_txm_event)
+        self._locks_lock = threading.Lock()
+        self._solve_key_locks: Dict[int, _SharedLock[threading.Lock]] = {}
+        self._txm_event_solve_slots: Dict[int, _SharedLock[threading.BoundedSemaphore]] = {}
+
+    @contextmanager
+    def solve_key_lock(self, solve_key: int):
+        with self._use_shared_lock(self._solve_key_locks, solve_key, threading.Lock) as lock:
+            if not lock.acquire(timeout=SOLVE_KEY_LOCK_TIMEOUT_SECONDS):
+                raise SolverAlreadyRunningException()
+            try:
+                yield
+            finally:
+                lock.release()
+
+    @contextmanager
+    def txm_event_solve_slot(self, txm_event_id: int):
+        with self._use_shared_lock(
+                self._txm_event_solve_slots,
+                txm_event_id,
+                lambda: threading.BoundedSemaphore(self._max_solves_running_per_txm_event)
+        ) as solve_slots:
+            if not solve_slots.acquire(blocking=False):
+                raise SolverAlreadyRunningException()
+            try:
+                yield
+            finally:
+                solve_slots.release()
+
+    @contextmanager
+    def _use_shared_lock(self, shared_locks: Dict[int, _SharedLock[L]], key: int,
+                         create_lock: Callable[[], L]) -> Iterator[L]:
+        with self._locks_lock:
+            shared_lock = shared_locks.get(key)
+            if shared_lock is None:
+                shared_lock = shared_locks[key] = _SharedLock(create_lock())
+            shared_lock.users_count += 1
+        try:
+            yield shared_lock.lock
+        finally:
+            with self._locks_lock:
+                shared_lock.users_count -= 1
+                if shared_lock.users_count == 0:
+                    del shared_locks[key]
 
-def run_with_solver_lock(block: Callable[[], T]) -> T:
+
+class PostgresSolverLocks(SolverLocks):
     """
-    Runs execution with the lock, if some other execution is running right now,
-    it raises SolverAlreadyRunningException.
+    Postgres advisory locks shared by all the processes using the database. The locks are held by a dedicated
+    connection so that they are not released by the commits done while solving. The waiting for a lock does not hold
+    a connection, so the waiters can not exhaust the connection pool.
     """
-    # pylint: disable=global-statement,global-variable-not-assigned
-    global _solver_running_lock, _solver_running
-    try:
-        # check whether another solver is running
-        with _solver_running_lock:
-            if _solver_running:
+
+    @contextmanager
+    def solve_key_lock(self, solve_key: int):
+        retry_seconds = _SOLVE_KEY_LOCK_MIN_RETRY_SECONDS
+        deadline = time.monotonic() + SOLVE_KEY_LOCK_TIMEOUT_SECONDS
+        while True:
+            with db.engine.connect() as connection:
+                if connection.execute(text('SELECT pg_try_advisory_lock(:key)'), key=solve_key).scalar():
+                    try:
+                        yield
+                    finally:
+                        connection.execute(text('SELECT pg_advisory_unlock(:key)'), key=solve_key)
+                    return
+            if time.monotonic() + retry_seconds > deadline:
                 raise SolverAlreadyRunningException()
-            _solver_running = True
-        # execute block outside of the lock
-        return block()
-    finally:
-        with _solver_running_lock:
-            _solver_running = False
+            time.sleep(retry_seconds)
+            retry_seconds = min(2 * retry_seconds, _SOLVE_KEY_LOCK_MAX_RETRY_SECONDS)
+
+    @contextmanager
+    def txm_event_solve_slot(self, txm_event_id: int):
+        # the two-key advisory locks do not overlap with the single-key ones used for the solve keys
+        with db.engine.connect() as connection:
+            for slot in range(self._max_solves_running_per_txm_event):
+                if connection.execute(text('SELECT pg_try_advisory_lock(:txm_event_id, :slot)'),
+                                      txm_event_id=txm_event_id, slot=slot).scalar():
+                    break
+            else:
+                raise SolverAlreadyRunningException()
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:txm_event_id, :slot)'),
+                                   txm_event_id=txm_event_id, slot=slot)
+
+
+def get_solver_locks() -> SolverLocks:
+    """
+    Obtains solver locks for the database of the application. Postgres advisory locks are used so that the solves
+    are coordinated across all the workers, other databases (sqlite in tests) use process local locks instead.
+    """
+    placeholder = 'SOLVER_LOCKS'
+    if not app.config.get(placeholder):
+        max_solves_running_per_txm_event = get_application_configuration().max_solves_running_per_txm_event
+        if db.engine.dialect.name == 'postgresql':
+            app.config[placeholder] = PostgresSolverLocks(max_solves_running_per_txm_event)
+        else:
+            app.config[placeholder] = LocalSolverLocks(max_solves_running_per_txm_event)
+    return app.config[placeholder]
+
+
+def run_single_flight_solve(solver_locks: SolverLocks,
+                            solve_key: int,
+                            txm_event_id: int,
+                            find_result: Callable[[], Optional[T]],
+                            solve: Callable[[], T]) -> T:
+    """
+    Returns the result found by find_result, otherwise solves it. Only one caller solves the same solve key at once,
+    the others wait for it and then reuse its result (if they find it). The number of solves running for the txm event
+    at once is limited, SolverAlreadyRunningException is raised when the limit is reached.
+    """
+    result = find_result()
+    if result is not None:
+        return result
+
+    with solver_locks.solve_key_lock(solve_key):
+        # the result might have been solved while waiting for the lock
+        result = find_result()
+        if result is not None:
+            return result
+
+        with solver_locks.txm_event_solve_slot(txm_event_id):
+            return solve()
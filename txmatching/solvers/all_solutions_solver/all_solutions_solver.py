@@ -1,15 +1,24 @@
 import logging
+import math
 from dataclasses import dataclass
-from typing import Dict, Iterator
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.filters.filter_from_config import filter_from_config
 from txmatching.patients.patient import Donor, Recipient
 from txmatching.patients.patient_types import DonorDbId, RecipientDbId
 from txmatching.scorers.additive_scorer import AdditiveScorer
+from txmatching.scorers.score_matrix import ScoreMatrix
+from txmatching.solvers.all_solutions_solver.clique_search import CliqueKey
 from txmatching.solvers.all_solutions_solver.score_matrix_solver import \
     find_possible_path_combinations_from_score_matrix
+from txmatching.solvers.donor_recipient_pair_idx_only import \
+    DonorRecipientPairIdxOnly
+from txmatching.solvers.independent_components import (IndependentComponent,
+                                                       solve_components)
 from txmatching.solvers.matching.matching_with_score import MatchingWithScore
-from txmatching.solvers.solver_base import SolverBase
+from txmatching.solvers.solver_base import (
+    SolverBase, get_matching_from_path_combinations)
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +31,88 @@ class AllSolutionsSolver(SolverBase):
     scorer: AdditiveScorer
 
     def solve(self) -> Iterator[MatchingWithScore]:
+        """
+        Returns superset of the best config_parameters.max_number_of_matchings matchings kept by the matching filter.
+        """
+        components = self.get_independent_components()
+        if components is not None:
+            yield from self._solve_independent_components(components)
+            return
+
+        matching_filter = filter_from_config(self.config_parameters)
+
+        def path_combination_key(path_combination: List[DonorRecipientPairIdxOnly]) -> Optional[CliqueKey]:
+            matching = self.get_matching_from_path_combinations(path_combination)
+            return matching.get_sort_key() if matching_filter.keep(matching) else None
+
         possible_path_combinations = find_possible_path_combinations_from_score_matrix(
             score_matrix=self.score_matrix,
             config_parameters=self.config_parameters,
-            donors=list(self.donors)
+            donors=list(self.donors),
+            path_combination_key=path_combination_key
         )
 
-        for possible_path_combination in possible_path_combinations:
+        while True:
+            try:
+                possible_path_combination = next(possible_path_combinations)
+            except StopIteration as stop:
+                # pylint: disable=unpacking-non-sequence
+                # the generator returns the tuple, pylint does not see the return value of generators
+                self.all_results_found, self.found_matchings_count = stop.value
+                # pylint: enable=unpacking-non-sequence
+                return
             yield self.get_matching_from_path_combinations(possible_path_combination)
+
+    def _solve_independent_components(self, components: List[IndependentComponent]) -> Iterator[MatchingWithScore]:
+        component_inputs = []
+        for component in components:
+            donors_dict, recipients_dict, score_matrix = self.get_component_patients(component)
+            component_inputs.append((score_matrix, list(donors_dict.values()), list(recipients_dict.values()),
+                                     self.config_parameters))
+        results_per_component = solve_components(_solve_all_solutions_component, component_inputs, len(self.donors))
+
+        # the indices of the patients of the component are changed to the indices of all the patients
+        path_combinations_per_component = [
+            [[DonorRecipientPairIdxOnly(donor_idx=component.donor_idxs[pair.donor_idx],
+                                        recipient_idx=component.recipient_idxs[pair.recipient_idx])
+              for pair in path_combination]
+             for path_combination in path_combinations]
+            for component, (path_combinations, _, _) in zip(components, results_per_component)
+        ]
+        # every matching is a combination of one matching of each component that has any, the matchings are counted
+        # only up to the same limit as when all the patients are searched together
+        matchings_count = math.prod(found_matchings_count
+                                    for _, _, found_matchings_count in results_per_component
+                                    if found_matchings_count > 0)
+        self.all_results_found = all(all_results_found for _, all_results_found, _ in results_per_component)
+        self.found_matchings_count = min(matchings_count,
+                                         self.config_parameters.max_matchings_in_all_solutions_solver)
+        yield from self.get_best_matchings_of_components(path_combinations_per_component,
+                                                         self.config_parameters.max_number_of_matchings)
+
+
+def _solve_all_solutions_component(
+        component_input: Tuple[ScoreMatrix, List[Donor], List[Recipient], ConfigParameters]
+) -> Tuple[List[List[DonorRecipientPairIdxOnly]], bool, int]:
+    score_matrix, donors, recipients, config_parameters = component_input
+
+    # the matching filter keeps all the matchings when the components can be solved independently
+    def path_combination_key(path_combination: List[DonorRecipientPairIdxOnly]) -> CliqueKey:
+        return get_matching_from_path_combinations(donors, recipients, score_matrix, path_combination).get_sort_key()
+
+    possible_path_combinations = find_possible_path_combinations_from_score_matrix(
+        score_matrix=score_matrix,
+        config_parameters=config_parameters,
+        donors=donors,
+        path_combination_key=path_combination_key
+    )
+    path_combinations = []
+    while True:
+        try:
+            path_combinations.append(next(possible_path_combinations))
+        except StopIteration as stop:
+            # pylint: disable=unpacking-non-sequence
+            # the generator returns the tuple, pylint does not see the return value of generators
+            all_results_found, found_matchings_count = stop.value
+            # pylint: enable=unpacking-non-sequence
+            return path_combinations, all_results_found, found_matchings_count
@@ -0,0 +1,191 @@
+import heapq
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# (number of transplants, score, number of rounds), higher is better
+CliqueKey = Tuple[int, float, int]
+
+# the scores of the candidates are summed up incrementally, so the bound is loosened to be safe from rounding errors
+_SCORE_BOUND_TOLERANCE = 1e-6
+
+
+class MaximalCliquesSearch:
+    """
+    Bron-Kerbosch search of maximal cliques in the graph of paths that do not intersect each other.
+
+    If max_number_of_cliques is set, only the maximal cliques whose key gets among the best max_number_of_cliques keys
+    found so far are yielded and branches that cannot yield such a clique are not searched. The number of transplants
+    and the score of a clique extending the current one are bounded both by the sums over all the remaining candidate
+    paths and by the number and the best transplant scores of the donors in the candidate paths, as every donor
+    donates at most once. The number of rounds is bounded by the number of transplants. The maximal cliques of the
+    branches that are not searched are still counted (without evaluating their keys) in found_cliques_count, the
+    counting stops once the limit of the cliques is reached and it does not affect all_cliques_searched.
+    """
+    # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    # the search state is kept in the instance to avoid passing it through the recursion
+
+    # pylint: disable=too-many-arguments
+    # the bounds need the transplants and the scores of the paths and of the donors
+    def __init__(self,
+                 compatible_paths_bitsets: List[int],
+                 paths: List[Tuple[int, ...]],
+                 path_scores: List[float],
+                 donor_max_transplant_scores: List[float],
+                 clique_key: Optional[Callable[[List[int]], Optional[CliqueKey]]] = None,
+                 max_number_of_cliques: Optional[int] = None):
+        """
+        :param compatible_paths_bitsets: i-th bit of compatible_paths_bitsets[j] is set iff paths i and j do not
+            intersect (are adjacent in the graph)
+        :param paths: donor indices of the paths
+        :param donor_max_transplant_scores: the best score of a transplant from the donor
+        :param clique_key: returns key of the clique or None if the clique should not be yielded, if not set all the
+            maximal cliques are yielded
+        """
+        self._compatible_paths_bitsets = compatible_paths_bitsets
+        self._path_transplant_counts = [len(path) - 1 for path in paths]
+        self._path_scores = [max(path_score, 0.0) for path_score in path_scores]
+        self._donor_max_transplant_scores = [max(score, 0.0) for score in donor_max_transplant_scores]
+        self._paths_with_donor_bitsets = [0] * len(donor_max_transplant_scores)
+        for path_number, path in enumerate(paths):
+            for donor_idx in set(path):
+                self._paths_with_donor_bitsets[donor_idx] |= 1 << path_number
+        self._clique_key = clique_key
+        self._max_number_of_cliques = max_number_of_cliques
+        self._searching_only_best = clique_key is not None and max_number_of_cliques is not None
+
+        self._best_keys_heap = []
+        self._max_evaluated_cliques = None
+        self.evaluated_cliques_count = 0
+        self.all_cliques_searched = True
+        self.found_cliques_count = 0
+        self.all_cliques_counted = True
+
+    # pylint: enable=too-many-arguments
+
+    def search(self, max_evaluated_cliques: Optional[int] = None) -> Iterator[List[int]]:
+        """
+        :param max_evaluated_cliques: the search is stopped if there are more maximal cliques to evaluate the key of,
+            all_cliques_searched is False in such case. Also at most this many maximal cliques are counted,
+            all_cliques_counted is False if there are more of them.
+        """
+        self._max_evaluated_cliques = max_evaluated_cliques
+        all_paths = (1 << len(self._compatible_paths_bitsets)) - 1
+        yield from self._expand([], 0, 0.0, all_paths, 0)
+
+    # pylint: disable=too-many-arguments
+    # the transplant count and score of the clique are passed along to compute the bounds
+    def _expand(self, clique: List[int], clique_transplant_count: int, clique_score: float,
+                candidates: int, excluded: int) -> Iterator[List[int]]:
+        if candidates == 0:
+            if excluded == 0:
+                yield from self._yield_if_among_best(clique)
+            return
+
+        if self._searching_only_best:
+            candidates_transplant_count, candidates_score = self._sum_transplant_counts_and_scores(candidates)
+            donors_transplant_count, donors_score = self._count_donors_and_sum_scores(candidates)
+        while candidates != 0 and self.all_cliques_searched:
+            if self._searching_only_best and self._cannot_get_among_best(
+                    clique_transplant_count + min(candidates_transplant_count, donors_transplant_count),
+                    clique_score + min(candidates_score, donors_score)):
+                self._count_maximal_cliques(candidates, excluded)
+                return
+
+            lowest_bit = candidates & -candidates
+            path_number = lowest_bit.bit_length() - 1
+            compatible_paths = self._compatible_paths_bitsets[path_number]
+            yield from self._expand(clique + [path_number],
+                                    clique_transplant_count + self._path_transplant_counts[path_number],
+                                    clique_score + self._path_scores[path_number],
+                                    candidates & compatible_paths,
+                                    excluded & compatible_paths)
+
+            candidates ^= lowest_bit
+            excluded |= lowest_bit
+            if self._searching_only_best:
+                candidates_transplant_count -= self._path_transplant_counts[path_number]
+                candidates_score -= self._path_scores[path_number]
+
+    # pylint: enable=too-many-arguments
+
+    def _yield_if_among_best(self, clique: List[int]) -> Iterator[List[int]]:
+        if self._max_evaluated_cliques is not None and self.evaluated_cliques_count >= self._max_evaluated_cliques:
+            self.all_cliques_searched = False
+            return
+        self.evaluated_cliques_count += 1
+        self._count_found_clique()
+
+        if self._clique_key is None:
+            yield clique
+            return
+
+        key = self._clique_key(clique)
+        if key is None:
+            return
+        if not self._searching_only_best:
+            yield clique
+        elif len(self._best_keys_heap) < self._max_number_of_cliques:
+            heapq.heappush(self._best_keys_heap, key)
+            yield clique
+        elif len(self._best_keys_heap) > 0 and key > self._best_keys_heap[0]:
+            heapq.heapreplace(self._best_keys_heap, key)
+            yield clique
+
+    def _count_maximal_cliques(self, candidates: int, excluded: int):
+        # Every maximal clique contains the pivot or a path not compatible with it, so only such paths are branched on.
+        # The pivot is chosen as in Tomita et al. to branch on as few paths as possible.
+        if not self.all_cliques_counted:
+            return
+        if candidates == 0:
+            if excluded == 0:
+                self._count_found_clique()
+            return
+
+        pivot_compatible_paths = max((self._compatible_paths_bitsets[path_number]
+                                      for path_number in _bit_numbers(candidates | excluded)),
+                                     key=lambda compatible_paths: (compatible_paths & candidates).bit_count())
+        branch_paths = candidates & ~pivot_compatible_paths
+        while branch_paths != 0 and self.all_cliques_counted:
+            lowest_bit = branch_paths & -branch_paths
+            compatible_paths = self._compatible_paths_bitsets[lowest_bit.bit_length() - 1]
+            self._count_maximal_cliques(candidates & compatible_paths, excluded & compatible_paths)
+            branch_paths ^= lowest_bit
+            candidates ^= lowest_bit
+            excluded |= lowest_bit
+
+    def _count_found_clique(self):
+        if self._max_evaluated_cliques is not None and self.found_cliques_count >= self._max_evaluated_cliques:
+            self.all_cliques_counted = False
+        else:
+            self.found_cliques_count += 1
+
+    def _cannot_get_among_best(self, max_transplant_count: int, max_score: float) -> bool:
+        if len(self._best_keys_heap) < self._max_number_of_cliques:
+            return False
+        return (len(self._best_keys_heap) == 0 or
+                (max_transplant_count, max_score + _SCORE_BOUND_TOLERANCE, max_transplant_count)
+                <= self._best_keys_heap[0])
+
+    def _sum_transplant_counts_and_scores(self, paths: int) -> Tuple[int, float]:
+        transplant_count, score = 0, 0.0
+        while paths != 0:
+            lowest_bit = paths & -paths
+            path_number = lowest_bit.bit_length() - 1
+            transplant_count += self._path_transplant_counts[path_number]
+            score += self._path_scores[path_number]
+            paths ^= lowest_bit
+        return transplant_count, score
+
+    def _count_donors_and_sum_scores(self, paths: int) -> Tuple[int, float]:
+        donors_count, score = 0, 0.0
+        for donor_idx, paths_with_donor in enumerate(self._paths_with_donor_bitsets):
+            if paths_with_donor & paths != 0:
+                donors_count += 1
+                score += self._donor_max_transplant_scores[donor_idx]
+        return donors_count, score
+
+
+def _bit_numbers(bitset: int) -> Iterator[int]:
+    while bitset != 0:
+        lowest_bit = bitset & -bitset
+        yield lowest_bit.bit_length() - 1
+        bitset ^= lowest_bit
@@ -1,26 +1,29 @@
 import logging
-from typing import Dict, Iterable, List
+from typing import Callable, Dict, Generator, List, Optional, Tuple
 
 import numpy as np
-from graph_tool import topology
 
 from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.patients.patient import Donor
+from txmatching.solvers.all_solutions_solver.clique_search import (
+    CliqueKey, MaximalCliquesSearch)
 from txmatching.solvers.donor_recipient_pair_idx_only import \
     DonorRecipientPairIdxOnly
 from txmatching.solvers.all_solutions_solver.score_matrix_utils import (
-    Path, construct_path_intersection_graph, find_all_cycles,
+    Path, construct_path_intersection_bitsets, find_all_cycles,
     find_all_sequences, get_compatible_donor_idxs_per_donor_idx,
-    get_donor_idx_to_recipient_idx, get_pairs_from_clique,
+    get_donor_idx_to_recipient_idx, get_pairs_from_clique, get_path_score,
     keep_only_highest_scoring_paths)
 
 logger = logging.getLogger(__name__)
 
 
-def find_possible_path_combinations_from_score_matrix(score_matrix: np.ndarray,
-                                                      donors: List[Donor],
-                                                      config_parameters: ConfigParameters = ConfigParameters(),
-                                                      ) -> Iterable[List[DonorRecipientPairIdxOnly]]:
+def find_possible_path_combinations_from_score_matrix(
+        score_matrix: np.ndarray,
+        donors: List[Donor],
+        config_parameters: ConfigParameters = ConfigParameters(),
+        path_combination_key: Optional[Callable[[List[DonorRecipientPairIdxOnly]], Optional[CliqueKey]]] = None
+) -> Generator[List[DonorRecipientPairIdxOnly], None, Tuple[bool, int]]:
     """
     Returns iterator over the optimal list of possible path combinations. The result is a list of pairs. Each pair
     consists of two integers which correspond to recipient and donor indices.
@@ -31,11 +34,17 @@ def find_possible_path_combinations_from_score_matrix(score_matrix: np.ndarray,
     TRANSPLANT_IMPOSSIBLE_SCORE = -1.0
     :param donors: List of all possible donors
     :param config_parameters
+    :param path_combination_key: if set, only the path combinations that get among the
+        config_parameters.max_number_of_matchings best keys are returned (the key is None for the path combinations
+        that should not be returned at all). Otherwise all the path combinations are returned.
+    :return: whether the returned path combinations contain the best ones (the search was not stopped early) and
+        the number of all the path combinations (at most config_parameters.max_matchings_in_all_solutions_solver of
+        them are counted, more of them do not make the best ones inexact) (the generator return value)
     """
     if len(score_matrix) == 0:
         logger.info('Empty set of paths, returning empty iterator')
         yield from ()
-        return
+        return True, 0
 
     donor_idx_to_recipient_idx = get_donor_idx_to_recipient_idx(score_matrix)
     highest_scoring_paths = get_highest_scoring_paths(score_matrix,
@@ -46,32 +55,51 @@ def find_possible_path_combinations_from_score_matrix(score_matrix: np.ndarray,
     if len(highest_scoring_paths) == 0:
         logger.info('Empty set of paths, returning empty iterator')
         yield from ()
-        return
+        return True, 0
+
+    path_scores = {path: get_path_score(score_matrix, path, donor_idx_to_recipient_idx)
+                   for path in highest_scoring_paths}
+    # The best paths are tried first so that the bound on the best path combinations gets tight soon
+    highest_scoring_paths.sort(key=lambda path: (len(path), path_scores[path]), reverse=True)
 
     logger.info(f'Constructing intersection graph # paths {len(highest_scoring_paths)}')
-    path_intersections_graph, path_number_to_path = construct_path_intersection_graph(highest_scoring_paths)
-    unused_path_numbers = {path_intersections_graph.vertex_index[path_number] for path_number in
-                           path_number_to_path.keys()}
+    compatible_paths_bitsets, path_number_to_path = construct_path_intersection_bitsets(highest_scoring_paths)
 
-    logger.info('Listing all max cliques')
+    logger.info('Listing max cliques')
 
-    # TODO: Fix this properly https://trello.com/c/0GBzQWt2
-    if len(list(path_intersections_graph.vertices())) > 0:
-        max_cliques = topology.max_cliques(path_intersections_graph)
+    if path_combination_key is None:
+        clique_key = None
+        max_number_of_cliques = None
+        max_evaluated_cliques = None
     else:
-        max_cliques = []
+        def clique_key(clique: List[int]) -> Optional[CliqueKey]:
+            return path_combination_key(get_pairs_from_clique(clique, path_number_to_path, donor_idx_to_recipient_idx))
+
+        max_number_of_cliques = config_parameters.max_number_of_matchings
+        max_evaluated_cliques = config_parameters.max_matchings_in_all_solutions_solver
+
+    max_cliques_search = MaximalCliquesSearch(
+        compatible_paths_bitsets=compatible_paths_bitsets,
+        paths=highest_scoring_paths,
+        path_scores=[path_scores[path] for path in highest_scoring_paths],
+        donor_max_transplant_scores=list(np.max(score_matrix, axis=1, initial=0.0)),
+        clique_key=clique_key,
+        max_number_of_cliques=max_number_of_cliques
+    )
 
     logger.info('Creating pairings from paths and circuits ')
 
-    for clique in max_cliques:
-        unused_path_numbers.difference_update(clique)
+    for clique in max_cliques_search.search(max_evaluated_cliques):
         yield get_pairs_from_clique(clique, path_number_to_path, donor_idx_to_recipient_idx)
 
-    single_vertex_cliques = [[path_number] for path_number in unused_path_numbers]
-    for clique in single_vertex_cliques:
-        yield get_pairs_from_clique(clique,
-                                    path_number_to_path,
-                                    donor_idx_to_recipient_idx)
+    if not max_cliques_search.all_cliques_searched:
+        logger.error(f'Max number of matchings {config_parameters.max_matchings_in_all_solutions_solver} was reached. '
+                     f'Returning only best {config_parameters.max_number_of_matchings} matchings from the matchings '
+                     f'found up to now.')
+    elif not max_cliques_search.all_cliques_counted:
+        logger.warning(f'There are more than {config_parameters.max_matchings_in_all_solutions_solver} matchings, '
+                       f'only the best {config_parameters.max_number_of_matchings} of them were searched.')
+    return max_cliques_search.all_cliques_searched, max_cliques_search.found_cliques_count
 
 
 def get_highest_scoring_paths(score_matrix: np.ndarray,
@@ -1,9 +1,9 @@
 import logging
+from collections import Counter
 from itertools import groupby
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Tuple
 
 import numpy as np
-from graph_tool import Graph, topology
 
 from txmatching.auth.exceptions import TooComplicatedDataForAllSolutionsSolver
 from txmatching.configuration.config_parameters import ConfigParameters
@@ -17,6 +17,9 @@ from txmatching.solvers.all_solutions_solver.scoring_utils import \
 Path = Tuple[int]
 logger = logging.getLogger(__name__)
 
+# the bitsets of the compatible paths take (number of paths)^2 bits in total, at most this many bytes are allowed
+MAX_PATH_INTERSECTION_BITSETS_BYTES = 256 * 2 ** 20
+
 
 def get_donor_idx_to_recipient_idx(score_matrix: np.ndarray) -> Dict[int, int]:
     donor_idx_to_recipient_idx = {}
@@ -54,19 +57,27 @@ def find_all_cycles(n_donors: int,
                     config_parameters: ConfigParameters) -> List[Path]:
     """
     Circuits between pairs, each pair is denoted by it's pair = donor index
+
+    Every circuit is found exactly once as a path starting with its smallest donor index, so only paths through larger
+    indices are searched. Circuits longer than max_cycle_length or with too many countries are never explored and
+    only the circuits that can be used count towards max_cycles_in_all_solutions_solver.
     """
-    donor_to_compatible_donor_graph = _get_donor_to_compatible_donor_graph(n_donors,
-                                                                           compatible_donor_idxs_per_donor_idx)
+    compatible_donor_idxs_set_per_donor_idx = {donor_idx: set(compatible_donor_idxs) for donor_idx, compatible_donor_idxs
+                                               in compatible_donor_idxs_per_donor_idx.items()}
     all_circuits = []
-    for i, circuit in enumerate(topology.all_circuits(donor_to_compatible_donor_graph)):
-        if (len(circuit) <= config_parameters.max_cycle_length and
-                country_count_in_path(circuit, donors) <= config_parameters.max_number_of_distinct_countries_in_round):
-            circuit_with_end = tuple(list(circuit) + [circuit[0]])
-            all_circuits.append(circuit_with_end)
-        if i > config_parameters.max_cycles_in_all_solutions_solver:
-            raise TooComplicatedDataForAllSolutionsSolver(
-                f'Number of possible cycles in data was above threshold of '
-                f'{config_parameters.max_cycles_in_all_solutions_solver})')
+    for donor_idx in range(n_donors):
+        for path in _find_all_paths_starting_with(donor_idx,
+                                                  compatible_donor_idxs_per_donor_idx,
+                                                  config_parameters.max_cycle_length - 1,
+                                                  donors,
+                                                  config_parameters.max_number_of_distinct_countries_in_round,
+                                                  min_target=donor_idx + 1):
+            if donor_idx in compatible_donor_idxs_set_per_donor_idx[path[-1]]:
+                all_circuits.append(path + (donor_idx,))
+                if len(all_circuits) > config_parameters.max_cycles_in_all_solutions_solver:
+                    raise TooComplicatedDataForAllSolutionsSolver(
+                        f'Number of possible cycles in data was above threshold of '
+                        f'{config_parameters.max_cycles_in_all_solutions_solver})')
 
     return all_circuits
 
@@ -75,19 +86,12 @@ def find_all_sequences(score_matrix: np.ndarray,
                        compatible_donor_idxs_per_donor_idx: Dict[int, List[int]],
                        max_length: int,
                        donors: List[Donor],
-                       max_countries: int) -> List[Path]:
+                       max_countries: int) -> Iterator[Path]:
     bridge_indices = _get_bridge_indices(score_matrix)
 
-    paths = []
-
     for bridge_index in bridge_indices:
-        bridge_paths = _find_all_paths_starting_with(bridge_index, compatible_donor_idxs_per_donor_idx, set())
-        paths.extend(bridge_paths)
-
-    paths = [tuple(path) for path in paths if 1 < len(path) <= max_length + 1 and
-             country_count_in_path(tuple(path), donors) <= max_countries]
-
-    return paths
+        yield from _find_all_paths_starting_with(bridge_index, compatible_donor_idxs_per_donor_idx, max_length, donors,
+                                                 max_countries)
 
 
 def country_count_in_path(path: Path, donors: List[Donor]) -> int:
@@ -104,15 +108,15 @@ def keep_only_highest_scoring_paths(paths: List[Path],
 
     paths_filtered = [
         max(path_group,
-            key=lambda path: _get_path_score(score_matrix, path, donor_idx_to_recipient_idx))
+            key=lambda path: get_path_score(score_matrix, path, donor_idx_to_recipient_idx))
         for path_group in paths_grouped]
 
     return paths_filtered
 
 
-def _get_path_score(score_matrix: np.array,
-                    path: Path,
-                    donor_idx_to_recipient_idx: Dict[int, int]) -> int:
+def get_path_score(score_matrix: np.array,
+                   path: Path,
+                   donor_idx_to_recipient_idx: Dict[int, int]) -> int:
     pairs = _get_pairs_from_paths([path], donor_idx_to_recipient_idx)
     return get_score_for_idx_pairs(score_matrix, pairs)
 
@@ -135,73 +139,98 @@ def _get_pairs_from_path(path: Path, pair_index_to_recipient_index: Dict[int, in
             range(len(path) - 1)]
 
 
-# pylint: disable=too-many-locals
-# I think here the local variables help the code
-def construct_path_intersection_graph(all_paths: List[Path]) -> Tuple[Graph, Dict[int, Path]]:
-    graph = Graph(directed=False)
-
+def construct_path_intersection_bitsets(all_paths: List[Path]) -> Tuple[List[int], Dict[int, Path]]:
+    """
+    Returns for every path number a bitset (int with i-th bit set for path number i) of the path numbers of the paths
+    that do not intersect the path, i.e. the adjacency of the path intersection graph complement.
+    """
+    if len(all_paths) ** 2 // 8 > MAX_PATH_INTERSECTION_BITSETS_BYTES:
+        raise TooComplicatedDataForAllSolutionsSolver(
+            f'Number of possible cycles and sequences in data ({len(all_paths)}) is too high to search their '
+            f'combinations')
     path_number_to_path = dict(enumerate(all_paths))
-    path_to_path_number = {path: path_number for path_number, path in enumerate(all_paths)}
-
-    unique_indices = {index for path in all_paths for index in path}
-
-    index_to_path_number_not_having_index = {
-        index: {path_to_path_number[path] for path in all_paths if index not in path} for index in
-        unique_indices}
-    compatible_paths = []
-    for path_number, path in enumerate(all_paths):
-        complementary_paths_per_item = [index_to_path_number_not_having_index[item] for item in path]
-        complementary_path_numbers = set.intersection(*complementary_paths_per_item)
+    path_masks = _get_path_masks(all_paths)
 
-        for complementary_path_number in complementary_path_numbers:
-            if complementary_path_number > path_number:
-                compatible_paths.append((path_number, complementary_path_number))
+    compatible_paths_bitsets = [
+        int.from_bytes(np.packbits(~np.any(path_masks & path_mask, axis=1), bitorder='little').tobytes(), 'little')
+        for path_mask in path_masks
+    ]
+    return compatible_paths_bitsets, path_number_to_path
 
-    graph.add_edge_list(compatible_paths)
-    return graph, path_number_to_path
 
+def _get_path_masks(all_paths: List[Path]) -> np.ndarray:
+    """
+    Returns matrix whose i-th row is a bitmask of the donor indices in the i-th path. Two paths do not intersect if
+    and only if bitwise and of their rows is zero.
+    """
+    index_to_bit = {index: bit for bit, index in enumerate(sorted({index for path in all_paths for index in path}))}
+    path_bits = np.zeros((len(all_paths), len(index_to_bit)), dtype=bool)
+    for path_number, path in enumerate(all_paths):
+        path_bits[path_number, [index_to_bit[index] for index in path]] = True
 
-# pylint: enable=too-many-locals
+    # pad to whole 64 bit words so the packed bits can be viewed as uint64
+    n_words = -(-len(index_to_bit) // 64)
+    path_bits = np.pad(path_bits, ((0, 0), (0, n_words * 64 - len(index_to_bit))))
+    return np.packbits(path_bits, axis=1).view(np.uint64)
 
 
 def _find_acceptable_recipient_indices(score_matrix: np.ndarray, donor_index: int) -> List[int]:
     return list(np.where((score_matrix[donor_index] >= 0))[0])
 
 
-def _get_donor_to_compatible_donor_graph(n_donors: int,
-                                         compatible_donor_idxs_per_donor_idx: Dict[int, List[int]]) -> Graph:
-    donor_to_compatible_donor_graph = Graph(directed=True)
-    for i in range(n_donors):
-        assert i == donor_to_compatible_donor_graph.add_vertex()
-
-    # Add donor -> compatible_donor edges
-    for donor_idx, compatible_donor_idxs in compatible_donor_idxs_per_donor_idx.items():
-
-        for compatible_donor_idx in compatible_donor_idxs:
-            donor_to_compatible_donor_graph.add_edge(donor_idx, compatible_donor_idx)
-
-    return donor_to_compatible_donor_graph
-
-
 def _get_bridge_indices(score_matrix: np.ndarray) -> List[int]:
     bridge_indices = np.where(np.sum(score_matrix == ORIGINAL_DONOR_RECIPIENT_SCORE, axis=1) == 0)[0]
     return list(bridge_indices)
 
 
-def _find_all_paths_starting_with(source: int, source_to_targets: Dict[int, List[int]],
-                                  covered_indices: Set) -> List[List[int]]:
-    targets = source_to_targets[source]
-    remaining_targets = set(targets) - covered_indices
-
-    paths = [[source]]
-
-    for target in remaining_targets:
-        covered_indices.add(target)
-        paths_starting_with_target = _find_all_paths_starting_with(target, source_to_targets, covered_indices)
-        covered_indices.remove(target)
-
-        for path in paths_starting_with_target:
-            path.insert(0, source)
-        paths.extend(paths_starting_with_target)
-
-    return paths
+# pylint: disable=too-many-arguments
+# the bounds on the paths are needed to prune the search
+def _find_all_paths_starting_with(source: int,
+                                  source_to_targets: Dict[int, List[int]],
+                                  max_length: int,
+                                  donors: List[Donor],
+                                  max_countries: int,
+                                  min_target: int = 0) -> Iterator[Path]:
+    """
+    Yields all simple paths starting with source that have at least one and at most max_length transplants,
+    at most max_countries distinct countries and that continue only through indices not smaller than min_target.
+    As the number of countries can only grow when a path is extended, paths with too many countries are not extended
+    at all.
+    """
+    path = [source]
+    path_country_counts = Counter([donors[source].parameters.country_code])
+    if max_length < 1 or len(path_country_counts) > max_countries:
+        return
+    targets_to_visit = [iter(source_to_targets[source])]
+
+    while targets_to_visit:
+        target = next(targets_to_visit[-1], None)
+        if target is None:
+            targets_to_visit.pop()
+            _remove_last_donor_from_path(path, path_country_counts, donors)
+            continue
+
+        if target < min_target or target in path:
+            continue
+        target_country = donors[target].parameters.country_code
+        if target_country not in path_country_counts and len(path_country_counts) == max_countries:
+            continue
+
+        path.append(target)
+        path_country_counts[target_country] += 1
+        yield tuple(path)
+
+        if len(path) <= max_length:
+            targets_to_visit.append(iter(source_to_targets[target]))
+        else:
+            _remove_last_donor_from_path(path, path_country_counts, donors)
+
+
+# pylint: enable=too-many-arguments
+
+
+def _remove_last_donor_from_path(path: List[int], path_country_counts: Counter, donors: List[Donor]):
+    country = donors[path.pop()].parameters.country_code
+    path_country_counts[country] -= 1
+    if path_country_counts[country] == 0:
+        del path_country_counts[country]
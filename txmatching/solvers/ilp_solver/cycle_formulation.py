@@ -0,0 +1,141 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import mip
+
+from txmatching.auth.exceptions import TooComplicatedDataForAllSolutionsSolver
+from txmatching.solvers.ilp_solver.ilp_dataclasses import VariableMapping
+from txmatching.solvers.ilp_solver.txm_configuration_for_ilp import \
+    DataAndConfigurationForILPSolver
+
+logger = logging.getLogger(__name__)
+
+Edge = Tuple[int, int]
+Cycle = List[Edge]
+
+
+@dataclass(init=False)
+class CycleFormulationMapping:
+    cycle_to_var: List[Tuple[Cycle, mip.Var]]
+    # Mapping from edge e and its position k in a sequence to variable x_e_k (the edge out of the non-directed donor
+    # has position 1)
+    edge_position_to_var: Dict[Tuple[Edge, int], mip.Var]
+
+    def __init__(self, ilp_model: mip.Model, data_and_configuration: DataAndConfigurationForILPSolver):
+        # the cycles are found before any variable is added, so that the model is unchanged if there are too many
+        cycles = find_all_cycles(data_and_configuration)
+        self.cycle_to_var = [
+            (cycle, ilp_model.add_var(var_type=mip.BINARY, name=f'z[{cycle_number}]'))
+            for cycle_number, cycle in enumerate(cycles)
+        ]
+
+        self.edge_position_to_var = {}
+        max_sequence_length = data_and_configuration.configuration.max_sequence_length
+        distances_from_non_directed_donors = _get_distances_from_non_directed_donors(data_and_configuration)
+        for from_node, to_node in data_and_configuration.graph.edges():
+            if from_node not in distances_from_non_directed_donors:
+                continue
+            # the edge can be used only at positions the sequences from the non-directed donors reach
+            # (the edges of the non-directed donors only at the first one)
+            distance = distances_from_non_directed_donors[from_node]
+            last_position = max_sequence_length if distance > 0 else min(1, max_sequence_length)
+            for position in range(distance + 1, last_position + 1):
+                self.edge_position_to_var[(from_node, to_node), position] = ilp_model.add_var(
+                    var_type=mip.BINARY, name=f'x[{from_node},{to_node},{position}]')
+
+
+def add_cycle_formulation_constraints(ilp_model: mip.Model,
+                                      data_and_configuration: DataAndConfigurationForILPSolver,
+                                      mapping: VariableMapping):
+    """
+    Position-indexed chain and cycle formulation (PICEF) of the model. Every used edge is either a part of
+    an allowed cycle or has a position in a sequence starting from a non-directed donor, so the cycles and the
+    sequences are never longer than allowed and the lengths do not need to be limited by the lazy constraints.
+
+    If there are too many cycles, no constraints are added and the model is solved in the edge formulation.
+    """
+    try:
+        cycle_formulation_mapping = CycleFormulationMapping(ilp_model, data_and_configuration)
+    except TooComplicatedDataForAllSolutionsSolver:
+        logger.warning('There are too many cycles, using the edge formulation instead of the cycle formulation')
+        return
+
+    edge_to_cycle_and_position_vars = defaultdict(list)
+    for cycle, var in cycle_formulation_mapping.cycle_to_var:
+        for edge in cycle:
+            edge_to_cycle_and_position_vars[edge].append(var)
+    node_to_in_position_vars = defaultdict(lambda: defaultdict(list))
+    node_to_out_position_vars = defaultdict(lambda: defaultdict(list))
+    for ((from_node, to_node), position), var in cycle_formulation_mapping.edge_position_to_var.items():
+        edge_to_cycle_and_position_vars[from_node, to_node].append(var)
+        node_to_in_position_vars[to_node][position].append(var)
+        node_to_out_position_vars[from_node][position].append(var)
+
+    # Edge is used if it is used by a cycle or at some position of a sequence.
+    for edge, var in mapping.edge_to_var.items():
+        ilp_model.add_constr(mip.xsum(edge_to_cycle_and_position_vars[edge]) == var)
+
+    # Non-directed donor starts at most one sequence.
+    for node in data_and_configuration.non_directed_donors:
+        ilp_model.add_constr(mip.xsum(node_to_out_position_vars[node][1]) <= 1)
+
+    # Pair donates at the next position of the sequence only if its recipient received at the previous one.
+    for node in data_and_configuration.regular_donors:
+        for position, out_position_vars in node_to_out_position_vars[node].items():
+            ilp_model.add_constr(mip.xsum(out_position_vars) <= mip.xsum(node_to_in_position_vars[node][position - 1]))
+
+
+def find_all_cycles(data_and_configuration: DataAndConfigurationForILPSolver) -> List[Cycle]:
+    """
+    Cycles (as lists of their edges) that are not longer than max_cycle_length, do not have more countries than
+    max_number_of_distinct_countries_in_round and do not contain two donors of the same recipient. Every cycle is
+    found exactly once as a path starting with its smallest node, so only paths through larger nodes are searched.
+
+    Raises TooComplicatedDataForAllSolutionsSolver if there are more than max_cycles_in_all_solutions_solver cycles.
+    """
+    graph = data_and_configuration.graph
+    configuration = data_and_configuration.configuration
+    country_codes_dict = data_and_configuration.country_codes_dict
+    donor_enum_to_related_recipient = data_and_configuration.donor_enum_to_related_recipient
+    cycles = []
+
+    def search(path: List[int], path_recipients: set, path_countries: set):
+        for next_node in graph.successors(path[-1]):
+            if next_node == path[0]:
+                cycles.append(list(zip(path, path[1:] + [path[0]])))
+                if len(cycles) > configuration.max_cycles_in_all_solutions_solver:
+                    raise TooComplicatedDataForAllSolutionsSolver(
+                        f'Number of possible cycles in data was above threshold of '
+                        f'{configuration.max_cycles_in_all_solutions_solver}')
+                continue
+            next_recipient = donor_enum_to_related_recipient[next_node]
+            next_countries = path_countries | {country_codes_dict[next_node]}
+            if (next_node < path[0] or next_node in path or next_recipient in path_recipients
+                    or len(path) == configuration.max_cycle_length
+                    or len(next_countries) > configuration.max_number_of_distinct_countries_in_round):
+                continue
+            path.append(next_node)
+            search(path, path_recipients | {next_recipient}, next_countries)
+            path.pop()
+
+    for node in sorted(data_and_configuration.regular_donors):
+        search([node], {donor_enum_to_related_recipient[node]}, {country_codes_dict[node]})
+    return cycles
+
+
+def _get_distances_from_non_directed_donors(data_and_configuration: DataAndConfigurationForILPSolver
+                                            ) -> Dict[int, int]:
+    # number of edges of the shortest sequence from a non-directed donor to the node, limited by max_sequence_length
+    distances = {node: 0 for node in data_and_configuration.non_directed_donors}
+    current_nodes = list(distances)
+    for distance in range(1, data_and_configuration.configuration.max_sequence_length):
+        next_nodes = []
+        for node in current_nodes:
+            for next_node in data_and_configuration.graph.successors(node):
+                if next_node not in distances:
+                    distances[next_node] = distance
+                    next_nodes.append(next_node)
+        current_nodes = next_nodes
+    return distances
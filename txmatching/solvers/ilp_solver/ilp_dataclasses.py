@@ -30,10 +30,20 @@ class ObjectiveType(IntEnum):
     '''Maximize the number of transplants and then maximize their total weight.'''
 
 
+class ILPFormulation(IntEnum):
+    EDGE = 0
+    '''Variable per edge. Too long cycles and sequences are forbidden by lazy constraints.'''
+
+    CYCLE = 1
+    '''Variable per allowed cycle and per position of an edge in a sequence (PICEF), the lengths are limited
+    statically.'''
+
+
 @dataclass
 class InternalILPSolverParameters:
     objective_type: ObjectiveType = ObjectiveType.MAX_TRANSPLANTS_MAX_WEIGHTS
     max_sequence_limit_method: MaxSequenceLimitMethod = MaxSequenceLimitMethod.LAZY_FORBID_ALL_MAXIMAL_SEQUENCES
+    formulation: ILPFormulation = ILPFormulation.EDGE
 
 
 @dataclass(init=False)
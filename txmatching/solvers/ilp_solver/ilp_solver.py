@@ -4,9 +4,14 @@ from typing import Dict, Iterable, Iterator, List, Tuple
 
 from txmatching.solvers.donor_recipient_pair_idx_only import \
     DonorRecipientPairIdxOnly
+from txmatching.solvers.ilp_solver.ilp_dataclasses import (
+    ILPFormulation, InternalILPSolverParameters)
+from txmatching.solvers.ilp_solver.solution import Solution
 from txmatching.solvers.ilp_solver.solve_ilp import solve_ilp
 from txmatching.solvers.ilp_solver.txm_configuration_for_ilp import \
     DataAndConfigurationForILPSolver
+from txmatching.solvers.independent_components import (IndependentComponent,
+                                                       solve_components)
 from txmatching.solvers.matching.matching_with_score import MatchingWithScore
 from txmatching.solvers.solver_base import SolverBase
 
@@ -15,20 +20,53 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class ILPSolver(SolverBase):
+    formulation = ILPFormulation.EDGE
 
     def solve(self) -> Iterator[MatchingWithScore]:
-        config_for_ilp_solver = DataAndConfigurationForILPSolver(self.donors_dict, self.recipients_dict,
-                                                                 self.config_parameters)
-        solutions = solve_ilp(config_for_ilp_solver)
+        internal_parameters = InternalILPSolverParameters(formulation=self.formulation)
         recipients_db_id_to_order_id = {
             recipient.db_id: order_id for order_id, recipient in enumerate(self.recipients)
         }
 
-        for solution in solutions:
+        components = self.get_independent_components()
+        if components is not None:
+            yield from self._solve_independent_components(components, internal_parameters,
+                                                          recipients_db_id_to_order_id)
+            return
+
+        config_for_ilp_solver = DataAndConfigurationForILPSolver(self.donors_dict, self.recipients_dict,
+                                                                 self.config_parameters, self.score_matrix)
+        for solution in solve_ilp(config_for_ilp_solver, internal_parameters):
             possible_path_combination = self._get_path_combinations(solution.edges, recipients_db_id_to_order_id)
 
             yield self.get_matching_from_path_combinations(possible_path_combination)
 
+    def _solve_independent_components(self,
+                                      components: List[IndependentComponent],
+                                      internal_parameters: InternalILPSolverParameters,
+                                      recipients_db_id_to_order_id: Dict[int, int]) -> Iterator[MatchingWithScore]:
+        component_inputs = []
+        for component in components:
+            donors_dict, recipients_dict, score_matrix = self.get_component_patients(component)
+            component_inputs.append((
+                DataAndConfigurationForILPSolver(donors_dict, recipients_dict, self.config_parameters, score_matrix),
+                internal_parameters
+            ))
+        solutions_per_component = solve_components(_solve_ilp_component, component_inputs, len(self.donors))
+
+        # the nodes of the component are its donors, their indices are changed to the indices of all the donors
+        path_combinations_per_component = [
+            [self._get_path_combinations([(component.donor_idxs[from_node], component.donor_idxs[to_node])
+                                          for from_node, to_node in solution.edges],
+                                         recipients_db_id_to_order_id)
+             for solution in solutions]
+            for component, solutions in zip(components, solutions_per_component)
+        ]
+        yield from self.get_best_matchings_of_components(
+            path_combinations_per_component,
+            min(self.config_parameters.max_number_of_matchings, self.config_parameters.max_matchings_in_ilp_solver)
+        )
+
     def _get_path_combinations(self,
                                donor_idx_tuples: Iterable[Tuple[int, int]],
                                recipients_db_id_to_order_id: Dict[int, int]) -> List[DonorRecipientPairIdxOnly]:
@@ -40,3 +78,18 @@ class ILPSolver(SolverBase):
             )
             for donor_idx, idx_of_donor_for_recipient in donor_idx_tuples
         ]
+
+
+@dataclass
+class ILPCycleFormulationSolver(ILPSolver):
+    """
+    Solves the same model as ILPSolver, but with a variable per allowed cycle and per position of an edge in a sequence
+    instead of lazily forbidding too long cycles and sequences. Faster when there are not too many cycles.
+    """
+    formulation = ILPFormulation.CYCLE
+
+
+def _solve_ilp_component(
+        component_input: Tuple[DataAndConfigurationForILPSolver, InternalILPSolverParameters]
+) -> List[Solution]:
+    return list(solve_ilp(*component_input))
@@ -8,10 +8,13 @@ import mip
 from txmatching.auth.exceptions import \
     CannotFindShortEnoughRoundsOrPathsInILPSolver
 from txmatching.patients.patient import Recipient
+from txmatching.solvers.ilp_solver.cycle_formulation import \
+    add_cycle_formulation_constraints
 from txmatching.solvers.ilp_solver.generate_dynamic_constraints import \
     add_dynamic_constraints
 from txmatching.solvers.ilp_solver.ilp_dataclasses import (
-    InternalILPSolverParameters, ObjectiveType, VariableMapping)
+    ILPFormulation, InternalILPSolverParameters, ObjectiveType,
+    VariableMapping)
 from txmatching.solvers.ilp_solver.mip_utils import (mip_get_result_status,
                                                      mip_var_to_bool)
 from txmatching.solvers.ilp_solver.solution import Solution, Status
@@ -32,6 +35,8 @@ def solve_ilp(data_and_configuration: DataAndConfigurationForILPSolver,
     _add_objective(ilp_model, internal_parameters, data_and_configuration, mapping)
 
     _add_static_constraints(data_and_configuration, ilp_model, mapping)
+    if internal_parameters.formulation == ILPFormulation.CYCLE:
+        add_cycle_formulation_constraints(ilp_model, data_and_configuration, mapping)
 
     matchings_to_search_for = min(data_and_configuration.configuration.max_number_of_matchings,
                                   data_and_configuration.configuration.max_matchings_in_ilp_solver)
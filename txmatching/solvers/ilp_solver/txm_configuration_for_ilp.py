@@ -8,7 +8,7 @@ from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.patients.patient import Donor, DonorType, Recipient
 from txmatching.patients.patient_types import DonorDbId, RecipientDbId
 from txmatching.scorers.score_matrix import ScoreMatrix
-from txmatching.scorers.scorer_from_config import scorer_from_configuration
+from txmatching.scorers.scorer_constants import TRANSPLANT_IMPOSSIBLE_SCORE
 from txmatching.utils.country_enum import Country
 
 
@@ -28,7 +28,8 @@ class DataAndConfigurationForILPSolver:
 
     def __init__(self, active_and_valid_donors_dict: Dict[DonorDbId, Donor],
                  active_and_valid_recipients_dict: Dict[RecipientDbId, Recipient],
-                 config_parameters: ConfigParameters):
+                 config_parameters: ConfigParameters,
+                 score_matrix: ScoreMatrix):
 
         self.configuration = config_parameters
         self.non_directed_donors = [i for i, donor in enumerate(active_and_valid_donors_dict.values()) if
@@ -46,8 +47,7 @@ class DataAndConfigurationForILPSolver:
         for donor_db_id, donor in active_and_valid_donors_dict.items():
             self.donor_enum_to_related_recipient[donor_id_to_enum[donor_db_id]] = donor.related_recipient_db_id
 
-        self.graph = self._create_graph(config_parameters, active_and_valid_donors_dict,
-                                        active_and_valid_recipients_dict)
+        self.graph = self._create_graph(active_and_valid_donors_dict, active_and_valid_recipients_dict, score_matrix)
 
         self.regular_donors = set(self.graph.nodes()) - set(self.non_directed_donors)
 
@@ -67,18 +67,12 @@ class DataAndConfigurationForILPSolver:
         self.active_and_valid_donors_list = list(active_and_valid_donors_dict.values())
 
     def _create_graph(self,
-                      config_parameters: ConfigParameters,
                       active_and_valid_donors_dict: Dict[DonorDbId, Donor],
-                      active_and_valid_recipients_dict: Dict[RecipientDbId, Recipient]) -> nx.Graph:
+                      active_and_valid_recipients_dict: Dict[RecipientDbId, Recipient],
+                      score_matrix: ScoreMatrix) -> nx.Graph:
         donor_score_matrix = self._get_donor_score_matrix(
-            config_parameters, active_and_valid_donors_dict, active_and_valid_recipients_dict)
-        num_nodes = len(donor_score_matrix)
-        edges = []
-        for from_node in range(0, num_nodes):
-            for to_node in range(0, num_nodes):
-                weight = int(donor_score_matrix[from_node][to_node])
-                if weight >= 0:
-                    edges.append((from_node, to_node, weight))
+            active_and_valid_donors_dict, active_and_valid_recipients_dict, score_matrix)
+        weights = donor_score_matrix.astype(int)
         graph = nx.DiGraph()
 
         graph.add_nodes_from([
@@ -87,29 +81,33 @@ class DataAndConfigurationForILPSolver:
         ])
 
         graph.add_edges_from([
-            (from_node, to_node, {'weight': weight})
-            for (from_node, to_node, weight) in edges
+            (from_node, to_node, {'weight': int(weights[from_node, to_node])})
+            for (from_node, to_node) in zip(*np.nonzero(weights >= 0))
         ])
         return graph
 
     @staticmethod
-    def _get_donor_score_matrix(config_parameters: ConfigParameters,
-                                active_and_valid_donors_dict: Dict[DonorDbId, Donor],
-                                active_and_valid_recipients_dict: Dict[RecipientDbId, Recipient]) -> ScoreMatrix:
-        scorer = scorer_from_configuration(config_parameters)
-        score_matrix = []
-        for donor in active_and_valid_donors_dict.values():
-            row = []
-            for donor_for_recipient in active_and_valid_donors_dict.values():
-                if (donor_for_recipient.related_recipient_db_id and donor.db_id != donor_for_recipient.db_id and
-                        donor.related_recipient_db_id != donor_for_recipient.related_recipient_db_id):
-                    recipient = active_and_valid_recipients_dict[donor_for_recipient.related_recipient_db_id]
-                    score = scorer.score_transplant_including_original_tuple(donor, recipient, [donor_for_recipient])
-                    row.append(score)
-                else:
-                    row.append(-1)
-            score_matrix.append(row)
-
-        score_matrix = np.array(score_matrix)
-
-        return score_matrix
+    def _get_donor_score_matrix(active_and_valid_donors_dict: Dict[DonorDbId, Donor],
+                                active_and_valid_recipients_dict: Dict[RecipientDbId, Recipient],
+                                score_matrix: ScoreMatrix) -> ScoreMatrix:
+        """
+        Returns matrix with the score of transplant from i-th donor to the recipient related to j-th donor at position
+        [i, j]. The scores are taken from the donor x recipient score matrix, so no transplant is scored again.
+        """
+        num_donors = len(active_and_valid_donors_dict)
+        donor_score_matrix = np.full((num_donors, num_donors), TRANSPLANT_IMPOSSIBLE_SCORE)
+        if num_donors == 0:
+            return donor_score_matrix
+
+        recipient_db_id_to_idx = {recipient_db_id: i for i, recipient_db_id in
+                                  enumerate(active_and_valid_recipients_dict)}
+        related_recipient_idxs = np.array([recipient_db_id_to_idx.get(donor.related_recipient_db_id, -1)
+                                           for donor in active_and_valid_donors_dict.values()])
+        donors_with_recipient = np.flatnonzero(related_recipient_idxs >= 0)
+        donor_score_matrix[:, donors_with_recipient] = score_matrix[:, related_recipient_idxs[donors_with_recipient]]
+
+        # Donors related to the same recipient cannot donate to each other's recipient
+        same_recipient = ((related_recipient_idxs[:, np.newaxis] == related_recipient_idxs[np.newaxis, :])
+                          & (related_recipient_idxs >= 0))
+        donor_score_matrix[same_recipient] = TRANSPLANT_IMPOSSIBLE_SCORE
+        return donor_score_matrix
@@ -0,0 +1,127 @@
+import heapq
+import logging
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+import networkx as nx
+import numpy as np
+
+from txmatching.configuration.config_parameters import ConfigParameters
+from txmatching.patients.patient import Donor, Recipient
+
+logger = logging.getLogger(__name__)
+
+# components with fewer donors in total are solved one by one in this process, as starting the processes (which
+# import txmatching again) takes seconds
+_MIN_DONORS_FOR_PARALLEL_SOLVING = 100
+
+ComponentInput = TypeVar('ComponentInput')
+ComponentResult = TypeVar('ComponentResult')
+SortKey = Tuple[float, ...]
+
+
+@dataclass
+class IndependentComponent:
+    """
+    Donors (rows of the score matrix) and recipients (columns) that share neither a possible transplant nor a related
+    donor or recipient with the other components.
+    """
+    donor_idxs: List[int]
+    recipient_idxs: List[int]
+
+
+def can_be_solved_by_components(config_parameters: ConfigParameters,
+                                donors: List[Donor],
+                                recipients: List[Recipient]) -> bool:
+    """
+    The matchings can be searched in the components independently only if the components share nothing but
+    the objective, i.e. no patients are required and the limits of the debts cannot be reached.
+    """
+    if config_parameters.required_patient_db_ids:
+        return False
+    donor_counts = Counter(donor.parameters.country_code for donor in donors)
+    recipient_counts = Counter(recipient.parameters.country_code for recipient in recipients)
+    # the debt of a country is never higher than the number of its donors or recipients
+    max_possible_debt = max(list(donor_counts.values()) + list(recipient_counts.values()), default=0)
+    return min(config_parameters.max_debt_for_country,
+               config_parameters.max_debt_for_country_for_blood_group_zero) >= max_possible_debt
+
+
+def find_independent_components(score_matrix: np.ndarray,
+                                donors: List[Donor],
+                                recipients: List[Recipient]) -> List[IndependentComponent]:
+    """
+    Returns the components with at least one possible transplant, the patients without any are left out.
+    """
+    recipient_db_id_to_idx = {recipient.db_id: recipient_idx for recipient_idx, recipient in enumerate(recipients)}
+    graph = nx.Graph()
+    possible_transplants = list(zip(*np.nonzero(score_matrix >= 0)))
+    graph.add_edges_from((('donor', donor_idx), ('recipient', recipient_idx))
+                         for donor_idx, recipient_idx in possible_transplants)
+    graph.add_edges_from((('donor', donor_idx), ('recipient', recipient_db_id_to_idx[donor.related_recipient_db_id]))
+                         for donor_idx, donor in enumerate(donors)
+                         if donor.related_recipient_db_id in recipient_db_id_to_idx)
+
+    components = []
+    for component_nodes in nx.connected_components(graph):
+        component_donor_idxs = sorted(idx for patient_type, idx in component_nodes if patient_type == 'donor')
+        component_recipient_idxs = sorted(idx for patient_type, idx in component_nodes if patient_type == 'recipient')
+        if np.any(score_matrix[np.ix_(component_donor_idxs, component_recipient_idxs)] >= 0):
+            components.append(IndependentComponent(component_donor_idxs, component_recipient_idxs))
+    # the biggest components first, so that they start to be solved first
+    components.sort(key=lambda component: len(component.donor_idxs), reverse=True)
+    return components
+
+
+def solve_components(solve_component: Callable[[ComponentInput], ComponentResult],
+                     component_inputs: Sequence[ComponentInput],
+                     donors_count: int,
+                     max_workers: Optional[int] = None) -> List[ComponentResult]:
+    """
+    :param solve_component: has to be a module level function, so that it can be run in another process
+    """
+    max_workers = min(max_workers or os.cpu_count() or 1, len(component_inputs))
+    # daemonic processes are not allowed to have children
+    if donors_count < _MIN_DONORS_FOR_PARALLEL_SOLVING or max_workers <= 1 \
+            or multiprocessing.current_process().daemon:
+        return list(map(solve_component, component_inputs))
+    logger.info(f'Solving {len(component_inputs)} independent components in {max_workers} processes')
+    # spawn instead of fork, the db connections and threads of the parent must not be copied
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(solve_component, component_inputs))
+
+
+def get_best_combinations(sort_keys_per_component: List[List[SortKey]],
+                          max_number_of_combinations: int) -> List[Tuple[int, ...]]:
+    """
+    Returns the best combinations (as indices to the lists of the components) of one matching of each component.
+    The sort keys of the matchings of each component have to be sorted from the best (and there has to be at least one
+    for each component), the sort key of a combination is the sum of the sort keys of its parts, so only the best
+    combinations are constructed.
+    """
+    if not sort_keys_per_component:
+        return []
+
+    def negative_sort_key(combination: Tuple[int, ...]) -> Tuple[float, ...]:
+        sort_keys = [sort_keys[idx] for sort_keys, idx in zip(sort_keys_per_component, combination)]
+        return tuple(-sum(key_parts) for key_parts in zip(*sort_keys))
+
+    first_combination = (0,) * len(sort_keys_per_component)
+    combinations_heap = [(negative_sort_key(first_combination), first_combination)]
+    visited_combinations = {first_combination}
+    best_combinations = []
+    while combinations_heap and len(best_combinations) < max_number_of_combinations:
+        _, combination = heapq.heappop(combinations_heap)
+        best_combinations.append(combination)
+        for component_idx, sort_keys in enumerate(sort_keys_per_component):
+            if combination[component_idx] + 1 < len(sort_keys):
+                next_combination = combination[:component_idx] + (combination[component_idx] + 1,) \
+                                   + combination[component_idx + 1:]
+                if next_combination not in visited_combinations:
+                    visited_combinations.add(next_combination)
+                    heapq.heappush(combinations_heap, (negative_sort_key(next_combination), next_combination))
+    return best_combinations
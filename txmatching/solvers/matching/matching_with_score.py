@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 
 from txmatching.solvers.matching.matching import Matching
 
@@ -15,5 +15,11 @@ class MatchingWithScore(Matching):
     def set_order_id(self, order_id: int):
         self.order_id = order_id
 
+    def get_sort_key(self) -> Tuple[int, float, int]:
+        """
+        Matchings with higher key are better
+        """
+        return len(self.get_donor_recipient_pairs()), self.score, len(self.get_rounds())
+
     def __hash__(self):
         return self.get_donor_recipient_pairs().__hash__()
@@ -1,5 +1,8 @@
+import logging
 from dataclasses import dataclass, field
-from typing import Dict, Iterator, List
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.patients.patient import Donor, Recipient
@@ -11,11 +14,18 @@ from txmatching.solvers.donor_recipient_pair_idx_only import \
 from txmatching.solvers.all_solutions_solver.scoring_utils import \
     get_score_for_idx_pairs
 from txmatching.solvers.donor_recipient_pair import DonorRecipientPair
+from txmatching.solvers.independent_components import (
+    IndependentComponent, can_be_solved_by_components,
+    find_independent_components, get_best_combinations)
 from txmatching.solvers.matching.matching_with_score import MatchingWithScore
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(init=True)
 class SolverBase:
+    # pylint: disable=too-many-instance-attributes
+    # the solvers need the patients, the scores and the result of the search
     config_parameters: ConfigParameters
     donors_dict: Dict[DonorDbId, Donor]
     recipients_dict: Dict[RecipientDbId, Recipient]
@@ -23,6 +33,10 @@ class SolverBase:
     donors: List[Donor] = field(init=False)
     recipients: List[Recipient] = field(init=False)
     score_matrix: ScoreMatrix = field(init=False)
+    # set by solve() if the search of the matchings was stopped before all of them were searched
+    all_results_found: bool = field(init=False, default=True)
+    # set by solve() if the solver searches more matchings than it returns
+    found_matchings_count: Optional[int] = field(init=False, default=None)
 
     def __post_init__(self):
         self.donors = list(self.donors_dict.values())
@@ -38,8 +52,64 @@ class SolverBase:
     def get_matching_from_path_combinations(
             self,
             found_pairs_idxs_only: List[DonorRecipientPairIdxOnly]) -> MatchingWithScore:
-        found_pairs = frozenset(DonorRecipientPair(self.donors[found_pair_idxs_only.donor_idx],
-                                                   self.recipients[found_pair_idxs_only.recipient_idx])
-                                for found_pair_idxs_only in found_pairs_idxs_only)
-        score = get_score_for_idx_pairs(self.score_matrix, found_pairs_idxs_only)
-        return MatchingWithScore(found_pairs, score)
+        return get_matching_from_path_combinations(self.donors, self.recipients, self.score_matrix,
+                                                   found_pairs_idxs_only)
+
+    def get_independent_components(self) -> Optional[List[IndependentComponent]]:
+        """
+        Returns the components of the patients whose matchings can be searched independently (possibly in parallel),
+        None if the matchings have to be searched for all the patients at once.
+        """
+        if not can_be_solved_by_components(self.config_parameters, self.donors, self.recipients):
+            return None
+        components = find_independent_components(self.score_matrix, self.donors, self.recipients)
+        if len(components) < 2:
+            return None
+        logger.info(f'Searching matchings in {len(components)} independent components of sizes '
+                    f'{[len(component.donor_idxs) for component in components]}')
+        return components
+
+    def get_component_patients(self, component: IndependentComponent
+                               ) -> Tuple[Dict[DonorDbId, Donor], Dict[RecipientDbId, Recipient], ScoreMatrix]:
+        donors = [self.donors[donor_idx] for donor_idx in component.donor_idxs]
+        recipients = [self.recipients[recipient_idx] for recipient_idx in component.recipient_idxs]
+        return ({donor.db_id: donor for donor in donors},
+                {recipient.db_id: recipient for recipient in recipients},
+                self.score_matrix[np.ix_(component.donor_idxs, component.recipient_idxs)])
+
+    def get_best_matchings_of_components(
+            self,
+            path_combinations_per_component: List[List[List[DonorRecipientPairIdxOnly]]],
+            max_number_of_matchings: int) -> Iterator[MatchingWithScore]:
+        """
+        Combines the path combinations found in the independent components (with the indices of all the patients)
+        into the best matchings of all the patients.
+        """
+        # (sort key, path combination) of each component from the best, components without any are left out
+        keyed_path_combinations_per_component = [
+            sorted(((self.get_matching_from_path_combinations(path_combination).get_sort_key(), path_combination)
+                    for path_combination in path_combinations),
+                   key=lambda keyed_path_combination: keyed_path_combination[0],
+                   reverse=True)
+            for path_combinations in path_combinations_per_component if path_combinations
+        ]
+        best_combinations = get_best_combinations(
+            [[sort_key for sort_key, _ in keyed_path_combinations]
+             for keyed_path_combinations in keyed_path_combinations_per_component],
+            max_number_of_matchings)
+        for combination in best_combinations:
+            yield self.get_matching_from_path_combinations([
+                pair for keyed_path_combinations, idx in zip(keyed_path_combinations_per_component, combination)
+                for pair in keyed_path_combinations[idx][1]
+            ])
+
+
+def get_matching_from_path_combinations(donors: List[Donor],
+                                        recipients: List[Recipient],
+                                        score_matrix: ScoreMatrix,
+                                        found_pairs_idxs_only: List[DonorRecipientPairIdxOnly]) -> MatchingWithScore:
+    found_pairs = frozenset(DonorRecipientPair(donors[found_pair_idxs_only.donor_idx],
+                                               recipients[found_pair_idxs_only.recipient_idx])
+                            for found_pair_idxs_only in found_pairs_idxs_only)
+    score = get_score_for_idx_pairs(score_matrix, found_pairs_idxs_only)
+    return MatchingWithScore(found_pairs, score)
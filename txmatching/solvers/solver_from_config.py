@@ -6,10 +6,11 @@ from txmatching.patients.patient_types import DonorDbId, RecipientDbId
 from txmatching.scorers.additive_scorer import AdditiveScorer
 from txmatching.solvers.all_solutions_solver.all_solutions_solver import \
     AllSolutionsSolver
-from txmatching.solvers.ilp_solver.ilp_solver import ILPSolver
+from txmatching.solvers.ilp_solver.ilp_solver import (
+    ILPCycleFormulationSolver, ILPSolver)
 from txmatching.solvers.solver_base import SolverBase
 
-SUPPORTED_SOLVERS = [AllSolutionsSolver, ILPSolver]
+SUPPORTED_SOLVERS = [AllSolutionsSolver, ILPSolver, ILPCycleFormulationSolver]
 
 
 def solver_from_configuration(config_parameters: ConfigParameters,
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CacheStatistics:
+    name: str
+    hits: int
+    misses: int
+    size: int
+    max_size: Optional[int]
+    # estimated memory taken by the cached values in bytes, if known
+    memory_size: Optional[int] = None
+
+    @classmethod
+    def from_lru_cache(cls, name: str, cached_function) -> 'CacheStatistics':
+        cache_info = cached_function.cache_info()
+        return cls(name=name, hits=cache_info.hits, misses=cache_info.misses, size=cache_info.currsize,
+                   max_size=cache_info.maxsize)
@@ -40,10 +40,13 @@ class Scorer(str, Enum):
 class Solver(str, Enum):
     AllSolutionsSolver = 'AllSolutionsSolver'
     ILPSolver = 'ILPSolver'
+    ILPCycleFormulationSolver = 'ILPCycleFormulationSolver'
 
 
 # pylint:enable=invalid-name
 
+ILP_SOLVERS = {Solver.ILPSolver, Solver.ILPCycleFormulationSolver}
+
 HLA_GROUPS_PROPERTIES = {
     HLAGroup.A: HLAGroupProperties(
         name='A',
@@ -162,3 +165,10 @@ class MatchType(str, Enum):
 class TxmEventState(str, Enum):
     OPEN = 'OPEN'
     CLOSED = 'CLOSED'
+
+
+class SolveJobStatus(str, Enum):
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    FINISHED = 'FINISHED'
+    FAILED = 'FAILED'
@@ -1,5 +1,4 @@
 import logging
-import re
 from dataclasses import dataclass
 from typing import Callable, Dict, List
 
@@ -164,8 +163,6 @@ def _match_through_lambda(current_compatibility_index: float,
     return current_compatibility_index
 
 
-# TODO check better for the fact that a code has letters at the end maybe add as code property to the object
-# https://github.com/mild-blue/txmatching/issues/637
 def _match_through_high_res_codes(current_compatibility_index: float,
                                   donor_matches: List[HLAMatch],
                                   recipient_matches: List[HLAMatch],
@@ -310,6 +307,4 @@ def _hla_types_for_hla_group(donor_hla_typing: HLATyping, hla_group: HLAGroup) -
 
 
 def _high_res_code_without_letter(hla_type: HLAType) -> bool:
-    if hla_type.code.high_res is not None:
-        return not re.match(r'.*[A-Z]$', hla_type.code.high_res)
-    return True
+    return hla_type.code.interned.high_res_without_letter
@@ -1,10 +1,23 @@
+import itertools
 from dataclasses import dataclass
-from typing import List, Set
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
 
-from txmatching.patients.hla_model import HLAAntibodies, HLAAntibody, HLATyping
+from txmatching.patients.hla_model import (AntibodiesPerGroupIndex,
+                                           HLAAntibodies, HLAAntibody, HLAType,
+                                           HLATyping, MatchingAntibodies)
 from txmatching.utils.enums import (AntibodyMatchTypes, HLACrossmatchLevel,
                                     HLAGroup)
 
+# If an antibody matches the donor in several ways, the first match type in this list is the one that is reported
+ANTIBODY_MATCH_TYPES_PRECEDENCE = [
+    AntibodyMatchTypes.HIGH_RES,
+    AntibodyMatchTypes.SPLIT,
+    AntibodyMatchTypes.BROAD,
+    AntibodyMatchTypes.UNDECIDABLE,
+    AntibodyMatchTypes.HIGH_RES_WITH_BROAD,
+    AntibodyMatchTypes.HIGH_RES_WITH_SPLIT
+]
+
 
 @dataclass(eq=True, frozen=True)
 class AntibodyMatch:
@@ -31,36 +44,109 @@ def is_positive_hla_crossmatch(donor_hla_typing: HLATyping,
          A23 -> A24 False if use_high_resolution else True
          A9 -> A23 True
          A9 broad <=> A23, A24 split
+    The result is the same as if the antibody matches from get_crossmatched_antibodies were checked, but no matches
+    are built and the first match that is surely positive is returned right away.
     :param donor_hla_typing: donor hla_typing to crossmatch
     :param recipient_antibodies: recipient antibodies to crossmatch
     :param use_high_resolution: setting whether to high res resolution for crossmatch determination
     :param crossmatch_level:
     :return:
     """
-    common_codes = {antibody_match.hla_antibody for antibody_match_group in
-                    get_crossmatched_antibodies(donor_hla_typing, recipient_antibodies, use_high_resolution)
-                    for antibody_match in antibody_match_group.antibody_matches
-                    if antibody_match.match_type.is_positive_for_level(crossmatch_level)}
-    # if there are any common codes, positive crossmatch is found
-    return len(common_codes) > 0
+    # the match types that are positive for the level and are not preceded by a match type that is not
+    surely_positive_match_types = set(itertools.takewhile(
+        lambda match_type: match_type.is_positive_for_level(crossmatch_level), ANTIBODY_MATCH_TYPES_PRECEDENCE
+    ))
+
+    for hla_per_group, antibodies_index in zip(donor_hla_typing.hla_per_groups,
+                                               recipient_antibodies.index_per_groups):
+        assert hla_per_group.hla_group == antibodies_index.hla_group
+        if not antibodies_index.over_cutoff:
+            continue
+
+        match_types_per_antibody = {}  # type: Dict[HLAAntibody, Set[AntibodyMatchTypes]]
+        for match_type, antibodies_over_cutoff in _antibody_matches_per_hla_type(hla_per_group.hla_types,
+                                                                                 antibodies_index,
+                                                                                 use_high_resolution):
+            if antibodies_over_cutoff and match_type in surely_positive_match_types:
+                return True
+            for antibody in antibodies_over_cutoff:
+                match_types_per_antibody.setdefault(antibody, set()).add(match_type)
 
+        if hla_per_group.hla_group == HLAGroup.Other:
+            for antibody in _undecidable_antibodies(hla_per_group.hla_types, antibodies_index.over_cutoff):
+                match_types_per_antibody.setdefault(antibody, set()).add(AntibodyMatchTypes.UNDECIDABLE)
 
-def _get_antibodies_over_cutoff(antibodies: List[HLAAntibody]) -> List[HLAAntibody]:
-    return [antibody for antibody in antibodies if antibody.mfi >= antibody.cutoff]
+        if any(_reported_match_type(match_types).is_positive_for_level(crossmatch_level)
+               for match_types in match_types_per_antibody.values()):
+            return True
 
+    return False
 
-def _get_antibodies_with_high_res(antibodies: List[HLAAntibody]) -> List[HLAAntibody]:
-    return [antibody for antibody in antibodies if antibody.code.high_res]
+
+def _antibody_matches_per_hla_type(
+        hla_types: List[HLAType],
+        antibodies_index: AntibodiesPerGroupIndex,
+        use_high_resolution: bool
+) -> Iterator[Tuple[AntibodyMatchTypes, Tuple[HLAAntibody, ...]]]:
+    """
+    Yields the match type and the matched antibodies over cutoff for each HLA type that matches some antibodies.
+    Only the first level (high res, split, broad) on which the HLA type matches is checked.
+    """
+    for hla_type in hla_types:
+        # check high res crossmatch
+        if use_high_resolution and hla_type.code.high_res is not None:
+            matching_antibodies = antibodies_index.by_high_res.get(hla_type.code.high_res)
+            if matching_antibodies is not None:
+                assert len(matching_antibodies.antibodies) == 1, 'due to parsing, each antibody should be unique'
+                yield AntibodyMatchTypes.HIGH_RES, matching_antibodies.over_cutoff
+                continue
+        # check split crossmatch
+        if hla_type.code.split is not None:
+            matching_antibodies = antibodies_index.by_split.get(hla_type.code.split)
+            if matching_antibodies is not None:
+                yield _match_type(matching_antibodies, AntibodyMatchTypes.HIGH_RES_WITH_SPLIT,
+                                  AntibodyMatchTypes.SPLIT), matching_antibodies.over_cutoff
+                continue
+        # check broad crossmatch, the antibodies with split are matched only if the HLA type has no split
+        antibodies_by_broad = antibodies_index.by_broad if hla_type.code.split is None \
+            else antibodies_index.by_broad_without_split
+        matching_antibodies = antibodies_by_broad.get(hla_type.code.broad)
+        if matching_antibodies is not None:
+            yield _match_type(matching_antibodies, AntibodyMatchTypes.HIGH_RES_WITH_BROAD,
+                              AntibodyMatchTypes.BROAD), matching_antibodies.over_cutoff
+
+
+def _match_type(matching_antibodies: MatchingAntibodies,
+                match_type_with_high_res: AntibodyMatchTypes,
+                match_type: AntibodyMatchTypes) -> AntibodyMatchTypes:
+    if matching_antibodies.all_over_cutoff_with_high_res:
+        return AntibodyMatchTypes.HIGH_RES
+    elif matching_antibodies.some_over_cutoff_with_high_res:
+        return match_type_with_high_res
+    else:
+        return match_type
+
+
+def _undecidable_antibodies(hla_types: List[HLAType], antibodies: Iterable[HLAAntibody]) -> List[HLAAntibody]:
+    """
+    Antibodies in group Other whose group the donor has no HLA type in.
+    """
+    groups_other = {hla_type.code.group for hla_type in hla_types}
+    return [antibody for antibody in antibodies if antibody.code.group not in groups_other]
+
+
+def _reported_match_type(match_types: Set[AntibodyMatchTypes]) -> AntibodyMatchTypes:
+    return next((match_type for match_type in ANTIBODY_MATCH_TYPES_PRECEDENCE if match_type in match_types),
+                AntibodyMatchTypes.NONE)
 
 
-# TODO improve and remove pylint ignores https://github.com/mild-blue/txmatching/issues/947
-# pylint: disable=too-many-branches,too-many-locals,too-many-nested-blocks,too-many-statements
 def get_crossmatched_antibodies(donor_hla_typing: HLATyping,
                                 recipient_antibodies: HLAAntibodies,
                                 use_high_resolution: bool) -> List[AntibodyMatchForHLAGroup]:
     antibody_matches_for_groups = []
-    for hla_per_group, antibodies_per_group in zip(donor_hla_typing.hla_per_groups,
-                                                   recipient_antibodies.hla_antibodies_per_groups):
+    for hla_per_group, antibodies_per_group, antibodies_index in zip(donor_hla_typing.hla_per_groups,
+                                                                     recipient_antibodies.hla_antibodies_per_groups,
+                                                                     recipient_antibodies.index_per_groups):
         assert hla_per_group.hla_group == antibodies_per_group.hla_group
 
         antibodies = antibodies_per_group.hla_antibody_list
@@ -68,77 +154,23 @@ def get_crossmatched_antibodies(donor_hla_typing: HLATyping,
 
         # check for missing typization group in OTHER
         if hla_per_group.hla_group == HLAGroup.Other:
-            groups_other = {hla_type.code.group for hla_type in hla_per_group.hla_types}
-            for antibody in antibodies:
-                if antibody.code.group not in groups_other:
-                    positive_matches.add(AntibodyMatch(antibody, AntibodyMatchTypes.UNDECIDABLE))
-
-        for hla_type in hla_per_group.hla_types:
-            # check high res crossmatch
-            if use_high_resolution and hla_type.code.high_res is not None:
-                matching_antibodies = [antibody for antibody in antibodies
-                                       if antibody.code.high_res == hla_type.code.high_res]
-                if len(matching_antibodies) > 0:
-                    assert len(matching_antibodies) == 1, 'due to parsing, each antibody should be unique'
-                    for antibody_over_cutoff in _get_antibodies_over_cutoff(matching_antibodies):
-                        positive_matches.add(AntibodyMatch(antibody_over_cutoff, AntibodyMatchTypes.HIGH_RES))
-                    continue
-            # check split crossmatch
-            if hla_type.code.split is not None:
-                matching_antibodies = [antibody for antibody in antibodies
-                                       if antibody.code.split == hla_type.code.split]
-                if len(matching_antibodies) > 0:
-                    antibodies_over_cutoff = _get_antibodies_over_cutoff(matching_antibodies)
-                    antibodies_with_high_res = _get_antibodies_with_high_res(matching_antibodies)
-                    if set(matching_antibodies) == set(antibodies_over_cutoff) == set(antibodies_with_high_res):
-                        for antibody_over_cutoff in antibodies_over_cutoff:
-                            positive_matches.add(
-                                AntibodyMatch(antibody_over_cutoff, AntibodyMatchTypes.HIGH_RES))
-                    elif len(_get_antibodies_over_cutoff(antibodies_with_high_res)) > 0:
-                        for antibody_over_cutoff in antibodies_over_cutoff:
-                            positive_matches.add(
-                                AntibodyMatch(antibody_over_cutoff, AntibodyMatchTypes.HIGH_RES_WITH_SPLIT))
-                    else:
-                        for antibody_over_cutoff in antibodies_over_cutoff:
-                            positive_matches.add(AntibodyMatch(antibody_over_cutoff, AntibodyMatchTypes.SPLIT))
-                    continue
-            # check broad crossmatch
-            matching_antibodies = [antibody for antibody in antibodies
-                                   if antibody.code.broad == hla_type.code.broad
-                                   and (antibody.code.split is None
-                                        or hla_type.code.split is None)]
-            if len(matching_antibodies) > 0:
-                antibodies_over_cutoff = _get_antibodies_over_cutoff(matching_antibodies)
-                antibodies_with_high_res = _get_antibodies_with_high_res(matching_antibodies)
-                if set(matching_antibodies) == set(antibodies_over_cutoff) == set(antibodies_with_high_res):
-                    for antibody_over_cutoff in antibodies_over_cutoff:
-                        positive_matches.add(
-                            AntibodyMatch(antibody_over_cutoff, AntibodyMatchTypes.HIGH_RES))
-                elif len(_get_antibodies_over_cutoff(antibodies_with_high_res)) > 0:
-                    for antibody_over_cutoff in antibodies_over_cutoff:
-                        positive_matches.add(
-                            AntibodyMatch(antibody_over_cutoff, AntibodyMatchTypes.HIGH_RES_WITH_BROAD))
-                else:
-                    for antibody_over_cutoff in antibodies_over_cutoff:
-                        positive_matches.add(AntibodyMatch(antibody_over_cutoff, AntibodyMatchTypes.BROAD))
+            for antibody in _undecidable_antibodies(hla_per_group.hla_types, antibodies):
+                positive_matches.add(AntibodyMatch(antibody, AntibodyMatchTypes.UNDECIDABLE))
+
+        for match_type, antibodies_over_cutoff in _antibody_matches_per_hla_type(hla_per_group.hla_types,
+                                                                                 antibodies_index,
+                                                                                 use_high_resolution):
+            for antibody_over_cutoff in antibodies_over_cutoff:
+                positive_matches.add(AntibodyMatch(antibody_over_cutoff, match_type))
 
         # Construct antibody matches set
         antibody_matches_set = set()
-        for antibody in _get_antibodies_over_cutoff(antibodies):
-            if AntibodyMatch(antibody, AntibodyMatchTypes.HIGH_RES) in positive_matches:
-                antibody_matches_set.add(AntibodyMatch(antibody, AntibodyMatchTypes.HIGH_RES))
-            elif AntibodyMatch(antibody, AntibodyMatchTypes.SPLIT) in positive_matches:
-                antibody_matches_set.add(AntibodyMatch(antibody, AntibodyMatchTypes.SPLIT))
-            elif AntibodyMatch(antibody, AntibodyMatchTypes.BROAD) in positive_matches:
-                antibody_matches_set.add(AntibodyMatch(antibody, AntibodyMatchTypes.BROAD))
-            elif AntibodyMatch(antibody, AntibodyMatchTypes.UNDECIDABLE) in positive_matches:
-                antibody_matches_set.add(AntibodyMatch(antibody, AntibodyMatchTypes.UNDECIDABLE))
-            elif AntibodyMatch(antibody, AntibodyMatchTypes.HIGH_RES_WITH_BROAD) in positive_matches:
-                antibody_matches_set.add(AntibodyMatch(antibody, AntibodyMatchTypes.HIGH_RES_WITH_BROAD))
-            elif AntibodyMatch(antibody, AntibodyMatchTypes.HIGH_RES_WITH_SPLIT) in positive_matches:
-                antibody_matches_set.add(AntibodyMatch(antibody, AntibodyMatchTypes.HIGH_RES_WITH_SPLIT))
-            else:
-                antibody_matches_set.add(AntibodyMatch(antibody, AntibodyMatchTypes.NONE))
+        for antibody in antibodies_index.over_cutoff:
+            antibody_matches_set.add(next(
+                (AntibodyMatch(antibody, match_type) for match_type in ANTIBODY_MATCH_TYPES_PRECEDENCE
+                 if AntibodyMatch(antibody, match_type) in positive_matches),
+                AntibodyMatch(antibody, AntibodyMatchTypes.NONE)
+            ))
 
         antibody_matches_for_groups.append(AntibodyMatchForHLAGroup(
             hla_per_group.hla_group,
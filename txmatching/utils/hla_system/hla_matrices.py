@@ -0,0 +1,335 @@
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from txmatching.patients.hla_model import HLAAntibodies, HLAType, HLATyping
+from txmatching.utils.enums import (GENE_HLA_GROUPS,
+                                    GENE_HLA_GROUPS_WITH_OTHER,
+                                    AntibodyMatchTypes, HLACrossmatchLevel,
+                                    HLAGroup, MatchType)
+from txmatching.utils.hla_system.compatibility_index import (
+    CIConfiguration, DefaultCIConfiguration, _high_res_code_without_letter)
+from txmatching.utils.hla_system.hla_crossmatch import \
+    ANTIBODY_MATCH_TYPES_PRECEDENCE
+
+# Donor x recipient matrix counterparts of compatibility_index and is_positive_hla_crossmatch. Every HLA code is
+# translated to an integer once, the whole matrix is then computed by numpy broadcasting instead of calling the per pair
+# functions for every donor and recipient. The results have to be the same as the results of the per pair functions.
+
+# Code id of a missing code (None in high res or split)
+_NO_CODE = -1
+# Code id of a code that no donor has, so it can not match anything
+_UNKNOWN_CODE = -2
+
+_CODE_LEVELS = ['high_res', 'split', 'broad']
+
+_HLA_GROUP_IDS = {hla_group: group_id for group_id, hla_group in enumerate(list(HLAGroup) + [None])}
+
+_MATCH_TYPE_TO_BIT = {match_type: 1 << position for position, match_type in enumerate(ANTIBODY_MATCH_TYPES_PRECEDENCE)}
+
+
+class _Vocabulary:
+    """
+    Assigns small integers to hashable values (None included) in the order they are first added.
+    """
+
+    def __init__(self):
+        self._ids = {}  # type: Dict[Hashable, int]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, value: Hashable) -> int:
+        return self._ids.setdefault(value, len(self._ids))
+
+    def get(self, value: Hashable) -> Optional[int]:
+        return self._ids.get(value)
+
+
+@dataclass
+class _AntibodiesInGroup:  # pylint: disable=too-many-instance-attributes
+    """
+    Antibodies of one HLA group of all recipients concatenated in the order of recipients.
+    """
+    recipient_idxs: np.ndarray
+    high_res: np.ndarray
+    split: np.ndarray
+    broad: np.ndarray
+    split_is_none: np.ndarray
+    has_high_res: np.ndarray
+    over_cutoff: np.ndarray
+    hla_group: np.ndarray
+
+
+# pylint: disable=too-many-locals
+# the matrix computations are easier to follow with all the intermediate results named
+def compatibility_index_matrix(donor_hla_typings: List[HLATyping],
+                               recipient_hla_typings: List[HLATyping],
+                               ci_configuration: CIConfiguration = None) -> np.ndarray:
+    """
+    Returns matrix with compatibility_index(donor_hla_typings[i], recipient_hla_typings[j]) at position [i, j].
+
+    Each donor HLA type is matched on the best level (high res, split, broad) on which some recipient HLA type of the
+    same group has the same code and the bonuses for the matched levels are summed up.
+    """
+    if ci_configuration is None:
+        ci_configuration = DefaultCIConfiguration()
+
+    ci_matrix = np.zeros((len(donor_hla_typings), len(recipient_hla_typings)), dtype=np.int64)
+    for hla_group in GENE_HLA_GROUPS_WITH_OTHER:
+        donor_idxs, donor_hla_types = _donor_hla_types_for_compatibility_index(donor_hla_typings, hla_group)
+
+        vocabulary = _Vocabulary()
+        # Codes of donor HLA types with a letter at the end are not matched at all
+        matchable = [_high_res_code_without_letter(hla_type) for hla_type in donor_hla_types]
+        donor_codes = {
+            level: np.array([_donor_code_id(vocabulary, getattr(hla_type.code, level), level) if is_matchable
+                             else _NO_CODE
+                             for hla_type, is_matchable in zip(donor_hla_types, matchable)], dtype=np.int64)
+            for level in _CODE_LEVELS
+        }
+
+        # The last column is never set and it is used for the donor HLA types without a code
+        recipient_has_code = {level: np.zeros((len(recipient_hla_typings), len(vocabulary) + 1), dtype=bool)
+                              for level in _CODE_LEVELS}
+        for recipient_idx, recipient_hla_typing in enumerate(recipient_hla_typings):
+            for hla_type in _hla_types_for_hla_group(recipient_hla_typing, hla_group):
+                for level in _CODE_LEVELS:
+                    code_id = vocabulary.get(getattr(hla_type.code, level))
+                    if code_id is not None:
+                        recipient_has_code[level][recipient_idx, code_id] = True
+
+        # matches[level][k, j] is True if k-th donor HLA type has the same code on the level as some HLA type of
+        # recipient j
+        matches = {level: recipient_has_code[level][:, donor_codes[level]].T for level in _CODE_LEVELS}
+        bonus = np.select(
+            [matches['high_res'], matches['split'], matches['broad']],
+            [ci_configuration.compute_match_compatibility_index(MatchType.HIGH_RES, hla_group),
+             ci_configuration.compute_match_compatibility_index(MatchType.SPLIT, hla_group),
+             ci_configuration.compute_match_compatibility_index(MatchType.BROAD, hla_group)],
+            default=ci_configuration.compute_match_compatibility_index(MatchType.NONE, hla_group)
+        )
+        np.add.at(ci_matrix, donor_idxs, bonus)
+
+    return ci_matrix.astype(float)
+
+
+def positive_hla_crossmatch_matrix(donor_hla_typings: List[HLATyping],
+                                   recipients_antibodies: List[HLAAntibodies],
+                                   use_high_resolution: bool,
+                                   crossmatch_level: HLACrossmatchLevel = HLACrossmatchLevel.NONE) -> np.ndarray:
+    """
+    Returns boolean matrix with
+    is_positive_hla_crossmatch(donor_hla_typings[i], recipients_antibodies[j], use_high_resolution, crossmatch_level)
+    at position [i, j].
+
+    The antibody match types of every distinct donor HLA code are found for all antibodies of all recipients at once.
+    Match types of the donor are the union of match types of his HLA codes, the reported match type of each antibody is
+    then decided by ANTIBODY_MATCH_TYPES_PRECEDENCE the same way as in get_crossmatched_antibodies.
+    """
+    n_donors, n_recipients = len(donor_hla_typings), len(recipients_antibodies)
+    positive_for_match_type_bits = _positive_for_match_type_bits_lookup(crossmatch_level)
+
+    positive_crossmatch = np.zeros((n_donors, n_recipients), dtype=bool)
+    for hla_group in GENE_HLA_GROUPS_WITH_OTHER:
+        hla_types_per_donor = [_hla_types_for_hla_group(hla_typing, hla_group) for hla_typing in donor_hla_typings]
+
+        vocabulary = _Vocabulary()
+        # Distinct (high res, split, broad) codes of all donors in the group
+        donor_code_to_idx = {}  # type: Dict[Tuple[Optional[str], Optional[str], Optional[str]], int]
+        donor_code_idxs = [[donor_code_to_idx.setdefault(
+            (hla_type.code.high_res, hla_type.code.split, hla_type.code.broad), len(donor_code_to_idx)
+        ) for hla_type in hla_types] for hla_types in hla_types_per_donor]
+        donor_codes = list(donor_code_to_idx)
+        codes = {
+            level: np.array([_donor_code_id(vocabulary, code[level_idx], level) for code in donor_codes],
+                            dtype=np.int64).reshape(-1, 1)
+            for level_idx, level in enumerate(_CODE_LEVELS)
+        }
+        code_split_is_none = np.array([code[1] is None for code in donor_codes], dtype=bool).reshape(-1, 1)
+
+        antibodies = _encode_antibodies_in_group(recipients_antibodies, hla_group, vocabulary)
+        if len(antibodies.recipient_idxs) == 0:
+            continue
+
+        match_type_bits = _match_type_bits_per_code_and_antibody(codes, code_split_is_none, antibodies,
+                                                                 n_recipients, use_high_resolution)
+
+        # Donor has the match type for an antibody if any of his codes has it
+        donor_has_code = np.zeros((n_donors, len(donor_codes)), dtype=np.float32)
+        for donor_idx, code_idxs in enumerate(donor_code_idxs):
+            donor_has_code[donor_idx, code_idxs] = 1
+        donor_match_type_bits = np.zeros((n_donors, len(antibodies.recipient_idxs)), dtype=np.uint8)
+        for bit in _MATCH_TYPE_TO_BIT.values():
+            donor_match_type_bits |= np.where(
+                (donor_has_code @ ((match_type_bits & bit) > 0).astype(np.float32)) > 0, bit, 0
+            ).astype(np.uint8)
+
+        if hla_group == HLAGroup.Other:
+            donor_match_type_bits |= np.where(
+                _undecidable_antibodies(hla_types_per_donor, antibodies),
+                _MATCH_TYPE_TO_BIT[AntibodyMatchTypes.UNDECIDABLE], 0
+            ).astype(np.uint8)
+
+        positive_antibodies = positive_for_match_type_bits[donor_match_type_bits] & antibodies.over_cutoff
+        positive_crossmatch |= _any_per_recipient(positive_antibodies, antibodies.recipient_idxs, n_recipients)
+
+    return positive_crossmatch
+
+
+# the local variables follow the steps of get_crossmatched_antibodies
+def _match_type_bits_per_code_and_antibody(codes: Dict[str, np.ndarray],
+                                           code_split_is_none: np.ndarray,
+                                           antibodies: _AntibodiesInGroup,
+                                           n_recipients: int,
+                                           use_high_resolution: bool) -> np.ndarray:
+    """
+    Returns matrix of match types (as bits) that a donor with one HLA code would have for the antibodies.
+    """
+    recipient_idxs = antibodies.recipient_idxs
+
+    def any_per_recipient(matrix: np.ndarray) -> np.ndarray:
+        return _any_per_recipient(matrix, recipient_idxs, n_recipients)[:, recipient_idxs]
+
+    same_high_res = (codes['high_res'] != _NO_CODE) & (codes['high_res'] == antibodies.high_res) & use_high_resolution
+    same_split = (codes['split'] != _NO_CODE) & (codes['split'] == antibodies.split)
+    same_broad = (codes['broad'] == antibodies.broad) & (antibodies.split_is_none | code_split_is_none)
+
+    # The first level on which some antibody of the recipient matches is the only one checked
+    high_res_matched = any_per_recipient(same_high_res)
+    split_checked = ~high_res_matched & any_per_recipient(same_split)
+    broad_checked = ~high_res_matched & ~split_checked & any_per_recipient(same_broad)
+
+    match_type_bits = np.zeros(same_high_res.shape, dtype=np.uint8)
+    match_type_bits |= np.where(same_high_res & antibodies.over_cutoff,
+                                _MATCH_TYPE_TO_BIT[AntibodyMatchTypes.HIGH_RES], 0).astype(np.uint8)
+
+    over_cutoff_with_high_res = antibodies.over_cutoff & antibodies.has_high_res
+    for checked, same_code, match_type_with_high_res, match_type in [
+        (split_checked, same_split, AntibodyMatchTypes.HIGH_RES_WITH_SPLIT, AntibodyMatchTypes.SPLIT),
+        (broad_checked, same_broad, AntibodyMatchTypes.HIGH_RES_WITH_BROAD, AntibodyMatchTypes.BROAD)
+    ]:
+        all_matching_over_cutoff_with_high_res = ~any_per_recipient(same_code & ~over_cutoff_with_high_res)
+        some_matching_over_cutoff_with_high_res = any_per_recipient(same_code & over_cutoff_with_high_res)
+        matched = checked & same_code & antibodies.over_cutoff
+        match_type_bits |= np.select(
+            [matched & all_matching_over_cutoff_with_high_res,
+             matched & some_matching_over_cutoff_with_high_res,
+             matched],
+            [_MATCH_TYPE_TO_BIT[AntibodyMatchTypes.HIGH_RES],
+             _MATCH_TYPE_TO_BIT[match_type_with_high_res],
+             _MATCH_TYPE_TO_BIT[match_type]],
+            default=0
+        ).astype(np.uint8)
+
+    return match_type_bits
+
+
+# pylint: enable=too-many-locals
+
+
+def _undecidable_antibodies(hla_types_per_donor: List[List[HLAType]], antibodies: _AntibodiesInGroup) -> np.ndarray:
+    """
+    Antibody is undecidable for a donor if the donor has no HLA type in the group of the antibody.
+    """
+    donor_has_group = np.zeros((len(hla_types_per_donor), len(_HLA_GROUP_IDS)), dtype=bool)
+    for donor_idx, hla_types in enumerate(hla_types_per_donor):
+        for hla_type in hla_types:
+            donor_has_group[donor_idx, _HLA_GROUP_IDS[hla_type.code.group]] = True
+    return ~donor_has_group[:, antibodies.hla_group]
+
+
+def _positive_for_match_type_bits_lookup(crossmatch_level: HLACrossmatchLevel) -> np.ndarray:
+    """
+    For every combination of match type bits, returns whether the match type reported for the antibody is positive.
+    """
+    n_match_type_bits_combinations = 1 << len(ANTIBODY_MATCH_TYPES_PRECEDENCE)
+    lookup = np.zeros(n_match_type_bits_combinations, dtype=bool)
+    for match_type_bits in range(n_match_type_bits_combinations):
+        reported_match_type = next((match_type for match_type in ANTIBODY_MATCH_TYPES_PRECEDENCE
+                                    if match_type_bits & _MATCH_TYPE_TO_BIT[match_type]),
+                                   AntibodyMatchTypes.NONE)
+        lookup[match_type_bits] = reported_match_type.is_positive_for_level(crossmatch_level)
+    return lookup
+
+
+def _any_per_recipient(matrix: np.ndarray, recipient_idxs: np.ndarray, n_recipients: int) -> np.ndarray:
+    """
+    Reduces columns of the matrix that belong to the same recipient (recipient_idxs has to be sorted) by logical or.
+    """
+    any_per_recipient = np.zeros((matrix.shape[0], n_recipients), dtype=bool)
+    if matrix.size == 0:
+        return any_per_recipient
+    counts = np.bincount(recipient_idxs, minlength=n_recipients)
+    starts = np.cumsum(counts) - counts
+    has_columns = counts > 0
+    any_per_recipient[:, has_columns] = np.logical_or.reduceat(matrix, starts[has_columns], axis=1)
+    return any_per_recipient
+
+
+def _encode_antibodies_in_group(recipients_antibodies: List[HLAAntibodies],
+                                hla_group: HLAGroup,
+                                vocabulary: _Vocabulary) -> _AntibodiesInGroup:
+    antibodies_with_recipient_idx = [
+        (recipient_idx, antibody)
+        for recipient_idx, recipient_antibodies in enumerate(recipients_antibodies)
+        for antibodies_per_group in recipient_antibodies.hla_antibodies_per_groups
+        if antibodies_per_group.hla_group == hla_group
+        for antibody in antibodies_per_group.hla_antibody_list
+    ]
+
+    def code_ids(level: str) -> np.ndarray:
+        return np.array([_antibody_code_id(vocabulary, getattr(antibody.code, level), level)
+                         for _, antibody in antibodies_with_recipient_idx], dtype=np.int64)
+
+    return _AntibodiesInGroup(
+        recipient_idxs=np.array([recipient_idx for recipient_idx, _ in antibodies_with_recipient_idx], dtype=np.int64),
+        high_res=code_ids('high_res'),
+        split=code_ids('split'),
+        broad=code_ids('broad'),
+        split_is_none=np.array([antibody.code.split is None for _, antibody in antibodies_with_recipient_idx],
+                               dtype=bool),
+        has_high_res=np.array([bool(antibody.code.high_res) for _, antibody in antibodies_with_recipient_idx],
+                              dtype=bool),
+        over_cutoff=np.array([antibody.mfi >= antibody.cutoff for _, antibody in antibodies_with_recipient_idx],
+                             dtype=bool),
+        hla_group=np.array([_HLA_GROUP_IDS[antibody.code.group] for _, antibody in antibodies_with_recipient_idx],
+                           dtype=np.int64)
+    )
+
+
+def _donor_code_id(vocabulary: _Vocabulary, code: Optional[str], level: str) -> int:
+    # Missing broad codes are compared as any other broad code
+    if code is None and level != 'broad':
+        return _NO_CODE
+    return vocabulary.add(code)
+
+
+def _antibody_code_id(vocabulary: _Vocabulary, code: Optional[str], level: str) -> int:
+    if code is None and level != 'broad':
+        return _NO_CODE
+    code_id = vocabulary.get(code)
+    return code_id if code_id is not None else _UNKNOWN_CODE
+
+
+def _donor_hla_types_for_compatibility_index(donor_hla_typings: List[HLATyping],
+                                             hla_group: HLAGroup) -> Tuple[np.ndarray, List[HLAType]]:
+    """
+    Returns HLA types of all donors in the group together with the index of their donor. HLA types of genes with only
+    one HLA type are taken twice (homozygous donor), as in compatibility_index.
+    """
+    donor_idxs = []
+    donor_hla_types = []
+    for donor_idx, hla_typing in enumerate(donor_hla_typings):
+        hla_types = _hla_types_for_hla_group(hla_typing, hla_group)
+        if hla_group in GENE_HLA_GROUPS and len(hla_types) == 1:
+            hla_types = hla_types + hla_types
+        donor_idxs.extend([donor_idx] * len(hla_types))
+        donor_hla_types.extend(hla_types)
+    return np.array(donor_idxs, dtype=np.int64), donor_hla_types
+
+
+def _hla_types_for_hla_group(hla_typing: HLATyping, hla_group: HLAGroup) -> List[HLAType]:
+    return next(hla_per_group.hla_types for hla_per_group in hla_typing.hla_per_groups if
+                hla_per_group.hla_group == hla_group)
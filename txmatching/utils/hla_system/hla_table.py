@@ -1,10 +1,10 @@
+import bisect
 from typing import Set, Union
 
 from txmatching.utils.hla_system.hla_regexes import try_convert_ultra_high_res
 from txmatching.utils.hla_system.hla_transformations.parsing_issue_detail import \
     ParsingIssueDetail
-from txmatching.utils.hla_system.rel_dna_ser_parsing import (
-    PATH_TO_REL_DNA_SER, parse_rel_dna_ser)
+from txmatching.utils.hla_system.rel_dna_ser_parsing import load_rel_dna_ser
 
 # the dict below is based on http://hla.alleles.org/antigens/recognised_serology.html
 
@@ -62,16 +62,22 @@ SPLIT_TO_BROAD = {'A23': 'A9',
                   'DQ8': 'DQ3',
                   'DQ9': 'DQ3'
                   }
-PARSED_DATAFRAME_WITH_HIGH_RES_TRANSFORMATIONS = parse_rel_dna_ser(PATH_TO_REL_DNA_SER)
-ALL_HIGH_RES_CODES = set(parse_rel_dna_ser(PATH_TO_REL_DNA_SER).split.to_dict().keys())
+PARSED_DATAFRAME_WITH_HIGH_RES_TRANSFORMATIONS = load_rel_dna_ser()
+ALL_HIGH_RES_CODES = set(PARSED_DATAFRAME_WITH_HIGH_RES_TRANSFORMATIONS.split.to_dict().keys())
 _HIGH_RES_TO_SPLIT_DICT = PARSED_DATAFRAME_WITH_HIGH_RES_TRANSFORMATIONS.dropna().split.to_dict()
 
 ALL_HIGH_RES_CODES_WITH_SPLIT_BROAD_CODE = {high_res for high_res, split in _HIGH_RES_TO_SPLIT_DICT.items()}
 
+# sorted so that the high res codes with a common prefix form a contiguous block that can be found by bisection
+_SORTED_HIGH_RES_CODES_WITH_SPLIT = sorted(_HIGH_RES_TO_SPLIT_DICT)
+
 
 def _get_possible_splits_for_high_res_code(high_res_code: str) -> Set[str]:
-    return {split for high_res, split in _HIGH_RES_TO_SPLIT_DICT.items() if
-            high_res.startswith(f'{high_res_code}:')}
+    prefix = f'{high_res_code}:'
+    first_index = bisect.bisect_left(_SORTED_HIGH_RES_CODES_WITH_SPLIT, prefix)
+    # the codes are ASCII, so all the codes with the prefix sort before the prefix followed by the maximal character
+    last_index = bisect.bisect_left(_SORTED_HIGH_RES_CODES_WITH_SPLIT, f'{prefix}\uffff', lo=first_index)
+    return {_HIGH_RES_TO_SPLIT_DICT[high_res] for high_res in _SORTED_HIGH_RES_CODES_WITH_SPLIT[first_index:last_index]}
 
 
 def high_res_low_res_to_split_or_broad(high_res_code: str) -> Union[str, ParsingIssueDetail]:
@@ -6,7 +6,7 @@ from txmatching.utils.hla_system.hla_transformations.parsing_issue_detail import
     ParsingIssueDetail
 
 
-@dataclass
+@dataclass(frozen=True)
 class HlaCodeProcessingResult:
     maybe_hla_code: Optional[HLACode]
     result_detail: ParsingIssueDetail
@@ -1,7 +1,9 @@
 import logging
 import re
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
+from txmatching.utils.cache_statistics import CacheStatistics
 from txmatching.utils.hla_system.hla_regexes import (
     HIGH_RES_REGEX, HIGH_RES_REGEX_ENDING_WITH_LETTER,
     HIGH_RES_WITH_SUBUNITS_REGEX, LOW_RES_REGEX, SPLIT_RES_REGEX)
@@ -20,7 +22,13 @@ from txmatching.utils.hla_system.rel_dna_ser_exceptions import (
 
 logger = logging.getLogger(__name__)
 
+# real txm events contain at most a few thousand distinct raw codes
+HLA_CODE_PARSING_CACHE_SIZE = 16384
 
+
+# The parsing depends only on the raw code and the HLA tables, so the results are memoized. The cached results are
+# shared, which is fine as they are immutable. Warnings are logged only when a raw code is parsed for the first time.
+@lru_cache(maxsize=HLA_CODE_PARSING_CACHE_SIZE)
 # pylint: disable=too-many-return-statements
 def parse_hla_raw_code_with_details(hla_raw_code: str) -> HlaCodeProcessingResult:
     if hla_raw_code in PARSE_HLA_CODE_EXCEPTIONS:
@@ -54,17 +62,37 @@ def parse_hla_raw_code_with_details(hla_raw_code: str) -> HlaCodeProcessingResul
 
 
 def preprocess_hla_code_in(hla_code_in: str) -> List[str]:
+    return list(_preprocess_hla_code_in(hla_code_in))
+
+
+@lru_cache(maxsize=HLA_CODE_PARSING_CACHE_SIZE)
+def _preprocess_hla_code_in(hla_code_in: str) -> Tuple[str, ...]:
     hla_code_in = hla_code_in.replace(' ', '')
     hla_code_in = hla_code_in.upper()
     matched_multi_hla_codes = re.match(HIGH_RES_WITH_SUBUNITS_REGEX, hla_code_in)
     if matched_multi_hla_codes:
-        return [f'{matched_multi_hla_codes.group(1)}A1*{matched_multi_hla_codes.group(2)}',
-                f'{matched_multi_hla_codes.group(1)}B1*{matched_multi_hla_codes.group(3)}']
+        return (f'{matched_multi_hla_codes.group(1)}A1*{matched_multi_hla_codes.group(2)}',
+                f'{matched_multi_hla_codes.group(1)}B1*{matched_multi_hla_codes.group(3)}')
     # Handle this case better and elsewhere: https://trello.com/c/GG7zPLyj
     elif PARSE_HLA_CODE_EXCEPTIONS_MULTIPLE_SEROLOGICAL_CODES.get(hla_code_in):
-        return PARSE_HLA_CODE_EXCEPTIONS_MULTIPLE_SEROLOGICAL_CODES.get(hla_code_in)
+        return tuple(PARSE_HLA_CODE_EXCEPTIONS_MULTIPLE_SEROLOGICAL_CODES.get(hla_code_in))
     else:
-        return [hla_code_in]
+        return (hla_code_in,)
+
+
+def clear_hla_code_parsing_cache():
+    """
+    Has to be called whenever the HLA tables (hla_table, rel_dna_ser_exceptions) the parsing depends on change.
+    """
+    parse_hla_raw_code_with_details.cache_clear()
+    _preprocess_hla_code_in.cache_clear()
+
+
+def get_hla_code_parsing_cache_statistics() -> List[CacheStatistics]:
+    return [
+        CacheStatistics.from_lru_cache('hla_code_parsing', parse_hla_raw_code_with_details),
+        CacheStatistics.from_lru_cache('hla_code_preprocessing', _preprocess_hla_code_in)
+    ]
 
 
 def _get_standartized_high_res(hla_raw_code: str, regex=HIGH_RES_REGEX) -> Optional[str]:
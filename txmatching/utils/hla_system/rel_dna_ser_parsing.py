@@ -1,11 +1,94 @@
+import hashlib
+import logging
+import os
+import pickle
 import re
+import tempfile
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 from txmatching.utils.enums import HLA_GROUPS_PROPERTIES, HLAGroup
 from txmatching.utils.get_absolute_path import get_absolute_path
 
+logger = logging.getLogger(__name__)
+
 PATH_TO_REL_DNA_SER = get_absolute_path('./txmatching/utils/hla_system/rel_dna_ser.txt')
+# parsed rel_dna_ser.txt, built by `python -m txmatching.utils.hla_system.rel_dna_ser_parsing` or on the first load
+PATH_TO_REL_DNA_SER_ARTIFACT = get_absolute_path('./txmatching/utils/hla_system/rel_dna_ser.pickle')
+
+# bump when the structure of the artifact changes
+_ARTIFACT_VERSION = 1
+
+
+def load_rel_dna_ser(path_to_rel_dna_ser: str = PATH_TO_REL_DNA_SER,
+                     path_to_artifact: str = PATH_TO_REL_DNA_SER_ARTIFACT) -> pd.DataFrame:
+    """
+    Returns the same dataframe as parse_rel_dna_ser. The dataframe is loaded from the artifact if it was built from
+    the same rel_dna_ser file by the same parser, otherwise the file is parsed and the artifact is rebuilt.
+    """
+    checksum = _rel_dna_ser_checksum(path_to_rel_dna_ser)
+    rel_dna_ser_df = _load_artifact(path_to_artifact, checksum)
+    if rel_dna_ser_df is None:
+        rel_dna_ser_df = parse_rel_dna_ser(path_to_rel_dna_ser)
+        _save_artifact(path_to_artifact, checksum, rel_dna_ser_df)
+    return rel_dna_ser_df
+
+
+def build_rel_dna_ser_artifact(path_to_rel_dna_ser: str = PATH_TO_REL_DNA_SER,
+                               path_to_artifact: str = PATH_TO_REL_DNA_SER_ARTIFACT):
+    _save_artifact(path_to_artifact, _rel_dna_ser_checksum(path_to_rel_dna_ser),
+                   parse_rel_dna_ser(path_to_rel_dna_ser))
+
+
+def _rel_dna_ser_checksum(path_to_rel_dna_ser: str) -> str:
+    """
+    Checksum of the rel_dna_ser file, of this parser and of the pandas version the dataframe is pickled with.
+    """
+    checksum = hashlib.sha256()
+    for path in [path_to_rel_dna_ser, __file__]:
+        with open(path, 'rb') as file:
+            checksum.update(file.read())
+    checksum.update(f'{_ARTIFACT_VERSION}:{pd.__version__}'.encode())
+    return checksum.hexdigest()
+
+
+def _load_artifact(path_to_artifact: str, checksum: str) -> Optional[pd.DataFrame]:
+    # pylint: disable=broad-except
+    # a broken artifact is just rebuilt, unpickling can fail in many ways
+    try:
+        with open(path_to_artifact, 'rb') as file:
+            artifact = pickle.load(file)
+    except FileNotFoundError:
+        logger.info(f'Artifact {path_to_artifact} not found, parsing rel_dna_ser')
+        return None
+    except Exception as error:
+        logger.warning(f'Unable to load artifact {path_to_artifact}, parsing rel_dna_ser: {error}')
+        return None
+    # pylint: enable=broad-except
+
+    if not isinstance(artifact, dict) or artifact.get('checksum') != checksum:
+        logger.info(f'Artifact {path_to_artifact} is outdated, parsing rel_dna_ser')
+        return None
+    rel_dna_ser_df = artifact['rel_dna_ser_df']
+    # unpickling creates a new NaN object for every missing value, the parsed dataframe shares the single np.nan
+    return rel_dna_ser_df.where(rel_dna_ser_df.notna(), np.nan)
+
+
+def _save_artifact(path_to_artifact: str, checksum: str, rel_dna_ser_df: pd.DataFrame):
+    artifact = {'checksum': checksum, 'rel_dna_ser_df': rel_dna_ser_df}
+    temporary_path = None
+    try:
+        # written to a temporary file first so that concurrently starting processes never read a partial artifact
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path_to_artifact), delete=False) as file:
+            temporary_path = file.name
+            pickle.dump(artifact, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path_to_artifact)
+    except OSError as error:
+        logger.warning(f'Unable to save artifact {path_to_artifact}: {error}')
+        if temporary_path is not None and os.path.exists(temporary_path):
+            os.remove(temporary_path)
 
 
 def parse_rel_dna_ser(path_to_rel_dna_ser: str) -> pd.DataFrame:
@@ -68,3 +151,7 @@ def parse_rel_dna_ser(path_to_rel_dna_ser: str) -> pd.DataFrame:
 
 def _matches_any_hla_group(high_res: str) -> bool:
     return re.match(HLA_GROUPS_PROPERTIES[HLAGroup.ALL].high_res_code_regex, high_res) is not None
+
+
+if __name__ == '__main__':
+    build_rel_dna_ser_artifact()
@@ -21,6 +21,7 @@ from txmatching.database.db import db
 from txmatching.utils.get_absolute_path import get_absolute_path
 from txmatching.web.api.configuration_api import configuration_api
 from txmatching.web.api.matching_api import matching_api
+from txmatching.web.api.monitoring_api import monitoring_api
 from txmatching.web.api.optimizer_api import optimizer_api
 from txmatching.web.api.patient_api import patient_api
 from txmatching.web.api.public_api import public_api
@@ -32,6 +33,7 @@ from txmatching.web.error_handler import register_error_handlers
 from txmatching.web.web_utils.logging_config import setup_logging
 from txmatching.web.web_utils.namespaces import (CONFIGURATION_NAMESPACE,
                                                  MATCHING_NAMESPACE,
+                                                 MONITORING_NAMESPACE,
                                                  OPTIMIZER_NAMESPACE,
                                                  PATIENT_NAMESPACE,
                                                  PUBLIC_NAMESPACE,
@@ -297,3 +299,4 @@ def add_all_namespaces(api: Api):
     api.add_namespace(report_api,
                       path=f'{API_VERSION}/{TXM_EVENT_NAMESPACE}/<int:txm_event_id>/{REPORTS_NAMESPACE}')
     api.add_namespace(txm_event_api, path=f'{API_VERSION}/{TXM_EVENT_NAMESPACE}')
+    api.add_namespace(monitoring_api, path=f'{API_VERSION}/{MONITORING_NAMESPACE}')
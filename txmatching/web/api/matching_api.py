@@ -11,29 +11,40 @@ from txmatching.auth.request_context import get_user_role
 from txmatching.configuration.config_parameters import ConfigParameters
 from txmatching.data_transfer_objects.configuration.configuration_swagger import \
     ConfigurationJson
-from txmatching.data_transfer_objects.matchings.matching_swagger import \
-    CalculatedMatchingsJson
+from txmatching.data_transfer_objects.matchings.matching_swagger import (
+    CalculatedMatchingsJson, SolveJobJson)
 from txmatching.database.services.config_service import \
     get_config_for_parameters_or_save
 from txmatching.database.services.matching_service import (
     create_calculated_matchings_dto,
     get_matchings_detailed_for_pairing_result_model)
 from txmatching.database.services.pairing_result_service import \
-    get_pairing_result_comparable_to_config_or_solve
+    get_pairing_result_comparable_to_config
+from txmatching.database.services.solve_job_service import (
+    create_solve_job, get_solve_job, solve_job_model_to_dto)
 from txmatching.database.services.txm_event_service import \
     get_txm_event_complete
 from txmatching.utils.logged_user import get_current_user_id
 from txmatching.web.web_utils.namespaces import matching_api
-from txmatching.web.web_utils.route_utils import request_body, response_ok
+from txmatching.web.web_utils.route_utils import (request_arg_int,
+                                                  request_body, response_ok)
 
 logger = logging.getLogger(__name__)
 
+OFFSET_PARAM = 'offset'
+LIMIT_PARAM = 'limit'
+
 
 @matching_api.route('/calculate-for-config', methods=['POST'])
 class CalculateFromConfig(Resource):
     @matching_api.require_user_login()
     @matching_api.request_body(ConfigurationJson)
+    @matching_api.request_arg_int(OFFSET_PARAM, 'Number of matchings to skip, 0 by default.', required=False)
+    @matching_api.request_arg_int(LIMIT_PARAM, 'Max number of matchings to return, all of them by default.',
+                                  required=False)
     @matching_api.response_ok(CalculatedMatchingsJson, 'List of all matchings for given configuration.')
+    @matching_api.response_ok(SolveJobJson, 'The configuration was not solved yet, its solving was enqueued. Once '
+                                            'the solve job is finished, the matchings are returned.', code=202)
     @matching_api.response_errors()
     @require_valid_txm_event_id()
     def post(self, txm_event_id: int) -> str:
@@ -45,19 +56,36 @@ class CalculateFromConfig(Resource):
         # 1. Get or save config
         configuration = get_config_for_parameters_or_save(configuration_parameters, txm_event.db_id, user_id)
 
-        # 2. Get or solve pairing result
-        pairing_result_model = get_pairing_result_comparable_to_config_or_solve(configuration, txm_event)
+        # 2. Get pairing result or enqueue solving of the configuration
+        pairing_result_model = get_pairing_result_comparable_to_config(configuration, txm_event)
+        if pairing_result_model is None:
+            solve_job_model = create_solve_job(configuration, txm_event, user_id)
+            return response_ok(solve_job_model_to_dto(solve_job_model), code=202)
 
         # 3. Get matchings detailed from pairing_result_model
         matchings_detailed = get_matchings_detailed_for_pairing_result_model(pairing_result_model, txm_event)
 
-        calculated_matchings_dto = create_calculated_matchings_dto(matchings_detailed, matchings_detailed.matchings,
+        # 4. Get details of the requested page of matchings only
+        matchings = matchings_detailed.matchings[:configuration_parameters.max_number_of_matchings]
+        if get_user_role() == UserRole.VIEWER:
+            matchings = matchings[:configuration_parameters.max_matchings_to_show_to_viewer]
+        offset = request_arg_int(OFFSET_PARAM, default=0, minimum=0)
+        limit = request_arg_int(LIMIT_PARAM, default=len(matchings), minimum=0)
+        calculated_matchings_dto = create_calculated_matchings_dto(matchings_detailed,
+                                                                   matchings[offset:offset + limit],
                                                                    configuration.id)
-        calculated_matchings_dto.calculated_matchings = calculated_matchings_dto.calculated_matchings[
-            :configuration_parameters.max_number_of_matchings]
         if get_user_role() == UserRole.VIEWER:
-            calculated_matchings_dto.calculated_matchings = calculated_matchings_dto.calculated_matchings[
-                :configuration_parameters.max_matchings_to_show_to_viewer]
             calculated_matchings_dto.show_not_all_matchings_found = False
         logging.debug('Collected matchings and sending them')
         return response_ok(calculated_matchings_dto)
+
+
+@matching_api.route('/solve-job/<int:solve_job_id>', methods=['GET'])
+class SolveJobStatusApi(Resource):
+    @matching_api.doc(description='Get status, progress and the resulting pairing result of the solve job.')
+    @matching_api.require_user_login()
+    @matching_api.response_ok(SolveJobJson, 'Solve job.')
+    @matching_api.response_errors()
+    @require_valid_txm_event_id()
+    def get(self, txm_event_id: int, solve_job_id: int) -> str:
+        return response_ok(solve_job_model_to_dto(get_solve_job(solve_job_id, txm_event_id)))
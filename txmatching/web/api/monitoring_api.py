@@ -0,0 +1,43 @@
+# pylint: disable=no-self-use
+# Can not, the methods here need self due to the annotations. They are used for generating swagger which needs class.
+import dataclasses
+import logging
+
+from flask_restx import Resource, fields
+
+from txmatching.auth.auth_check import require_role
+from txmatching.auth.data_types import UserRole
+from txmatching.database.services.txm_event_cache import txm_event_cache
+from txmatching.utils.hla_system.hla_transformations.hla_transformations import \
+    get_hla_code_parsing_cache_statistics
+from txmatching.web.web_utils.namespaces import monitoring_api
+from txmatching.web.web_utils.route_utils import response_ok
+
+logger = logging.getLogger(__name__)
+
+
+@monitoring_api.route('/cache-statistics', methods=['GET'])
+class CacheStatistics(Resource):
+    cache_statistics_model = monitoring_api.model('CacheStatistics', {
+        'name': fields.String(required=True, description='Name of the cache.'),
+        'hits': fields.Integer(required=True),
+        'misses': fields.Integer(required=True),
+        'size': fields.Integer(required=True, description='Number of the cached values.'),
+        'max_size': fields.Integer(required=False, description='Maximal number of the cached values.'),
+        'memory_size': fields.Integer(required=False, description='Estimated memory taken by the cached values '
+                                                                  'in bytes.')
+    })
+    cache_statistics_list_model = monitoring_api.model('CacheStatisticsList', {
+        'caches': fields.List(required=True, cls_or_instance=fields.Nested(cache_statistics_model))
+    })
+
+    @monitoring_api.require_user_login()
+    @monitoring_api.response_ok(cache_statistics_list_model,
+                                description='Returns hit and miss statistics and sizes of the in-process caches of '
+                                            'this worker.')
+    @monitoring_api.response_errors()
+    @require_role(UserRole.ADMIN)
+    def get(self):
+        caches_statistics = get_hla_code_parsing_cache_statistics() + [txm_event_cache.statistics()]
+        return response_ok({'caches': [dataclasses.asdict(cache_statistics)
+                                       for cache_statistics in caches_statistics]})
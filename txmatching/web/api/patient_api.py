@@ -173,7 +173,7 @@ class AlterRecipient(Resource):
 
         return response_ok(
             UpdatedRecipientDTOOut(
-                recipient=recipient_to_recipient_dto_out(updated_recipient, txm_event_id),
+                recipient=recipient_to_recipient_dto_out(updated_recipient),
                 parsing_issues=get_parsing_issues_for_patients(recipient_ids=[updated_recipient.db_id],
                                                                txm_event_id=txm_event_id)
             )
@@ -0,0 +1,34 @@
+/**
+ * API
+ * No description provided (generated by Openapi Generator https://github.com/openapitools/openapi-generator)
+ *
+ * The version of the OpenAPI document: 1.0
+ * 
+ *
+ * NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+ * https://openapi-generator.tech
+ * Do not edit the class manually.
+ */
+
+
+export interface CacheStatisticsGenerated { 
+    hits: number;
+    /**
+     * Maximal number of the cached values.
+     */
+    max_size?: number;
+    /**
+     * Estimated memory taken by the cached values in bytes.
+     */
+    memory_size?: number;
+    misses: number;
+    /**
+     * Name of the cache.
+     */
+    name: string;
+    /**
+     * Number of the cached values.
+     */
+    size: number;
+}
+
@@ -4,6 +4,8 @@ export * from './antibodiesPerGroupGenerated';
 export * from './antibodyMatchGenerated';
 export * from './antigenMatchGenerated';
 export * from './bloodGroupEnumGenerated';
+export * from './cacheStatisticsGenerated';
+export * from './cacheStatisticsListGenerated';
 export * from './calculatedMatchingsGenerated';
 export * from './configurationGenerated';
 export * from './copyPatientsGenerated';
@@ -65,6 +67,8 @@ export * from './roundGenerated';
 export * from './scorerGenerated';
 export * from './serviceStatusGenerated';
 export * from './sexEnumGenerated';
+export * from './solveJobGenerated';
+export * from './solveJobStatusGenerated';
 export * from './solverGenerated';
 export * from './statisticsGenerated';
 export * from './successGenerated';
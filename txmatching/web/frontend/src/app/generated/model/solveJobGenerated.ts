@@ -0,0 +1,26 @@
+/**
+ * API
+ * No description provided (generated by Openapi Generator https://github.com/openapitools/openapi-generator)
+ *
+ * The version of the OpenAPI document: 1.0
+ * 
+ *
+ * NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+ * https://openapi-generator.tech
+ * Do not edit the class manually.
+ */
+import { SolveJobStatusGenerated } from './solveJobStatusGenerated';
+
+
+export interface SolveJobGenerated { 
+    config_id: number;
+    error_message?: string;
+    id: number;
+    pairing_result_id?: number;
+    /**
+     * Fraction of the solve that was done, between 0 and 1.
+     */
+    progress: number;
+    status: SolveJobStatusGenerated;
+}
+
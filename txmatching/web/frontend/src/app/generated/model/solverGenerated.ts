@@ -13,6 +13,7 @@
 
 export enum SolverGenerated {
     AllSolutionsSolver = 'AllSolutionsSolver',
-    IlpSolver = 'ILPSolver'
+    IlpSolver = 'ILPSolver',
+    IlpCycleFormulationSolver = 'ILPCycleFormulationSolver'
 };
 
@@ -1,15 +1,21 @@
 import { Injectable } from '@angular/core';
 import { Configuration } from '@app/model/Configuration';
 import { environment } from '@environments/environment';
-import { HttpClient } from '@angular/common/http';
+import { HttpClient, HttpStatusCode } from '@angular/common/http';
 import { CalculatedMatchings } from '@app/model/Matching';
-import { map } from 'rxjs/operators';
-import { CalculatedMatchingsGenerated, ConfigurationGenerated } from '@app/generated';
+import {
+  CalculatedMatchingsGenerated,
+  ConfigurationGenerated,
+  SolveJobGenerated,
+  SolveJobStatusGenerated
+} from '@app/generated';
 import { parseCalculatedMatchings } from '@app/parsers/matching.parsers';
 import { PatientList } from '@app/model';
 import { fromConfiguration } from '@app/parsers/to-generated/configuration.parsers';
 import { firstValueFrom } from 'rxjs';
 
+const solveJobPollIntervalMs = 1000;
+
 @Injectable({
   providedIn: 'root'
 })
@@ -20,11 +26,29 @@ export class MatchingService {
 
   public async calculate(txmEventId: number, config: Configuration, patients: PatientList): Promise<CalculatedMatchings> {
     const payload: ConfigurationGenerated = fromConfiguration(config);
-    return firstValueFrom(this._http.post<CalculatedMatchingsGenerated>(
-      `${environment.apiUrl}/txm-event/${txmEventId}/matching/calculate-for-config`,
-      payload
-    ).pipe(
-      map(_ => parseCalculatedMatchings(_, patients))
+    const url = `${environment.apiUrl}/txm-event/${txmEventId}/matching/calculate-for-config`;
+    let response = await firstValueFrom(this._http.post<CalculatedMatchingsGenerated | SolveJobGenerated>(
+      url, payload, { observe: 'response' }
     ));
+    // The configuration was not solved yet, wait for the solve job and then get the calculated matchings
+    while (response.status === HttpStatusCode.Accepted) {
+      await this._waitForSolveJob(txmEventId, response.body as SolveJobGenerated);
+      response = await firstValueFrom(this._http.post<CalculatedMatchingsGenerated | SolveJobGenerated>(
+        url, payload, { observe: 'response' }
+      ));
+    }
+    return parseCalculatedMatchings(response.body as CalculatedMatchingsGenerated, patients);
+  }
+
+  private async _waitForSolveJob(txmEventId: number, solveJob: SolveJobGenerated): Promise<void> {
+    while (solveJob.status === SolveJobStatusGenerated.Queued || solveJob.status === SolveJobStatusGenerated.Running) {
+      await new Promise(resolve => setTimeout(resolve, solveJobPollIntervalMs));
+      solveJob = await firstValueFrom(this._http.get<SolveJobGenerated>(
+        `${environment.apiUrl}/txm-event/${txmEventId}/matching/solve-job/${solveJob.id}`
+      ));
+    }
+    if (solveJob.status === SolveJobStatusGenerated.Failed) {
+      throw new Error(solveJob.error_message ?? 'Calculation of matchings failed.');
+    }
   }
 }
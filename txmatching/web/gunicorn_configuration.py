@@ -1,7 +1,21 @@
+import os
+
 import gunicorn
 
+from txmatching.web.solve_job_workers import (start_solve_job_workers,
+                                              stop_solve_job_workers)
+
 # do not disclose what server we're running, recommendation from pen test
 # https://stackoverflow.com/a/21294524/7169288
 # and
 # https://stackoverflow.com/a/56242881/7169288
 gunicorn.SERVER_SOFTWARE = 'intentionally-undisclosed-TXM-server'
+
+
+# the solve jobs are run by a separate pool of processes so that the web workers are not blocked by the solver
+def when_ready(server):
+    server.solve_job_workers = start_solve_job_workers(int(os.environ.get('SOLVE_JOB_WORKERS_COUNT', '1')))
+
+
+def on_exit(server):
+    stop_solve_job_workers(server.solve_job_workers)
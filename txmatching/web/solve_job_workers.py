@@ -0,0 +1,68 @@
+import logging
+import multiprocessing
+import signal
+import sys
+import time
+from multiprocessing.process import BaseProcess
+from typing import List
+
+from txmatching.database.services.compatibility_cache_service import \
+    delete_expired_compatibilities
+from txmatching.database.services.solve_job_service import run_next_solve_job
+from txmatching.web import create_app
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL_SECONDS = 1.0
+_CACHE_CLEANUP_INTERVAL_SECONDS = 3600.0
+
+
+def start_solve_job_workers(workers_count: int) -> List[BaseProcess]:
+    """
+    Starts pool of processes that run the queued solve jobs. Each process creates its own application (and database
+    connections) as they can not be shared with the parent process.
+    """
+    # spawn instead of fork, the processes are started from the gunicorn master process
+    context = multiprocessing.get_context('spawn')
+    # not daemonic, so that the workers can solve the independent components in parallel, they are stopped
+    # by stop_solve_job_workers
+    workers = [context.Process(target=_solve_job_worker_main, name=f'solve-job-worker-{worker_number}')
+               for worker_number in range(workers_count)]
+    for worker in workers:
+        worker.start()
+    logger.info(f'Started {workers_count} solve job workers')
+    return workers
+
+
+def stop_solve_job_workers(workers: List[BaseProcess]):
+    """
+    Stops the workers, the solve jobs they are running are queued again.
+    """
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.join()
+    logger.info(f'Stopped {len(workers)} solve job workers')
+
+
+def run_solve_job_worker(poll_interval_seconds: float = _POLL_INTERVAL_SECONDS):
+    """
+    Runs the queued solve jobs one by one, waits for new jobs when there is none. Needs application context.
+    The expired entries of the compatibility cache are deleted while waiting, at most once per hour.
+    """
+    next_cache_cleanup_time = time.monotonic()
+    while True:
+        if run_next_solve_job():
+            continue
+        if time.monotonic() >= next_cache_cleanup_time:
+            delete_expired_compatibilities()
+            next_cache_cleanup_time = time.monotonic() + _CACHE_CLEANUP_INTERVAL_SECONDS
+        time.sleep(poll_interval_seconds)
+
+
+def _solve_job_worker_main():
+    # terminate() sends SIGTERM, exiting lets the running solve job be queued again
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(0))
+    app = create_app()
+    with app.app_context():
+        run_solve_job_worker()
@@ -27,6 +27,9 @@ optimizer_api = Namespace(OPTIMIZER_NAMESPACE)
 REPORTS_NAMESPACE = 'reports'
 report_api = Namespace(REPORTS_NAMESPACE)
 
+MONITORING_NAMESPACE = 'monitoring'
+monitoring_api = Namespace(MONITORING_NAMESPACE)
+
 ENUMS_NAMESPACE = 'enums'
 enums_api = Namespace(ENUMS_NAMESPACE)
 